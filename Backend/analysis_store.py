@@ -0,0 +1,150 @@
+"""
+Stockage embarqué de l'analyse précédente importée pour la comparaison
+
+Le backend est interchangeable :
+- "oxigraph" : magasin SPARQL indexé en mémoire (pyoxigraph, écrit en Rust),
+  chargement N-Triples/Turtle à vitesse native
+- "rdflib"   : graphe rdflib (historique, plus lent sur les gros exports)
+- "auto"     : oxigraph si disponible, sinon rdflib
+
+Quel que soit le backend, query() retourne des tuples de chaînes Python
+(ou None pour les variables non liées), dans l'ordre des variables du SELECT.
+"""
+
+import os
+from abc import ABC, abstractmethod
+
+from config import PREVIOUS_ANALYSIS_BACKEND
+
+try:
+    import pyoxigraph
+except ImportError:
+    pyoxigraph = None
+
+try:
+    import rdflib
+except ImportError:
+    rdflib = None
+
+# Extension de fichier -> (format rdflib, type MIME)
+RDF_FORMATS = {
+    '.ttl': ('turtle', 'text/turtle'),
+    '.nt': ('nt', 'application/n-triples'),
+    '.nq': ('nquads', 'application/n-quads'),
+    '.trig': ('trig', 'application/trig'),
+    '.rdf': ('xml', 'application/rdf+xml'),
+    '.owl': ('xml', 'application/rdf+xml'),
+}
+
+
+def guess_rdf_format(filename):
+    """Retourne (format rdflib, type MIME) à partir de l'extension, Turtle par défaut"""
+    ext = os.path.splitext(filename or '')[1].lower()
+    return RDF_FORMATS.get(ext, RDF_FORMATS['.ttl'])
+
+
+class AnalysisStore(ABC):
+    """Interface commune des backends de l'analyse précédente"""
+
+    backend = None
+
+    @abstractmethod
+    def load(self, data, filename=None):
+        """Charge une sérialisation RDF (bytes ou str)"""
+
+    @abstractmethod
+    def query(self, sparql):
+        """Exécute une requête SELECT et retourne une liste de tuples"""
+
+    @abstractmethod
+    def __len__(self):
+        """Nombre de triplets chargés"""
+
+
+class OxigraphAnalysisStore(AnalysisStore):
+    """Magasin pyoxigraph en mémoire (index SPO/POS/OSP natifs)"""
+
+    backend = 'oxigraph'
+
+    def __init__(self):
+        self.store = pyoxigraph.Store()
+
+    def load(self, data, filename=None):
+        _, mime_type = guess_rdf_format(filename)
+        if hasattr(pyoxigraph, 'RdfFormat'):
+            rdf_format = pyoxigraph.RdfFormat.from_media_type(mime_type)
+            self.store.bulk_load(input=data, format=rdf_format)
+        else:
+            # pyoxigraph < 0.4
+            self.store.bulk_load(data, mime_type)
+
+    def query(self, sparql):
+        solutions = self.store.query(sparql)
+        width = len(solutions.variables)
+        rows = []
+        for solution in solutions:
+            row = []
+            for i in range(width):
+                term = solution[i]
+                row.append(term.value if term is not None else None)
+            rows.append(tuple(row))
+        return rows
+
+    def __len__(self):
+        return len(self.store)
+
+
+class RdflibAnalysisStore(AnalysisStore):
+    """Graphe rdflib (moteur SPARQL Python)"""
+
+    backend = 'rdflib'
+
+    def __init__(self):
+        self.graph = rdflib.Graph()
+
+    def load(self, data, filename=None):
+        rdf_format, _ = guess_rdf_format(filename)
+        self.graph.parse(data=data, format=rdf_format)
+
+    def query(self, sparql):
+        return [
+            tuple(str(value) if value is not None else None for value in row)
+            for row in self.graph.query(sparql)
+        ]
+
+    def __len__(self):
+        return len(self.graph)
+
+
+ANALYSIS_STORE_BACKENDS = {
+    'oxigraph': (OxigraphAnalysisStore, lambda: pyoxigraph is not None),
+    'rdflib': (RdflibAnalysisStore, lambda: rdflib is not None),
+}
+
+
+def create_analysis_store(backend=None):
+    """
+    Crée un magasin vide pour l'analyse précédente.
+
+    Args:
+        backend (str, optional): "oxigraph", "rdflib" ou "auto" (défaut: configuration)
+
+    Returns:
+        AnalysisStore: instance du backend choisi
+    """
+    backend = (backend or PREVIOUS_ANALYSIS_BACKEND or 'auto').lower()
+
+    if backend == 'auto':
+        for name in ('oxigraph', 'rdflib'):
+            store_class, available = ANALYSIS_STORE_BACKENDS[name]
+            if available():
+                return store_class()
+        raise RuntimeError("Aucun backend RDF disponible (installez pyoxigraph ou rdflib)")
+
+    if backend not in ANALYSIS_STORE_BACKENDS:
+        raise ValueError(f"Backend d'analyse inconnu: {backend}")
+
+    store_class, available = ANALYSIS_STORE_BACKENDS[backend]
+    if not available():
+        raise RuntimeError(f"Backend '{backend}' non installé")
+    return store_class()
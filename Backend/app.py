@@ -2,10 +2,15 @@ import os
 import io
 import tempfile
 import traceback
+import threading
+import time
+import math
 import ifcopenshell
 import pandas as pd
 import requests
-from flask import Flask, jsonify, request, send_from_directory, redirect, send_file, g
+from functools import wraps
+from flask import Flask, jsonify, request, send_from_directory, redirect, send_file, g, copy_current_request_context
+from werkzeug.local import LocalProxy
 from werkzeug.utils import secure_filename
 from sparql_client import (
     test_connection,
@@ -17,29 +22,80 @@ from sparql_client import (
     insert_uniformat_code,
     insert_uniformat_description,
     insert_material,
-    update_cost_for_element,
+    upsert_costs,
+    set_element_durations,
+    COST_CATEGORIES,
     update_material_for_element,
     insert_global_id,
     
     query_graphdb,
     clear_instances,
+    list_project_graphs,
     verify_cost_mapping_integrity,
     update_graphdb,
     query_ask_graphdb,
+    get_elements_page,
+    iter_all_elements,
 )
-from config import GRAPHDB_REPO
+from config import GRAPHDB_REPO, INGEST_BATCH_SIZE, PROJECT_GRAPH_BASE
 from datetime import datetime
 from comparison_routes import register_comparison_routes
+from upload_routes import register_upload_routes
+from element_index import get_element_index, invalidate_element_index
+from ifc_cache import ifc_model_cache
+from ifc_workspace import save_upload_stream, file_hash, remove_file
+import enriched_cache
+from workspace_store import (
+    workspace_store, LoadedWorkspace, load_scan, save_scan,
+    valid_workspace_id, new_workspace_id, WORKSPACE_HEADER, WORKSPACE_COOKIE,
+)
+from step_scanner import scan_ifc_file
+from ifc_extraction import extract_elements, iter_element_batches
+from reingest import reingest_records, insert_element_records, REINGEST_BATCH_SIZE
+from ingest_pipeline import IngestPipeline
+from uniformat_importer import import_phase_costs, import_uniformat_excel, existing_elements
+from lifespan_db import register_lifespan_routes
+import year_links
+from ifc_enrichment import IfcEnricher
+from jobs import job_manager, register_job_routes, report_progress, check_cancelled, JobQueueFull
+from project_graphs import query_dataset, update_dataset, current_project_id, project_graph_uri, PROJECT_COOKIE
 import urllib.parse
 
 # Configuration globale
 # Variables supprimées (code JavaScript invalide)
 
-# Stockage temporaire des fichiers IFC (en mémoire)
-ifc_storage = {
-    'current_file': None,
-    'metadata': {}
-}
+def request_workspace_id():
+    """
+    Identifiant de l'espace de travail de la requête (voir workspace_store).
+    Mémorisé dans l'environnement WSGI : partagé avec les tâches de fond de la requête.
+    """
+    workspace_id = request.environ.get('wlc.workspace_id')
+    if workspace_id:
+        return workspace_id
+    for candidate in (request.headers.get(WORKSPACE_HEADER),
+                      request.args.get('workspace'),
+                      request.cookies.get(WORKSPACE_COOKIE)):
+        if valid_workspace_id(candidate):
+            workspace_id = candidate
+            break
+    else:
+        workspace_id = new_workspace_id()
+        request.environ['wlc.new_workspace'] = True
+    request.environ['wlc.workspace_id'] = workspace_id
+    return workspace_id
+
+def current_workspace():
+    """Espace de travail de la requête, chargé une fois par contexte"""
+    if 'workspace' not in g:
+        g.workspace = LoadedWorkspace(workspace_store, request_workspace_id())
+    return g.workspace
+
+def save_current_workspace():
+    if 'workspace' in g:
+        g.workspace.save_if_changed()
+
+# Fichier IFC courant et métadonnées de l'espace de travail de la requête
+ifc_storage = LocalProxy(current_workspace)
 
 # Configuration EOL avec les VRAIES propriétés ontologiques
 EOL_PROPERTIES = {
@@ -50,6 +106,42 @@ EOL_PROPERTIES = {
 
 app = Flask(__name__)
 
+# Routes modifiant les données affichées dans le tableau des éléments (éléments, coûts,
+# durées de vie, stratégies de fin de vie) : elles seules invalident l'index du tableau
+ELEMENT_WRITE_ENDPOINTS = frozenset({
+    'parse_ifc', 'parse_ifc_groups', 'reingest_ifc', 'reset', 'create_element',
+    'update_costs', 'upload_phase_costs', 'upload_uniformat', 'clean_duplicate_costs',
+    'update_material', 'bulk_update_materials',
+    'update_lifespan', 'autofill_lifespan',
+    'update_end_of_life_strategy', 'update_group_end_of_life_strategy', 'update_bulk_eol_data'
+})
+
+def writes_element_data():
+    return request.endpoint in ELEMENT_WRITE_ENDPOINTS
+
+@app.after_request
+def invalidate_elements_after_write(response):
+    """Invalide l'index du tableau des éléments après une écriture réussie des données d'éléments"""
+    if writes_element_data() and response.status_code < 400:
+        invalidate_element_index(current_project_id())
+    return response
+
+@app.after_request
+def persist_workspace(response):
+    """Enregistre l'espace de travail modifié et transmet son identifiant au navigateur"""
+    save_current_workspace()
+    if request.environ.get('wlc.new_workspace') and 'workspace' in g:
+        response.set_cookie(WORKSPACE_COOKIE, g.workspace.workspace_id, max_age=30 * 24 * 3600, samesite='Lax')
+    return response
+
+@app.after_request
+def remember_project(response):
+    """Le projet choisi par ?project= reste actif pour les requêtes suivantes du navigateur"""
+    project_id = request.args.get('project')
+    if project_id and project_id == current_project_id() and request.cookies.get(PROJECT_COOKIE) != project_id:
+        response.set_cookie(PROJECT_COOKIE, project_id, max_age=30 * 24 * 3600, samesite='Lax')
+    return response
+
 # Fonction helper pour créer des URIs valides à partir de GUIDs
 def create_element_uri(guid):
     """
@@ -61,6 +153,63 @@ def create_element_uri(guid):
     guid_encoded = urllib.parse.quote(guid_str, safe='')
     return f"http://example.com/ifc#{guid_encoded}"
 
+def async_requested():
+    """Mode asynchrone demandé : ?async=1 ou {"async": true} dans le corps JSON"""
+    if parse_bool_arg(request.args.get('async')):
+        return True
+    data = request.get_json(silent=True)
+    return isinstance(data, dict) and bool(data.get('async'))
+
+def run_as_job(kind):
+    """
+    Permet d'exécuter une route en tâche de fond (voir jobs) en mode asynchrone.
+
+    La route est exécutée telle quelle dans un thread du pool, avec une copie
+    du contexte de la requête ; sa réponse JSON devient le résultat de la tâche.
+    Sans mode asynchrone, la route reste synchrone.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not async_requested():
+                return view(*args, **kwargs)
+            
+            # Mettre le corps en cache : la requête d'origine sera terminée quand la tâche démarrera
+            request.get_data(cache=True)
+            
+            @copy_current_request_context
+            def run():
+                try:
+                    response = app.make_response(view(*args, **kwargs))
+                finally:
+                    # Pas d'after_request dans la tâche : enregistrer l'espace de travail ici
+                    save_current_workspace()
+                payload = response.get_json(silent=True)
+                if response.status_code >= 400:
+                    error = payload.get('error') if isinstance(payload, dict) else None
+                    raise RuntimeError(error or f'HTTP {response.status_code}')
+                if writes_element_data():
+                    invalidate_element_index(current_project_id())
+                return payload
+            
+            try:
+                job = job_manager.submit(kind, run, description=request.path)
+            except JobQueueFull as e:
+                return jsonify({'error': f'File des tâches pleine: {str(e)}'}), 503
+            
+            return jsonify({
+                'success': True,
+                'async': True,
+                'job_id': job.id,
+                'status_url': f'/jobs/{job.id}',
+                'events_url': f'/jobs/{job.id}/events'
+            }), 202
+        return wrapper
+    return decorator
+
+# Suivi des tâches de fond (voir jobs)
+register_job_routes(app)
+
 @app.route('/')
 def root():
     frontend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'Frontend'))
@@ -105,34 +254,40 @@ def get_instance_details_route():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-def extract_uniformat_number(elem):
-    if hasattr(elem, "HasAssociations"):
-        for assoc in elem.HasAssociations:
-            if assoc.is_a("IfcRelAssociatesClassification"):
-                ref = assoc.RelatingClassification
-                if hasattr(ref, "ItemReference") and ref.ItemReference:
-                    return str(ref.ItemReference).strip()
-    return None
+def get_current_ifc_model():
+    """
+    Retourne le modèle ifcopenshell du fichier en mémoire.
+    Le modèle est ouvert une seule fois puis partagé entre les routes (voir ifc_cache).
+    """
+    current = ifc_storage['current_file']
+    return ifc_model_cache.get_or_open(
+        current['sha256'],
+        lambda: ifcopenshell.open(current['path']),
+        size=current['size']
+    )
 
-def extract_uniformat_description(elem):
-    if hasattr(elem, "HasAssociations"):
-        for assoc in elem.HasAssociations:
-            if assoc.is_a("IfcRelAssociatesClassification"):
-                ref = assoc.RelatingClassification
-                if hasattr(ref, "Name") and ref.Name:
-                    return str(ref.Name).strip()
-    return None
+def take_source_ifc_model():
+    """
+    Retire du cache le modèle du fichier d'origine pour le modifier (enrichissement).
+    L'ouvre si nécessaire, sans le remettre en cache. Le fichier sur disque n'est pas modifié.
+    """
+    current = ifc_storage['current_file']
+    model = ifc_model_cache.take(current['source_sha256'])
+    if model is None:
+        model = ifcopenshell.open(current['source_path'])
+    return model
 
-def extract_material(elem):
-    if hasattr(elem, "HasAssociations"):
-        for assoc in elem.HasAssociations:
-            if assoc.is_a("IfcRelAssociatesMaterial"):
-                mat = assoc.RelatingMaterial
-                if hasattr(mat, "Name") and mat.Name:
-                    return str(mat.Name).strip()
-    return None
+def use_enriched_file(current, artefact):
+    """Le fichier courant devient un fichier enrichi du cache (voir enriched_cache)"""
+    current['path'] = artefact['path']
+    current['size'] = artefact['size']
+    current['sha256'] = artefact['sha256']
+    current['enriched'] = True
+    current['data_version'] = artefact['data_version']
+    start_ifc_scan(current)
 
 @app.route('/parse-ifc', methods=['POST'])
+@run_as_job('parse-ifc')
 def parse_ifc():
     """
     Parse le fichier IFC stocké en mémoire vers l'ontologie
@@ -144,48 +299,40 @@ def parse_ifc():
         return jsonify({'error': 'Aucun fichier IFC en mémoire. Veuillez d\'abord uploader un fichier.'}), 400
     
     try:
-        # Créer un fichier temporaire avec le contenu en mémoire
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.ifc') as tmp_file:
-            tmp_file.write(ifc_storage['current_file']['content'])
-            tmp_path = tmp_file.name
-        
-        # Parser avec ifcopenshell
-        model = ifcopenshell.open(tmp_path)
-        elements = model.by_type('IfcElement')
+        # Modèle ifcopenshell partagé (ouvert une seule fois par contenu)
+        model = get_current_ifc_model()
         structure = []
         
-        for elem in elements:
-            guid = elem.GlobalId
-            name = elem.Name or ''
-            etype = elem.is_a()
-            uniformat_code, uniformat_desc = extract_uniformat_props(elem)
-            uri = create_element_uri(guid)
-            
-            # Insérer dans l'ontologie
-            insert_element(uri)
-            insert_global_id(uri, guid)
-            insert_denomination(uri, name)
-            material = extract_material(elem)
-            
-            # Insérer la classe IFC
-            from sparql_client import insert_ifc_class
-            insert_ifc_class(uri, etype)
-            
-            if uniformat_code:
-                insert_uniformat_code(uri, uniformat_code)
-            if uniformat_desc:
-                insert_uniformat_description(uri, uniformat_desc)
-            if material:
-                insert_material(uri, material)
-            
-            structure.append({
-                'GlobalId': guid,
-                'Name': name,
-                'Type': etype,
-                'Uniformat': uniformat_code if uniformat_code else '',
-                'UniformatDesc': uniformat_desc if uniformat_desc else '',
-                'Material': material if material else ''
-            })
+        # Extraction (parallèle pour les gros modèles) et écriture GraphDB se recouvrent :
+        # les lots extraits passent par une file bornée vidée par plusieurs écrivains
+        summary = load_scan(ifc_storage['current_file']['sha256']).get('summary') or {}
+        report_progress(processed=0, total=summary.get('approx_elements_count'),
+                        message='Extraction et insertion dans l\'ontologie...')
+        
+        def collect(batch):
+            for guid, name, etype, uniformat_code, uniformat_desc, material, material_layers in batch:
+                structure.append({
+                    'GlobalId': guid,
+                    'Name': name,
+                    'Type': etype,
+                    'Uniformat': uniformat_code if uniformat_code else '',
+                    'UniformatDesc': uniformat_desc if uniformat_desc else '',
+                    'Material': material if material else '',
+                    'MaterialLayers': [
+                        {'material': layer_material, 'thickness': thickness, 'fraction': fraction}
+                        for layer_material, thickness, fraction in material_layers
+                    ]
+                })
+            report_progress(processed=len(structure))
+        
+        pipeline = IngestPipeline(insert_element_records)
+        ingest_stats = pipeline.run(
+            iter_element_batches(model, path=ifc_storage['current_file']['path'], batch_size=INGEST_BATCH_SIZE),
+            on_batch=collect
+        )
+        print(f"🚀 Ingestion: {ingest_stats['items_written']} éléments en {ingest_stats['batches_written']} lots, "
+              f"{ingest_stats['total_seconds']}s (écriture cumulée {ingest_stats['write_seconds']}s)")
+        report_progress(processed=len(structure), total=len(structure))
         
         # Mettre à jour le statut
         ifc_storage['current_file']['parsed'] = True
@@ -193,35 +340,71 @@ def parse_ifc():
         ifc_storage['metadata']['parsing_status'] = 'parsed'
         ifc_storage['metadata']['last_action'] = 'parsed'
         
-        # Nettoyer le fichier temporaire
-        os.unlink(tmp_path)
-        
         return jsonify({
             'success': True,
             'message': f'Fichier "{ifc_storage["current_file"]["filename"]}" parsé avec succès',
             'elements_count': len(structure),
-            'elements': structure
+            'elements': structure,
+            'ingest': ingest_stats
         })
         
     except Exception as e:
         return jsonify({'error': f'Erreur lors du parsing: {str(e)}'}), 500
 
-def extract_uniformat_props(elem):
-    """Retourne (uniformat_code, uniformat_desc) extraits des PropertySets d'un élément IFC."""
-    uniformat_code = None
-    uniformat_desc = None
-    if hasattr(elem, "IsDefinedBy"):
-        for rel in elem.IsDefinedBy:
-            if rel.is_a("IfcRelDefinesByProperties"):
-                prop_set = rel.RelatingPropertyDefinition
-                if hasattr(prop_set, "HasProperties"):
-                    for prop in prop_set.HasProperties:
-                        pname = prop.Name.lower()
-                        if "uniformat" in pname and "number" in pname:
-                            uniformat_code = str(prop.NominalValue.wrappedValue)
-                        if "uniformat" in pname and ("description" in pname or "desc" in pname):
-                            uniformat_desc = str(prop.NominalValue.wrappedValue)
-    return uniformat_code, uniformat_desc
+@app.route('/reingest-ifc', methods=['POST'])
+@run_as_job('reingest-ifc')
+def reingest_ifc():
+    """
+    Applique une révision du modèle IFC sans /reset (voir reingest) :
+    nouveaux GUIDs insérés, attributs modifiés remplacés, coûts et données
+    des éléments inchangés conservés.
+
+    JSON optionnel : {"retire_missing": bool, "dry_run": bool, "batch_size": int}
+    """
+    if not ifc_storage['current_file']:
+        return jsonify({'error': 'Aucun fichier IFC en mémoire. Veuillez d\'abord uploader un fichier.'}), 400
+
+    data = request.get_json(silent=True) or {}
+    try:
+        # retire_missing déclenche des suppressions : seuls true/false (ou leurs équivalents texte) sont acceptés
+        retire_missing = parse_json_bool(data.get('retire_missing'))
+        dry_run = parse_json_bool(data.get('dry_run'))
+        batch_size = data.get('batch_size')
+        if batch_size is None:
+            batch_size = REINGEST_BATCH_SIZE
+        elif isinstance(batch_size, (bool, float)) or int(batch_size) < 1:
+            raise ValueError(f"batch_size invalide: {batch_size} (entier >= 1 attendu)")
+        batch_size = int(batch_size)
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': f'Paramètre invalide: {str(e)}'}), 400
+
+    try:
+        model = get_current_ifc_model()
+        records = extract_elements(model, path=ifc_storage['current_file']['path'])
+
+        result = reingest_records(
+            records,
+            retire_missing=retire_missing,
+            dry_run=dry_run,
+            batch_size=batch_size
+        )
+
+        if not result['dry_run']:
+            ifc_storage['current_file']['parsed'] = True
+            ifc_storage['metadata']['elements_count'] = len(records)
+            ifc_storage['metadata']['parsing_status'] = 'parsed'
+            ifc_storage['metadata']['last_action'] = 'reingested'
+
+        return jsonify({
+            'success': True,
+            'message': (f'Révision "{ifc_storage["current_file"]["filename"]}": {result["added"]} nouveaux, '
+                        f'{result["changed"]} modifiés, {result["removed"]} absents'),
+            'elements_count': len(records),
+            **result
+        })
+
+    except Exception as e:
+        return jsonify({'error': f'Erreur lors de la réingestion: {str(e)}'}), 500
 
 @app.route('/assets/<path:filename>')
 def serve_assets(filename):
@@ -230,123 +413,123 @@ def serve_assets(filename):
 
 @app.route('/reset', methods=['POST'])
 def reset():
+    """Vide le projet courant (DROP GRAPH) ; ?legacy=1 supprime aussi les instances du graphe par défaut"""
+    try:
+        success, message = clear_instances(include_legacy=parse_bool_arg(request.args.get('legacy')) or False)
+        if not success:
+            return jsonify({"error": message}), 500
+        year_links.clear_link_states()
+        return jsonify({"status": "instances supprimées", "project": current_project_id(), "message": message}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/projects', methods=['GET'])
+def list_projects():
+    """Projet courant et projets présents dans le repository (un graphe nommé par projet)"""
     try:
-        clear_instances()
-        return jsonify({"status": "instances supprimées"}), 200
+        graphs = list_project_graphs()
+        return jsonify({
+            "current": current_project_id(),
+            "graph": project_graph_uri(),
+            "projects": [graph[len(PROJECT_GRAPH_BASE):] for graph in graphs]
+        })
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def validate_cost_items(data):
+    """
+    Valide un lot de /update-costs avant toute écriture (GUIDs vérifiés contre
+    les éléments du projet, en une requête).
+    
+    Returns:
+        tuple: (lignes [(uri, coût, catégorie, année)], erreurs [{index, guid, error}])
+        Une même cellule (GUID, catégorie, année) répétée : la dernière valeur l'emporte.
+    """
+    rows = {}
+    errors = []
+    for idx, item in enumerate(data):
+        if not isinstance(item, dict):
+            errors.append({'index': idx, 'guid': None, 'error': "Élément invalide (doit être un dictionnaire)"})
+            continue
+        guid = item.get('guid')
+        cost = item.get('cost')
+        category = item.get('category')
+        year = item.get('year')
+        
+        if not guid:
+            error = "GUID manquant"
+        elif cost is None:
+            error = "Coût manquant"
+        elif not category:
+            error = "Catégorie manquante"
+        elif category not in COST_CATEGORIES:
+            error = f"Catégorie inconnue: {category}"
+        elif isinstance(cost, bool):
+            error = f"Coût invalide: {cost}"
+        else:
+            error = None
+            try:
+                cost = float(cost)
+                if not math.isfinite(cost):
+                    raise ValueError(cost)
+            except (TypeError, ValueError):
+                error = f"Coût invalide: {cost}"
+            try:
+                year = int(year) if year not in (None, '') else None
+                if year is not None and year < 0:
+                    raise ValueError(year)
+            except (TypeError, ValueError):
+                error = error or f"Année invalide: {year}"
+        if error:
+            errors.append({'index': idx, 'guid': guid, 'error': error})
+            continue
+        rows[(str(guid).strip(), category, year)] = (idx, cost, category, year)
+    
+    if not rows:
+        return [], errors
+    elements = existing_elements()
+    valid = []
+    for (guid, category, year), (idx, cost, _, _) in rows.items():
+        uri = elements.get(guid)
+        if uri is None:
+            errors.append({'index': idx, 'guid': guid, 'error': "Élément inconnu dans le projet"})
+            continue
+        valid.append((uri, cost, category, year))
+    errors.sort(key=lambda e: e['index'])
+    return valid, errors
+
 @app.route('/update-costs', methods=['POST'])
 def update_costs():
-    data = request.get_json()
-    print(f"🔍 update_costs - Données reçues: {data}")
-    print(f"🔍 update_costs - Type: {type(data)}")
+    """
+    Met à jour un lot de coûts (collage d'une grille Excel) : le lot est validé
+    en entier, puis appliqué en une seule transaction (upsert par VALUES, voir upsert_costs).
+    Les éléments invalides sont signalés individuellement et ignorés.
+    """
+    data = request.get_json(silent=True)
     
     if not data:
-        print("❌ update_costs - Aucune donnée reçue")
         return jsonify({"error": "Aucune donnée reçue"}), 400
     
     # Vérifier que data est une liste
     if not isinstance(data, list):
-        print(f"❌ update_costs - Pas une liste: {type(data)}")
         return jsonify({"error": "Les données doivent être une liste d'éléments"}), 400
     
+    rows, errors = validate_cost_items(data)
+    print(f"📝 update_costs - {len(data)} élément(s) reçus, {len(rows)} coût(s) valides, {len(errors)} erreur(s)")
+    
+    if not rows:
+        return jsonify({
+            "error": "Aucun coût n'a pu être mis à jour",
+            "details": [f"{e['guid'] or '#' + str(e['index'])}: {e['error']}" for e in errors],
+            "errors": errors
+        }), 400
+    
     try:
-        updated_count = 0
-        errors = []
-        
-        print(f"📝 update_costs - Traitement de {len(data)} élément(s)")
-        
-        for idx, item in enumerate(data):
-            print(f"  📦 Item {idx}: {item}")
-            
-            if not isinstance(item, dict):
-                error_msg = f"Élément invalide (doit être un dictionnaire): {item}"
-                print(f"  ❌ {error_msg}")
-                errors.append(error_msg)
-                continue
-                
-            guid = item.get('guid')
-            cost = item.get('cost')
-            category = item.get('category')
-            
-            print(f"  🔑 guid={guid}, cost={cost}, category={category}")
-            
-            if not guid:
-                error_msg = "GUID manquant dans un élément"
-                print(f"  ❌ {error_msg}")
-                errors.append(error_msg)
-                continue
-                
-            if cost is None:
-                error_msg = f"Coût manquant pour l'élément {guid}"
-                print(f"  ❌ {error_msg}")
-                errors.append(error_msg)
-                continue
-                
-            if not category:
-                error_msg = f"Catégorie manquante pour l'élément {guid}"
-                print(f"  ❌ {error_msg}")
-                errors.append(error_msg)
-                continue
-            
-            try:
-                # Convertir le coût en float si nécessaire
-                cost_float = float(cost)
-                # Créer une URI valide (gérer les espaces et caractères spéciaux)
-                elem_uri = create_element_uri(guid)
-                print(f"  ✅ Mise à jour: {elem_uri} → {cost_float} ({category})")
-                update_cost_for_element(elem_uri, cost_float, category)
-                updated_count += 1
-                print(f"  ✅ Succès pour {guid}")
-            except ValueError as e:
-                error_msg = f"Coût invalide pour l'élément {guid}: {str(e)}"
-                print(f"  ❌ {error_msg}")
-                errors.append(error_msg)
-            except requests.exceptions.RequestException as e:
-                error_msg = f"Erreur de connexion GraphDB pour l'élément {guid}: {str(e)}"
-                print(f"  ❌ {error_msg}")
-                errors.append(error_msg)
-            except Exception as e:
-                error_msg = f"Erreur lors de la mise à jour de l'élément {guid}: {str(e)}"
-                print(f"  ❌ {error_msg}")
-                print(f"  ❌ Traceback: {traceback.format_exc()}")
-                errors.append(error_msg)
-        
-        if updated_count == 0 and errors:
-            return jsonify({
-                "error": "Aucun coût n'a pu être mis à jour",
-                "details": errors
-            }), 500
-        
-        # NOUVEAU: Vérification automatique des doublons après mise à jour
-        cleanup_result = {}
-        try:
-            cleanup_result = auto_check_and_clean_duplicates()
-        except Exception as e:
-            print(f"⚠️ Erreur lors du nettoyage automatique des doublons: {str(e)}")
-            cleanup_result = {'auto_cleaned': False, 'error': str(e)}
-        
-        # IMPORTANT: Relancer la liaison avec les années après mise à jour
-        try:
-            relink_costs_to_years()
-        except Exception as e:
-            print(f"⚠️ Erreur lors de la reliaison des coûts aux années: {str(e)}")
-        
-        base_message = f"{updated_count} coût(s) mis à jour avec succès"
-        if cleanup_result.get('auto_cleaned'):
-            base_message += f" 🧹 Nettoyage automatique: {cleanup_result['duplicates_removed']} doublons supprimés."
-        
-        response = {
-            "status": base_message,
-            "updated_count": updated_count,
-            "auto_cleanup": cleanup_result
-        }
-        
-        if errors:
-            response["warnings"] = errors
-        
-        return jsonify(response)
+        start_time = time.time()
+        upsert_costs(rows)
+        print(f"✅ update_costs - {len(rows)} coût(s) écrits en {time.time() - start_time:.2f}s")
+    except requests.exceptions.RequestException as e:
+        return jsonify({"error": f"Erreur de connexion GraphDB: {str(e)}", "errors": errors}), 502
     except Exception as e:
         error_details = traceback.format_exc()
         print(f"❌ Erreur dans update_costs: {str(e)}")
@@ -355,6 +538,18 @@ def update_costs():
             "error": f"Erreur lors de la mise à jour des coûts: {str(e)}",
             "details": error_details
         }), 500
+    
+    # IMPORTANT: Relancer la liaison avec les années après mise à jour (éléments modifiés seulement)
+    relink_costs_to_years(elements=[row[0] for row in rows])
+    
+    response = {
+        "status": f"{len(rows)} coût(s) mis à jour avec succès",
+        "updated_count": len(rows)
+    }
+    if errors:
+        response["errors"] = errors
+        response["warnings"] = [f"{e['guid'] or '#' + str(e['index'])}: {e['error']}" for e in errors]
+    return jsonify(response)
 
 @app.route('/update-material', methods=['POST'])
 def update_material():
@@ -424,112 +619,164 @@ def update_lifespan():
     if not data:
         return jsonify({"error": "Aucune donnée reçue"}), 400
     try:
+        # Lot validé en entier, puis écrit en une seule mise à jour
+        rows = []
         for item in data:
             guid = item.get('guid')
             lifespan = item.get('lifespan')
             if guid and lifespan is not None:
                 try:
                     lifespan_int = int(float(lifespan))
-                    if lifespan_int > 0:
-                        set_element_duration(guid, lifespan_int)
-                    else:
-                        return jsonify({"error": f"Durée de vie invalide pour {guid}: {lifespan}"}), 400
                 except ValueError:
                     return jsonify({"error": f"Durée de vie non numérique pour {guid}: {lifespan}"}), 400
-        return jsonify({"status": "Durées de vie mises à jour avec succès"})
+                if lifespan_int <= 0:
+                    return jsonify({"error": f"Durée de vie invalide pour {guid}: {lifespan}"}), 400
+                rows.append((create_element_uri(guid), lifespan_int))
+        set_element_durations(rows)
+        relink_costs_to_years(elements=[uri for uri, _ in rows])
+        return jsonify({"status": "Durées de vie mises à jour avec succès", "updated_count": len(rows)})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def format_element_row(row):
+    """
+    Convertit une ligne pivotée (voir get_elements_page) en élément pour le tableau.
+    Applique les mêmes replis que l'affichage historique (description, matériau).
+    """
+    # Utiliser le GUID s'il existe, sinon extraire l'ID de l'URI
+    guid = row.get('guid', '')
+    if not guid:
+        elem_uri = row.get('elem', '')
+        if '#' in elem_uri:
+            guid = elem_uri.split('#')[-1]
+        elif '/' in elem_uri:
+            guid = elem_uri.split('/')[-1]
+        else:
+            guid = elem_uri
+    
+    if not guid:
+        return None
+    
+    # Logique pour la description : utiliser uniformatDesc si disponible, sinon hasDenomination
+    uniformat_desc = row.get('uniformatDesc', '')
+    denomination = row.get('name', '')
+    description = uniformat_desc if uniformat_desc else denomination
+    
+    # Logique pour le matériau : utiliser hasDenomination si matériau est vide ou <unnamed>
+    material = row.get('material', '')
+    if not material or material.strip() == '' or material.strip().lower() == '<unnamed>':
+        material = denomination
+    
+    return {
+        'GlobalId': guid,
+        'IfcClass': row.get('ifcClass', ''),
+        'Uniformat': row.get('uniformat', ''),
+        'UniformatDesc': description,  # Utilise la logique de fallback
+        'Material': material,  # Utilise la logique de fallback
+        'ConstructionCost': row.get('constructionCost', ''),
+        'OperationCost': row.get('operationCost', ''),
+        'MaintenanceCost': row.get('maintenanceCost', ''),
+        'EndOfLifeCost': row.get('endOfLifeCost', ''),
+        'Lifespan': row.get('lifespan', ''),
+        'EndOfLifeStrategy': row.get('endOfLifeStrategy', '')
+    }
+
+# Paramètres déclenchant le mode indexé (filtres, tri, pages) de /get-ifc-elements
+ELEMENT_GRID_PARAMS = (
+    'page', 'sort', 'order', 'uniformat', 'ifc_class', 'material', 'description',
+    'lifespan_min', 'lifespan_max', 'has_cost', 'q', 'facets', 'refresh', 'fields'
+)
+
+def load_formatted_elements():
+    """Liste complète des éléments au format du tableau (une ligne par GUID)"""
+    items = {}
+    for row in iter_all_elements():
+        item = format_element_row(row)
+        if item and item['GlobalId'] not in items:
+            items[item['GlobalId']] = item
+    return list(items.values())
+
+def parse_bool_arg(value):
+    """Convertit un paramètre de requête en booléen (None si absent)"""
+    if value is None or value == '':
+        return None
+    return value.strip().lower() in ('1', 'true', 'yes', 'oui')
+
+def parse_json_bool(value, default=False):
+    """Booléen d'un corps JSON : true/false, 0/1 ou texte équivalent ; ValueError sinon"""
+    if value is None or value == '':
+        return default
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int) and value in (0, 1):
+        return bool(value)
+    if isinstance(value, str):
+        text = value.strip().lower()
+        if text in ('1', 'true', 'yes', 'oui'):
+            return True
+        if text in ('0', 'false', 'no', 'non'):
+            return False
+    raise ValueError(f"booléen attendu: {value!r}")
+
 @app.route('/get-ifc-elements')
 def get_ifc_elements():
+    """
+    Liste des éléments, une ligne par élément avec les coûts pivotés.
+    
+    Sans paramètre : retourne tous les éléments (parcours paginé côté serveur, sans plafond).
+    Avec page_size (et after, after_elem) : retourne une page et la clé de la page suivante.
+    Avec filtres / tri / page : interroge l'index en mémoire et retourne le total
+    filtré et une seule page :
+        uniformat=<préfixe>, ifc_class=<classe> (répétable), material=<matériau> (répétable),
+        description=<description> (répétable), lifespan_min, lifespan_max, has_cost=true|false,
+        q=<texte>, sort=<colonne>, order=asc|desc, page, page_size, facets=1, refresh=1
+    Avec fields=guid : GUIDs de tous les éléments filtrés, sans pagination
+    (sélection de tous les éléments filtrés).
+    """
     try:
-        sparql = """
-        PREFIX eol: <http://www.w3id.org/dpp/EoL#>
-        PREFIX wlc: <http://www.semanticweb.org/adamy/ontologies/2025/WLCONTO#>
-        PREFIX wlcpo: <http://www.semanticweb.org/adamy/ontologies/2025/WLCPO#>
-        PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
-        SELECT ?elem ?typeClass ?guid ?name ?uniformat ?uniformatDesc ?material ?ifcClass ?cost ?costType ?lifespan ?endOfLifeStrategy
-        WHERE {
-          ?typeClass rdfs:subClassOf* wlc:Element .
-          ?elem a ?typeClass .
-          OPTIONAL { ?elem wlc:globalId ?guid . }
-          OPTIONAL { ?elem wlc:guid ?guid . }
-          OPTIONAL { ?elem wlc:hasDenomination ?name . }
-          OPTIONAL { ?elem wlc:hasUniformatCode ?uniformat . }
-          OPTIONAL { ?elem wlc:hasUniformatDescription ?uniformatDesc . }
-          OPTIONAL { ?elem wlc:hasIfcMaterial ?material . }
-          OPTIONAL { ?elem wlc:hasIfcClass ?ifcClass . }
-          OPTIONAL { 
-            ?elem wlc:hasCost ?costInst .
-            ?costInst wlc:hasCostValue ?cost .
-            ?costInst a ?costType .
-          }
-          OPTIONAL { ?elem wlc:hasDuration ?lifespan . }
-          OPTIONAL { ?elem eol:hasType ?endOfLifeStrategy . }
-        }
-        LIMIT 10000
-        """
-        results = query_graphdb(sparql)
-        items = {}
-        for row in results:
-            # Utiliser le GUID s'il existe, sinon extraire l'ID de l'URI
-            guid = row.get('guid', '')
-            if not guid:
-                elem_uri = row.get('elem', '')
-                if '#' in elem_uri:
-                    guid = elem_uri.split('#')[-1]
-                elif '/' in elem_uri:
-                    guid = elem_uri.split('/')[-1]
-                else:
-                    guid = elem_uri
-            
-            if not guid:
-                continue
-                
-            if guid not in items:
-                # Logique pour la description : utiliser uniformatDesc si disponible, sinon hasDenomination
-                uniformat_desc = row.get('uniformatDesc', '')
-                denomination = row.get('name', '')
-                description = uniformat_desc if uniformat_desc else denomination
-                
-                # Logique pour le matériau : utiliser hasDenomination si matériau est vide ou <unnamed>
-                material = row.get('material', '')
-                if not material or material.strip() == '' or material.strip().lower() == '<unnamed>':
-                    material = denomination
-                
-                items[guid] = {
-                    'GlobalId': guid,
-                    'IfcClass': row.get('ifcClass', ''),
-                    'Uniformat': row.get('uniformat', ''),
-                    'UniformatDesc': description,  # Utilise la logique de fallback
-                    'Material': material,  # Utilise la logique de fallback
-                    'ConstructionCost': '',
-                    'OperationCost': '',
-                    'MaintenanceCost': '',
-                    'EndOfLifeCost': '',
-                    'Lifespan': '',  # Initialisé vide
-                    'EndOfLifeStrategy': ''  # Nouveau champ pour la stratégie
-                }
-            
-            # Mise à jour de la durée de vie si elle existe dans cette ligne
-            if row.get('lifespan') and not items[guid]['Lifespan']:
-                items[guid]['Lifespan'] = row.get('lifespan', '')
-            
-            # Mise à jour de la stratégie de fin de vie si elle existe
-            if row.get('endOfLifeStrategy') and not items[guid]['EndOfLifeStrategy']:
-                items[guid]['EndOfLifeStrategy'] = row.get('endOfLifeStrategy', '')
-            
-            if 'cost' in row and 'costType' in row:
-                v = row['cost']
-                if 'ConstructionCosts' in row['costType']:
-                    items[guid]['ConstructionCost'] = v
-                elif 'OperationCosts' in row['costType']:
-                    items[guid]['OperationCost'] = v
-                elif 'MaintenanceCosts' in row['costType']:
-                    items[guid]['MaintenanceCost'] = v
-                elif 'EndOfLifeCosts' in row['costType']:
-                    items[guid]['EndOfLifeCost'] = v
-        return jsonify(list(items.values()))
+        args = request.args
+        
+        if any(name in args for name in ELEMENT_GRID_PARAMS):
+            index = get_element_index(load_formatted_elements, key=current_project_id(), refresh=parse_bool_arg(args.get('refresh')) or False)
+            filters = dict(
+                uniformat=args.get('uniformat', '').strip() or None,
+                ifc_classes=[v for v in args.getlist('ifc_class') if v],
+                materials=[v for v in args.getlist('material') if v],
+                descriptions=[v for v in args.getlist('description') if v],
+                lifespan_min=args.get('lifespan_min', type=float),
+                lifespan_max=args.get('lifespan_max', type=float),
+                has_cost=parse_bool_arg(args.get('has_cost')),
+                text=args.get('q', '').strip() or None
+            )
+            if args.get('fields') == 'guid':
+                guids = index.guids(**filters)
+                return jsonify({'total': len(guids), 'guids': guids})
+            result = index.search(
+                page=args.get('page', 1, type=int),
+                page_size=args.get('page_size', type=int),
+                sort=args.get('sort') or None,
+                order=args.get('order', 'asc'),
+                **filters
+            )
+            if parse_bool_arg(args.get('facets')):
+                result['facets'] = index.facets
+            return jsonify(result)
+        
+        page_size = args.get('page_size', type=int)
+        
+        if page_size:
+            after = args.get('after') or None
+            rows = get_elements_page(after, page_size, args.get('after_elem') or None)
+            items = [item for item in (format_element_row(row) for row in rows) if item]
+            has_more = len(rows) == page_size
+            return jsonify({
+                'elements': items,
+                'next_after': rows[-1]['key'] if has_more else None,
+                'next_after_elem': rows[-1]['elem'] if has_more else None,
+                'has_more': has_more
+            })
+        
+        return jsonify(load_formatted_elements())
     except Exception as e:
         import traceback
         print(traceback.format_exc())  # Affiche l'erreur dans la console Flask
@@ -537,143 +784,141 @@ def get_ifc_elements():
 
 @app.route('/upload-uniformat', methods=['POST'])
 def upload_uniformat():
-    from uniformat_importer import import_uniformat_excel
     f = request.files['file']
-    tmp_path = os.path.join(tempfile.gettempdir(), f.filename)
+    tmp_path = os.path.join(tempfile.gettempdir(), secure_filename(f.filename) or 'uniformat.xlsx')
     f.save(tmp_path)
     phase = request.form.get('phase', 'ConstructionCosts')
     try:
         result = import_uniformat_excel(tmp_path, phase)
         return jsonify({"status": "OK", "details": result})
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+    finally:
+        os.unlink(tmp_path)
+
+DUPLICATE_CLEANUP_CHUNK = 5000
 
-def auto_check_and_clean_duplicates():
-    """Fonction helper pour vérifier et nettoyer automatiquement les doublons"""
+# Instances de coût en surplus, par élément et catégorie. Les occurrences
+# annuelles (<élément>/cost/<catégorie>/<année>) ne sont pas des doublons et
+# sont exclues ; l'URI déterministe <élément>/cost/<catégorie> est toujours
+# conservée, sinon MIN(?cost) parmi les anciennes URIs.
+DUPLICATE_COSTS_PATTERN = """
+    {
+      SELECT ?element ?costType (MIN(?key) AS ?keep)
+      WHERE {
+        ?element wlc:hasCost ?c .
+        ?c a ?costType .
+        FILTER(?costType IN (wlc:ConstructionCosts, wlc:OperationCosts, wlc:MaintenanceCosts, wlc:EndOfLifeCosts))
+        BIND(CONCAT(STR(?element), "/cost/", LCASE(STRAFTER(STR(?costType), "#"))) AS ?base)
+        FILTER(!STRSTARTS(STR(?c), CONCAT(?base, "/")))
+        BIND(IF(STR(?c) = ?base, "", STR(?c)) AS ?key)
+      }
+      GROUP BY ?element ?costType
+      HAVING (COUNT(?c) > 1)
+    }
+    ?element wlc:hasCost ?cost .
+    ?cost a ?costType .
+    BIND(CONCAT(STR(?element), "/cost/", LCASE(STRAFTER(STR(?costType), "#"))) AS ?costBase)
+    FILTER(!STRSTARTS(STR(?cost), CONCAT(?costBase, "/")))
+    FILTER(IF(STR(?cost) = ?costBase, "", STR(?cost)) > ?keep)
+"""
+
+def count_duplicate_costs():
+    rows = query_graphdb(f"""
+    PREFIX wlc: <http://www.semanticweb.org/adamy/ontologies/2025/WLCONTO#>
+    SELECT (COUNT(DISTINCT ?cost) AS ?surplus) WHERE {{ {DUPLICATE_COSTS_PATTERN} }}
+    """)
+    return int(rows[0].get('surplus', 0)) if rows else 0
+
+def auto_check_and_clean_duplicates(chunk_size=DUPLICATE_CLEANUP_CHUNK):
+    """
+    Supprime les instances de coût en double (une mise à jour ensembliste par lot).
+    Conserve MIN(?cost) par élément et catégorie ; nombre de requêtes proportionnel
+    au nombre de doublons / chunk_size, et non au nombre de groupes.
+    """
     try:
-        # Vérifier s'il y a des doublons
-        duplicates = query_graphdb("""
-        PREFIX wlc: <http://www.semanticweb.org/adamy/ontologies/2025/WLCONTO#>
-        SELECT ?element ?costType (COUNT(?cost) as ?costCount)
-        WHERE {
-          ?element wlc:hasCost ?cost .
-          ?cost a ?costType ;
-                wlc:hasCostValue ?costValue .
-          FILTER(?costType IN (wlc:ConstructionCosts, wlc:OperationCosts, wlc:MaintenanceCosts, wlc:EndOfLifeCosts))
-        }
-        GROUP BY ?element ?costType
-        HAVING (?costCount > 1)
-        """)
-        
-        if duplicates:
-            print(f"⚠️ DÉTECTION AUTOMATIQUE: {len(duplicates)} groupes de doublons détectés après import")
-            print("🧹 Nettoyage automatique en cours...")
-            
-            # Appeler la fonction de nettoyage interne
-            import requests
-            
-            total_cleaned = 0
-            for group in duplicates:
-                element_uri = group['element'] 
-                cost_type = group['costType']
-                
-                # Récupérer tous les coûts de ce groupe
-                costs_query = f"""
-                PREFIX wlc: <http://www.semanticweb.org/adamy/ontologies/2025/WLCONTO#>
-                SELECT ?cost WHERE {{
-                  <{element_uri}> wlc:hasCost ?cost .
-                  ?cost a <{cost_type}> .
-                }}
-                ORDER BY ?cost
-                """
-                
-                costs_result = query_graphdb(costs_query)
-                if len(costs_result) > 1:
-                    # Garder le premier, supprimer les autres
-                    cost_to_keep = costs_result[0]['cost']
-                    costs_to_delete = [c['cost'] for c in costs_result[1:]]
-                    
-                    for cost_to_delete in costs_to_delete:
-                        delete_query = f"""
-                        PREFIX wlc: <http://www.semanticweb.org/adamy/ontologies/2025/WLCONTO#>
-                        DELETE {{
-                            <{element_uri}> wlc:hasCost <{cost_to_delete}> .
-                            <{cost_to_delete}> ?p ?o .
-                        }}
-                        WHERE {{
-                            <{element_uri}> wlc:hasCost <{cost_to_delete}> .
-                            <{cost_to_delete}> ?p ?o .
-                        }}
-                        """
-                        
-                        response = requests.post(GRAPHDB_REPO.rstrip("/") + "/statements", data={"update": delete_query})
-                        if response.ok:
-                            total_cleaned += 1
-            
-            print(f"✅ Nettoyage automatique terminé: {total_cleaned} doublons supprimés")
-            return {'auto_cleaned': True, 'duplicates_removed': total_cleaned}
-        else:
+        surplus = count_duplicate_costs()
+        if not surplus:
             print("✅ Aucun doublon détecté après import")
             return {'auto_cleaned': False, 'duplicates_removed': 0}
+        
+        print(f"⚠️ DÉTECTION AUTOMATIQUE: {surplus} instances de coût en double")
+        print("🧹 Nettoyage automatique en cours...")
+        delete_chunk = f"""
+        PREFIX wlc: <http://www.semanticweb.org/adamy/ontologies/2025/WLCONTO#>
+        DELETE {{
+            ?element wlc:hasCost ?cost .
+            ?cost ?p ?o .
+        }}
+        WHERE {{
+            {{
+              SELECT DISTINCT ?element ?cost WHERE {{ {DUPLICATE_COSTS_PATTERN} }}
+              LIMIT {int(chunk_size)}
+            }}
+            ?cost ?p ?o .
+        }}
+        """
+        # Nombre de lots fixé par le comptage initial : durée bornée même si des doublons réapparaissent
+        for _ in range(-(-surplus // chunk_size)):
+            update_graphdb(delete_chunk)
+        
+        removed = max(0, surplus - count_duplicate_costs())
+        print(f"✅ Nettoyage automatique terminé: {removed} doublons supprimés")
+        return {'auto_cleaned': True, 'duplicates_removed': removed}
             
     except Exception as e:
         print(f"❌ Erreur lors du nettoyage automatique: {str(e)}")
         return {'auto_cleaned': False, 'error': str(e)}
 
+@app.route('/clean-duplicate-costs', methods=['POST'])
+def clean_duplicate_costs():
+    """Maintenance : supprime les instances de coût en double (anciennes URIs) du projet"""
+    result = auto_check_and_clean_duplicates()
+    if 'error' in result:
+        return jsonify(result), 500
+    if result['duplicates_removed']:
+        # Les coûts supprimés modifient les empreintes de liaison aux années
+        result['year_links'] = relink_costs_to_years()
+    return jsonify({'success': True, **result})
+
 @app.route('/upload-phase-costs', methods=['POST'])
 def upload_phase_costs():
+    """Import en masse des coûts d'une phase (voir uniformat_importer.import_phase_costs)"""
     # Vérifier le fichier
     if 'file' not in request.files:
         return jsonify({'error': 'Aucun fichier reçu.'}), 400
     f = request.files['file']
     phase = request.form.get('phase', None)
-    if phase not in {'ConstructionCosts', 'OperationCosts', 'MaintenanceCosts', 'EndOfLifeCosts'}:
+    if phase not in COST_CATEGORIES:
         return jsonify({'error': f'Phase invalide ({phase})'}), 400
 
     # Sauver temporairement
     tmp = tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(f.filename)[-1])
+    tmp.close()
     f.save(tmp.name)
 
     try:
-        df = pd.read_excel(tmp.name) if tmp.name.endswith(('xls', 'xlsx')) else pd.read_csv(tmp.name)
+        result = import_phase_costs(tmp.name, phase)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
-        return jsonify({'error': f"Erreur lecture fichier : {str(e)}"}), 400
-
-    # Trouver les colonnes
-    guid_col = next((c for c in df.columns if 'guid' in c.lower()), None)
-    cost_col = next((c for c in df.columns if any(w in c.lower() for w in ['cout', 'coût', 'cost'])), None)
-    if not guid_col or not cost_col:
-        return jsonify({'error': f"Colonnes GUID ou COÛTS non trouvées ({df.columns.tolist()})"}), 400
-
-    nb_ok = 0
-    for idx, row in df.iterrows():
-        guid = str(row[guid_col]).strip()
-        cost = row[cost_col]
-        if not guid or pd.isnull(cost):
-            continue
-        try:
-            cost = float(cost)
-        except Exception:
-            continue
-        uri = f"http://example.com/ifc#{guid}"
-        nb_ok += 1
-
-    os.unlink(tmp.name)
-    
-    # NOUVEAU: Vérification automatique des doublons après import
-    cleanup_result = auto_check_and_clean_duplicates()
+        print(f"❌ Erreur import {phase}: {traceback.format_exc()}")
+        return jsonify({'error': f"Erreur lors de l'import : {str(e)}"}), 500
+    finally:
+        os.unlink(tmp.name)
     
-    relink_costs_to_years()
-    
-    # Message de retour enrichi
-    base_message = f'Import {phase} terminé. {nb_ok} coûts insérés.'
-    if cleanup_result.get('auto_cleaned'):
-        base_message += f" 🧹 Nettoyage automatique: {cleanup_result['duplicates_removed']} doublons supprimés."
+    base_message = f"Import {phase} terminé. {result['inserted']} coûts insérés."
+    if result['unknown']:
+        base_message += f" {result['unknown']} GUID(s) inconnu(s)."
+    if result['invalid']:
+        base_message += f" {result['invalid']} ligne(s) invalide(s)."
     
     return jsonify({
         'status': base_message,
-        'costs_inserted': nb_ok,
-        'auto_cleanup': cleanup_result
+        'costs_inserted': result['inserted'],
+        **result
     })
 
 @app.route('/export-costs-excel')
@@ -739,22 +984,7 @@ def export_costs_excel():
         mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
     )
 
-bdd_lifespan = {}
-bdd_lifespan_filename = None
-
-@app.route('/get-lifespan-bdd-info')
-def get_lifespan_bdd_info():
-    relink_costs_to_years()
-    return jsonify({
-        "filename": bdd_lifespan_filename,
-        "count": len(bdd_lifespan)
-    })
-@app.route('/remove-lifespan-bdd', methods=['POST'])
-def remove_lifespan_bdd():
-    global bdd_lifespan, bdd_lifespan_filename
-    bdd_lifespan = {}
-    bdd_lifespan_filename = None
-    return jsonify({"success": True})
+register_lifespan_routes(app)
 
 @app.route('/export-elements-excel')
 def export_elements_excel():
@@ -763,86 +993,24 @@ def export_elements_excel():
         import io
         from flask import send_file
         
-        # Récupérer les données des éléments (même logique que get-ifc-elements)
-        sparql = """
-        PREFIX wlc: <http://www.semanticweb.org/adamy/ontologies/2025/WLCONTO#>
-        PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
-        SELECT ?elem ?typeClass ?guid ?name ?uniformat ?uniformatDesc ?material ?ifcClass ?cost ?costType ?lifespan
-        WHERE {
-          ?typeClass rdfs:subClassOf* wlc:Element .
-          ?elem a ?typeClass .
-          OPTIONAL { ?elem wlc:globalId ?guid . }
-          OPTIONAL { ?elem wlc:guid ?guid . }
-          OPTIONAL { ?elem wlc:hasDenomination ?name . }
-          OPTIONAL { ?elem wlc:hasUniformatCode ?uniformat . }
-          OPTIONAL { ?elem wlc:hasUniformatDescription ?uniformatDesc . }
-          OPTIONAL { ?elem wlc:hasIfcMaterial ?material . }
-          OPTIONAL { ?elem wlc:hasIfcClass ?ifcClass . }
-          OPTIONAL { 
-            ?elem wlc:hasCost ?costInst .
-            ?costInst wlc:hasCostValue ?cost .
-            ?costInst a ?costType .
-          }
-          OPTIONAL { ?elem wlc:hasDuration ?lifespan . }
-        }
-        LIMIT 10000
-        """
-        results = query_graphdb(sparql)
+        # Récupérer les données des éléments (même requête pivotée que get-ifc-elements)
         items = {}
-        
-        for row in results:
-            # Utiliser le GUID s'il existe, sinon extraire l'ID de l'URI
-            guid = row.get('guid', '')
-            if not guid:
-                elem_uri = row.get('elem', '')
-                if '#' in elem_uri:
-                    guid = elem_uri.split('#')[-1]
-                elif '/' in elem_uri:
-                    guid = elem_uri.split('/')[-1]
-                else:
-                    guid = elem_uri
-            
-            if not guid:
+        for row in iter_all_elements():
+            element = format_element_row(row)
+            if not element or element['GlobalId'] in items:
                 continue
-
-            if guid not in items:
-                # Logique pour la description : utiliser uniformatDesc si disponible, sinon hasDenomination
-                uniformat_desc = row.get('uniformatDesc', '')
-                denomination = row.get('name', '')
-                description = uniformat_desc if uniformat_desc else denomination
-                
-                # Logique pour le matériau : utiliser hasDenomination si matériau est vide ou <unnamed>
-                material = row.get('material', '')
-                if not material or material.strip() == '' or material.strip().lower() == '<unnamed>':
-                    material = denomination
-                
-                items[guid] = {
-                    'GlobalId': guid,
-                    'Classe IFC': row.get('ifcClass', ''),
-                    'Uniformat': row.get('uniformat', ''),
-                    'Description': description,
-                    'Matériau': material,
-                    'Construction ($)': '',
-                    'Opération ($)': '',
-                    'Maintenance ($)': '',
-                    'Fin de vie ($)': '',
-                    'Durée (années)': ''
-                }
-            
-            # Mise à jour de la durée de vie si elle existe dans cette ligne
-            if row.get('lifespan') and not items[guid]['Durée (années)']:
-                items[guid]['Durée (années)'] = row.get('lifespan', '')
-            
-            if 'cost' in row and 'costType' in row:
-                v = row['cost']
-                if 'ConstructionCosts' in row['costType']:
-                    items[guid]['Construction ($)'] = v
-                elif 'OperationCosts' in row['costType']:
-                    items[guid]['Opération ($)'] = v
-                elif 'MaintenanceCosts' in row['costType']:
-                    items[guid]['Maintenance ($)'] = v
-                elif 'EndOfLifeCosts' in row['costType']:
-                    items[guid]['Fin de vie ($)'] = v
+            items[element['GlobalId']] = {
+                'GlobalId': element['GlobalId'],
+                'Classe IFC': element['IfcClass'],
+                'Uniformat': element['Uniformat'],
+                'Description': element['UniformatDesc'],
+                'Matériau': element['Material'],
+                'Construction ($)': element['ConstructionCost'],
+                'Opération ($)': element['OperationCost'],
+                'Maintenance ($)': element['MaintenanceCost'],
+                'Fin de vie ($)': element['EndOfLifeCost'],
+                'Durée (années)': element['Lifespan']
+            }
         
         # Créer le DataFrame
         df = pd.DataFrame(list(items.values()))
@@ -927,18 +1095,24 @@ def export_elements_excel():
         print(traceback.format_exc())
         return jsonify({"error": f"Erreur lors de l'export Excel : {str(e)}"}), 500
 
-def relink_costs_to_years():
-    """Fonction pour relier les coûts aux années du projet"""
+def relink_costs_to_years(force=False, elements=None):
+    """Relie les coûts du projet aux années (voir year_links) ; une erreur n'interrompt pas l'appelant"""
     try:
-        # Cette fonction était appelée mais manquait dans le code
-        # Elle sert à recalculer les liens entre les coûts et les années
-        print("🔗 Reliaison des coûts aux années...")
-        return True
+        return year_links.relink_costs_to_years(force=force, elements=elements)
     except Exception as e:
         print(f"Erreur lors de la reliaison des coûts : {e}")
-        return False
+        return None
+
+@app.route('/relink-costs-years', methods=['POST'])
+def relink_costs_years_route():
+    """Recalcule les liaisons coûts → années (?force=1 : tous les éléments)"""
+    try:
+        return jsonify(year_links.relink_costs_to_years(force=parse_bool_arg(request.args.get('force')) or False))
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
 
 @app.route('/parse-ifc-groups', methods=['POST'])
+@run_as_job('parse-ifc-groups')
 def parse_ifc_groups():
     """
     Parse uniquement les groupes IFC spécifiés par leurs GUIDs
@@ -959,21 +1133,18 @@ def parse_ifc_groups():
         return jsonify({'error': 'Aucun fichier IFC en mémoire. Veuillez d\'abord uploader un fichier.'}), 400
     
     try:
-        # Créer un fichier temporaire avec le contenu en mémoire
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.ifc') as tmp_file:
-            tmp_file.write(ifc_storage['current_file']['content'])
-            tmp_path = tmp_file.name
-        
-        # Parser avec ifcopenshell
-        model = ifcopenshell.open(tmp_path)
+        # Modèle ifcopenshell partagé (ouvert une seule fois par contenu)
+        model = get_current_ifc_model()
         
         # Récupérer tous les groupes
         all_groups = model.by_type('IfcGroup')
         
         # Filtrer les groupes ciblés
         target_groups_found = []
+        report_progress(processed=0, total=len(target_groups), message='Extraction des groupes...')
         for group in all_groups:
             if group.GlobalId in target_groups:
+                check_cancelled()
                 # Récupérer les éléments du groupe
                 group_elements = []
                 if hasattr(group, 'IsGroupedBy'):
@@ -1038,9 +1209,8 @@ def parse_ifc_groups():
                     # Groupe personnalisé pour tout autre GUID non spécifié
                     insert_uniformat_code(group_uri, 'GRP_AUTRE')
                     insert_uniformat_description(group_uri, f'Groupe autre: {group.Name or "Sans nom"}')
-        
-        # Nettoyer le fichier temporaire
-        os.unlink(tmp_path)
+                
+                report_progress(processed=len(target_groups_found))
         
         # Vérifier si tous les groupes ont été trouvés
         found_guids = [g['GlobalId'] for g in target_groups_found]
@@ -1092,19 +1262,31 @@ def get_project_lifespan():
 
 @app.route('/get-ifc-temp-status')
 def get_ifc_temp_status():
-    """Récupérer le statut du fichier IFC temporaire"""
+    """Récupérer le statut du fichier IFC temporaire (avec le résumé rapide du modèle)"""
     global ifc_storage
     
     try:
         if ifc_storage['current_file']:
+            current = ifc_storage['current_file']
+            scan = load_scan(current['sha256'])
+            summary = scan.get('summary') or {}
             return jsonify({
                 'has_file': True,
-                'filename': ifc_storage['current_file']['filename'],
-                'size_mb': round(len(ifc_storage['current_file']['content']) / (1024 * 1024), 2),
-                'uploaded_at': ifc_storage['current_file'].get('uploaded_at', ''),
-                'parsed': ifc_storage['current_file'].get('parsed', False),
-                'enriched': ifc_storage['current_file'].get('enriched', False),
-                'elements_count': ifc_storage['metadata'].get('elements_count', 0)
+                'filename': current['filename'],
+                'size_mb': round(current['size'] / (1024 * 1024), 2),
+                'uploaded_at': current.get('uploaded_at', ''),
+                'parsed': current.get('parsed', False),
+                'enriched': current.get('enriched', False),
+                'elements_count': ifc_storage['metadata'].get('elements_count', 0),
+                'scan_status': scan.get('scan_status'),
+                'workspace_id': ifc_storage.workspace_id,
+                'project': current_project_id(),
+                'schema': summary.get('schema'),
+                'entities_count': summary.get('entities_count', 0),
+                'approx_elements_count': summary.get('approx_elements_count', 0),
+                'groups_count': summary.get('groups_count', 0),
+                'groups': summary.get('groups', []),
+                'top_entity_types': dict(list(summary.get('entity_counts', {}).items())[:15])
             })
         else:
             return jsonify({
@@ -1114,16 +1296,108 @@ def get_ifc_temp_status():
                 'uploaded_at': None,
                 'parsed': False,
                 'enriched': False,
-                'elements_count': 0
+                'elements_count': 0,
+                'scan_status': None
             })
     except Exception as e:
         return jsonify({'error': f'Erreur lors de la récupération du statut: {str(e)}'}), 500
 
-@app.route('/upload-ifc-temp', methods=['POST'])
-def upload_ifc_temp():
-    """Upload temporaire d'un fichier IFC en mémoire"""
+def start_ifc_scan(current):
+    """
+    Lance en arrière-plan l'analyse rapide du fichier (voir step_scanner) :
+    schéma, entités par type et groupes disponibles sans ifcopenshell.open.
+    Le résultat est enregistré par empreinte du fichier (réutilisé si le même contenu revient).
+    """
+    sha256 = current['sha256']
+    path = current['path']
+    if load_scan(sha256).get('scan_status') == 'done':
+        return
+    save_scan(sha256, {'scan_status': 'running'})
+    
+    def run_scan():
+        try:
+            summary = scan_ifc_file(path)
+            save_scan(sha256, {'scan_status': 'done', 'summary': summary})
+            print(f"🔍 Résumé IFC: {summary['schema']}, {summary['entities_count']} entités, "
+                  f"~{summary['approx_elements_count']} éléments ({summary['scan_seconds']} s)")
+        except Exception as e:
+            save_scan(sha256, {'scan_status': 'error', 'scan_error': str(e)})
+            print(f"⚠️ Erreur lors de l'analyse rapide IFC: {e}")
+    
+    threading.Thread(target=run_scan, daemon=True).start()
+
+def set_current_ifc_file(filename, path, sha256, size):
+    """
+    Remplace le fichier IFC courant de l'espace de travail de la requête.
+    Libère les modèles ouverts et supprime les fichiers du précédent upload.
+    """
     global ifc_storage
     
+    # Nouveau fichier : les modèles et fichiers précédents de cet espace de travail ne servent plus
+    previous = ifc_storage['current_file']
+    if previous:
+        ifc_model_cache.invalidate(previous.get('sha256'))
+        ifc_model_cache.invalidate(previous.get('source_sha256'))
+        # Les fichiers enrichis restent dans leur cache (réutilisables si le même modèle revient)
+        remove_file(previous.get('source_path'))
+        if not enriched_cache.is_cached_file(previous.get('path')):
+            remove_file(previous.get('path'))
+    
+    # Référencer le fichier de l'espace de travail
+    ifc_storage['current_file'] = {
+        'filename': filename,
+        'path': path,
+        'source_path': path,
+        'source_sha256': sha256,
+        'size': size,
+        'sha256': sha256,
+        'uploaded_at': datetime.now().isoformat(),
+        'parsed': False,
+        'enriched': False
+    }
+    start_ifc_scan(ifc_storage['current_file'])
+    
+    # Mettre à jour les métadonnées
+    ifc_storage['metadata'] = {
+        'elements_count': 0,
+        'parsing_status': 'uploaded',
+        'last_action': 'uploaded'
+    }
+    
+    return {
+        'success': True,
+        'message': f'Fichier "{filename}" uploadé avec succès',
+        'filename': filename,
+        'size_mb': round(size / (1024 * 1024), 2),
+        'sha256': sha256,
+        'workspace_id': ifc_storage.workspace_id
+    }
+
+@app.route('/clear-ifc-temp', methods=['POST'])
+def clear_ifc_temp():
+    """Vide l'espace de travail de la requête (fichier courant et métadonnées)"""
+    global ifc_storage
+    
+    previous = ifc_storage['current_file']
+    if previous:
+        ifc_model_cache.invalidate(previous.get('sha256'))
+        ifc_model_cache.invalidate(previous.get('source_sha256'))
+        remove_file(previous.get('source_path'))
+        if not enriched_cache.is_cached_file(previous.get('path')):
+            remove_file(previous.get('path'))
+    
+    ifc_storage['current_file'] = None
+    ifc_storage['metadata'] = {}
+    return jsonify({'success': True, 'message': 'Espace de travail IFC vidé'})
+
+@app.route('/workspaces')
+def list_workspaces():
+    """Espaces de travail IFC enregistrés (un fichier courant chacun)"""
+    return jsonify({'workspaces': workspace_store.list(), 'current': request_workspace_id()})
+
+@app.route('/upload-ifc-temp', methods=['POST'])
+def upload_ifc_temp():
+    """Upload d'un fichier IFC dans l'espace de travail (écrit sur disque par blocs)"""
     try:
         if 'file' not in request.files:
             return jsonify({'error': 'Aucun fichier fourni'}), 400
@@ -1135,35 +1409,17 @@ def upload_ifc_temp():
         if not file.filename.lower().endswith('.ifc'):
             return jsonify({'error': 'Le fichier doit être au format IFC'}), 400
         
-        # Lire le contenu du fichier
-        file_content = file.read()
-        
-        # Stocker en mémoire
-        ifc_storage['current_file'] = {
-            'filename': file.filename,
-            'content': file_content,
-            'uploaded_at': datetime.now().isoformat(),
-            'parsed': False,
-            'enriched': False
-        }
-        
-        # Mettre à jour les métadonnées
-        ifc_storage['metadata'] = {
-            'elements_count': 0,
-            'parsing_status': 'uploaded',
-            'last_action': 'uploaded'
-        }
+        # Écrire le flux sur disque sans le charger en mémoire
+        path, sha256, size = save_upload_stream(file.stream, file.filename)
         
-        return jsonify({
-            'success': True,
-            'message': f'Fichier "{file.filename}" uploadé avec succès',
-            'filename': file.filename,
-            'size_mb': round(len(file_content) / (1024 * 1024), 2)
-        })
+        return jsonify(set_current_ifc_file(file.filename, path, sha256, size))
         
     except Exception as e:
         return jsonify({'error': f'Erreur lors de l\'upload: {str(e)}'}), 500
 
+# Upload par morceaux, reprenable (voir upload_routes)
+register_upload_routes(app, set_current_ifc_file)
+
 @app.route('/api/stakeholders', methods=['GET'])
 def get_stakeholders():
     """Récupère la liste des parties prenantes"""
@@ -1268,7 +1524,7 @@ def create_stakeholder():
         }}
         """
         
-        response = requests.post(GRAPHDB_REPO.rstrip("/") + "/statements", data={"update": insert_query})
+        response = requests.post(GRAPHDB_REPO.rstrip("/") + "/statements", data=update_dataset({"update": insert_query}))
         
         if response.ok:
             return jsonify({
@@ -1313,7 +1569,7 @@ def delete_all_stakeholders():
         }
         """
         
-        response = requests.post(GRAPHDB_REPO.rstrip("/") + "/statements", data={"update": delete_query})
+        response = requests.post(GRAPHDB_REPO.rstrip("/") + "/statements", data=update_dataset({"update": delete_query}))
         
         if response.ok:
             return jsonify({
@@ -1348,7 +1604,7 @@ def delete_specific_stakeholder(stakeholder_uri):
         }}
         """
         
-        response = requests.post(GRAPHDB_REPO.rstrip("/") + "/statements", data={"update": delete_query})
+        response = requests.post(GRAPHDB_REPO.rstrip("/") + "/statements", data=update_dataset({"update": delete_query}))
         
         if response.ok:
             return jsonify({
@@ -1568,7 +1824,7 @@ def create_stakeholder_attribution():
                 }}
                 """
                 
-                response = requests.post(GRAPHDB_REPO.rstrip("/") + "/statements", data={"update": insert_query})
+                response = requests.post(GRAPHDB_REPO.rstrip("/") + "/statements", data=update_dataset({"update": insert_query}))
                 if response.ok:
                     attributions_created += 1
         
@@ -1600,7 +1856,7 @@ def delete_all_attributions():
         }
         """
         
-        response = requests.post(GRAPHDB_REPO.rstrip("/") + "/statements", data={"update": delete_query})
+        response = requests.post(GRAPHDB_REPO.rstrip("/") + "/statements", data=update_dataset({"update": delete_query}))
         
         if response.ok:
             return jsonify({
@@ -1632,7 +1888,7 @@ def delete_specific_attribution(attribution_id):
         }}
         """
         
-        response = requests.post(GRAPHDB_REPO.rstrip("/") + "/statements", data={"update": delete_query})
+        response = requests.post(GRAPHDB_REPO.rstrip("/") + "/statements", data=update_dataset({"update": delete_query}))
         
         if response.ok:
             return jsonify({
@@ -1728,7 +1984,7 @@ def auto_assign_costs():
                         }}
                         """
                         
-                        response = requests.post(GRAPHDB_REPO.rstrip("/") + "/statements", data={"update": insert_query})
+                        response = requests.post(GRAPHDB_REPO.rstrip("/") + "/statements", data=update_dataset({"update": insert_query}))
                         if response.ok:
                             attributions_created += 1
         
@@ -2215,7 +2471,7 @@ def calculate_wlc():
             WHERE {{ OPTIONAL {{ <{wlc_uri}> wlc:hasTotalValue ?old }} }}
             """
             
-            requests.post(GRAPHDB_REPO.rstrip("/") + "/statements", data={"update": update_query})
+            requests.post(GRAPHDB_REPO.rstrip("/") + "/statements", data=update_dataset({"update": update_query}))
         
         # Vérifier la cohérence des calculs
         verification_ok = abs(total_wlc - sum_discounted_by_year) < 0.01
@@ -3054,17 +3310,7 @@ def export_analysis_results():
 
 def set_element_duration(guid, duration):
     """Mettre à jour la durée de vie d'un élément dans GraphDB"""
-    import requests
-    
-    uri = create_element_uri(guid)
-    update = f"""
-        PREFIX wlc: <http://www.semanticweb.org/adamy/ontologies/2025/WLCONTO#>
-    PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
-    DELETE {{ <{uri}> wlc:hasDuration ?old . }}
-    INSERT {{ <{uri}> wlc:hasDuration "{duration}"^^xsd:integer . }}
-    WHERE  {{ OPTIONAL {{ <{uri}> wlc:hasDuration ?old }} }}
-    """
-    requests.post(GRAPHDB_REPO.rstrip("/") + "/statements", data={"update": update})
+    set_element_durations([(create_element_uri(guid), duration)])
 
 @app.route('/costs-by-year')
 def costs_by_year():
@@ -3408,6 +3654,7 @@ def create_element():
         return jsonify({'success': False, 'error': f'Erreur lors de la création: {str(e)}'}), 500
 
 @app.route('/enrich-ifc', methods=['POST'])
+@run_as_job('enrich-ifc')
 def enrich_ifc():
     """Enrichit le fichier IFC en mémoire avec les données WLC de l'ontologie"""
     global ifc_storage
@@ -3474,600 +3721,52 @@ def enrich_ifc():
                 'error': 'Aucune donnée WLC trouvée dans l\'ontologie'
             }), 400
         
-        # Charger le fichier IFC depuis la mémoire
-        print("📂 Chargement du fichier IFC...")
-        ifc_content = ifc_storage['current_file']['content']
-        
-        # Créer un fichier temporaire pour ifcopenshell
-        import tempfile
-        import os
-        
-        with tempfile.NamedTemporaryFile(suffix='.ifc', delete=False) as temp_file:
-            temp_file.write(ifc_content)
-            temp_file_path = temp_file.name
+        current = ifc_storage['current_file']
+        data_version = enriched_cache.wlc_data_version(wlc_elements)
         
-        try:
-            # Ouvrir le fichier IFC avec ifcopenshell
-            ifc_file = ifcopenshell.open(temp_file_path)
-            print(f"📂 Fichier IFC ouvert: {len(ifc_file.by_type('IfcElement'))} éléments")
-            
-            # Créer un dictionnaire des données WLC par GUID
-            wlc_data_by_guid = {}
-            # Créer un dictionnaire des données WLC par groupe Uniformat
-            wlc_data_by_uniformat = {}
-            
-            for elem_data in wlc_elements:
-                guid = elem_data.get('guid', '')
-                uniformat_code = elem_data.get('uniformatCode', '')
-                
-                wlc_data = {
-                    'construction_cost': float(elem_data.get('constructionCost', 0)) if elem_data.get('constructionCost') else 0,
-                    'operation_cost': float(elem_data.get('operationCost', 0)) if elem_data.get('operationCost') else 0,
-                    'maintenance_cost': float(elem_data.get('maintenanceCost', 0)) if elem_data.get('maintenanceCost') else 0,
-                    'end_of_life_cost': float(elem_data.get('endOfLifeCost', 0)) if elem_data.get('endOfLifeCost') else 0,
-                    'lifespan': int(float(elem_data.get('lifespan', 0))) if elem_data.get('lifespan') else 0,
-                    'uniformat_code': uniformat_code,
-                    'uniformat_desc': elem_data.get('uniformatDesc', '')
-                }
-                
-                # Indexer par GUID si disponible
-                if guid:
-                    wlc_data_by_guid[guid] = wlc_data
-                
-                # Indexer par code Uniformat si disponible
-                if uniformat_code:
-                    if uniformat_code not in wlc_data_by_uniformat:
-                        wlc_data_by_uniformat[uniformat_code] = []
-                    wlc_data_by_uniformat[uniformat_code].append(wlc_data)
-            
-            print(f"📊 Données WLC organisées:")
-            print(f"   • Par GUID: {len(wlc_data_by_guid)} éléments")
-            print(f"   • Par groupe Uniformat: {len(wlc_data_by_uniformat)} groupes")
-            
-            # Initialiser les compteurs d'enrichissement pour l'ensemble de la fonction
-            enriched_count = 0
-            enriched_by_guid = 0
-            enriched_by_uniformat = 0
-            
-            # Fonction pour extraire le code Uniformat d'un élément IFC
-            def extract_ifc_uniformat_code(ifc_element):
-                """Extrait le code Uniformat d'un élément IFC"""
-                if hasattr(ifc_element, 'IsDefinedBy'):
-                    for rel in ifc_element.IsDefinedBy:
-                        if hasattr(rel, 'RelatingPropertyDefinition'):
-                            pset = rel.RelatingPropertyDefinition
-                            if hasattr(pset, 'HasProperties'):
-                                for prop in pset.HasProperties:
-                                    if hasattr(prop, 'Name') and prop.Name and 'uniformat' in prop.Name.lower():
-                                        if hasattr(prop, 'NominalValue') and hasattr(prop.NominalValue, 'wrappedValue'):
-                                            return prop.NominalValue.wrappedValue
-                return None
-            
-            # Fonction pour déterminer le groupe Uniformat basé sur le type d'élément
-            def determine_uniformat_group(ifc_element):
-                """Détermine le groupe Uniformat basé sur le type d'élément IFC"""
-                element_type = ifc_element.is_a().lower()
-                element_name = (ifc_element.Name or '').lower()
-                
-                # Mapping des types IFC vers les groupes Uniformat
-                uniformat_mapping = {
-                    'ifcwall': 'B2010',
-                    'ifcwallstandardcase': 'B2010', 
-                    'ifcwindow': 'B2020',
-                    'ifcdoor': 'B2020',
-                    'ifcslab': 'B1010',
-                    'ifcroof': 'B3010',
-                    'ifcbeam': 'B1020',
-                    'ifccolumn': 'B1020',
-                    'ifcstair': 'B2030',
-                    'ifcrailing': 'B2030',
-                    'ifcflowsegment': 'D3040',
-                    'ifcflowfitting': 'D3040',
-                    'ifcflowterminal': 'D3040',
-                    'ifcairtoairheatrecovery': 'D3030',
-                    'ifcchiller': 'D3030',
-                    'ifcboiler': 'D3020',
-                    'ifcunitaryequipment': 'D3050',
-                    'ifcfan': 'D3040',
-                    'ifcpump': 'D3040',
-                    'ifcelectricmotor': 'D5020',
-                    'ifclightfixture': 'D5010',
-                    'ifcelectricappliance': 'D5020'
-                }
-                
-                # Vérifier d'abord dans le mapping direct
-                if element_type in uniformat_mapping:
-                    return uniformat_mapping[element_type]
-                
-                # Vérifier par mots-clés dans le nom
-                if any(keyword in element_name for keyword in ['chauffage', 'heating', 'radiator', 'radiateur']):
-                    return 'D3020'
-                elif any(keyword in element_name for keyword in ['climatisation', 'cooling', 'air conditioner']):
-                    return 'D3030'
-                elif any(keyword in element_name for keyword in ['ventilation', 'fan', 'air handling']):
-                    return 'D3040'
-                elif any(keyword in element_name for keyword in ['mur', 'wall', 'rideau']):
-                    return 'B2010'
-                elif any(keyword in element_name for keyword in ['window', 'fenêtre']):
-                    return 'B2020'
-                elif any(keyword in element_name for keyword in ['door', 'porte']):
-                    return 'B2020'
-                
-                return None
-            
-            # Fonction pour obtenir les données WLC moyennes d'un groupe Uniformat
-            def get_uniformat_group_data(uniformat_code):
-                """Obtient les données WLC moyennes d'un groupe Uniformat"""
-                if uniformat_code not in wlc_data_by_uniformat:
-                    return None
-                
-                group_data = wlc_data_by_uniformat[uniformat_code]
-                if not group_data:
-                    return None
-                
-                # Calculer les moyennes
-                avg_data = {
-                    'construction_cost': sum(d['construction_cost'] for d in group_data) / len(group_data),
-                    'operation_cost': sum(d['operation_cost'] for d in group_data) / len(group_data),
-                    'maintenance_cost': sum(d['maintenance_cost'] for d in group_data) / len(group_data),
-                    'end_of_life_cost': sum(d['end_of_life_cost'] for d in group_data) / len(group_data),
-                    'lifespan': int(sum(d['lifespan'] for d in group_data if d['lifespan'] > 0) / len([d for d in group_data if d['lifespan'] > 0])) if any(d['lifespan'] > 0 for d in group_data) else 0,
-                    'uniformat_code': uniformat_code,
-                    'uniformat_desc': group_data[0]['uniformat_desc']
-                }
-                
-                return avg_data
-            
-            # ENRICHISSEMENT SPÉCIAL POUR LES IfcGroup CIBLES
-            # Groupes cibles recherchés par nom (plus robuste que par GUID)
-            target_groups_by_name = {
-                'Murs-rideaux MR_V3_ENV': '3ffPwhTTv76OU5CdZc3Mgo',  # Nom -> GUID ontologie
-                'Murs de base R02.1': 'c6175a257c2049a88f8c16'      # Nom -> GUID ontologie
-            }
-            
-            groups_enriched = 0
-            elements_enriched_from_groups = 0
-            
-            print("🎯 Enrichissement spécial des IfcGroup cibles (recherche par nom)...")
-            
-            # Récupérer tous les IfcGroup du fichier
-            all_ifc_groups = ifc_file.by_type('IfcGroup')
-            print(f"📦 {len(all_ifc_groups)} IfcGroup trouvés dans le fichier")
-            
-            # Lister tous les noms de groupes trouvés pour debug
-            found_group_names = []
-            for debug_group in all_ifc_groups:
-                if hasattr(debug_group, 'Name') and debug_group.Name:
-                    found_group_names.append(debug_group.Name.strip())
-            print(f"📋 Noms de groupes trouvés dans le fichier: {found_group_names}")
-            
-            for ifc_group in all_ifc_groups:
-                if hasattr(ifc_group, 'Name') and ifc_group.Name:
-                    group_name = ifc_group.Name.strip()
-                    
-                    # Chercher si ce nom correspond à un de nos groupes cibles
-                    if group_name in target_groups_by_name:
-                        group_guid = ifc_group.GlobalId if hasattr(ifc_group, 'GlobalId') else 'N/A'
-                        ontology_guid = target_groups_by_name[group_name]
-                        
-                        print(f"🎯 Groupe cible trouvé par nom: '{group_name}'")
-                        print(f"   📋 GUID IFC: {group_guid}")
-                        print(f"   🔍 GUID ontologie: {ontology_guid}")
-                        
-                        # Récupérer les données WLC depuis l'ontologie
-                        group_wlc_data = wlc_data_by_guid.get(ontology_guid)
-                        
-                        print(f"   🔍 Recherche données WLC dans l'ontologie...")
-                        
-                        if group_wlc_data:
-                            print(f"   📊 Données WLC trouvées pour le groupe!")
-                            print(f"      - Construction: {group_wlc_data['construction_cost']}")
-                            print(f"      - Opération: {group_wlc_data['operation_cost']}")
-                            print(f"      - Maintenance: {group_wlc_data['maintenance_cost']}")
-                            print(f"      - Fin de vie: {group_wlc_data['end_of_life_cost']}")
-                            
-                            # 1. Enrichir l'IfcGroup lui-même
-                            group_properties = []
-                            
-                            if group_wlc_data['construction_cost'] > 0:
-                                group_properties.append(
-                                    ifc_file.createIfcPropertySingleValue(
-                                        "GroupConstructionCost", None,
-                                        ifc_file.createIfcReal(group_wlc_data['construction_cost']), None
-                                    )
-                                )
-                            
-                            if group_wlc_data['operation_cost'] > 0:
-                                group_properties.append(
-                                    ifc_file.createIfcPropertySingleValue(
-                                        "GroupOperationCost", None,
-                                        ifc_file.createIfcReal(group_wlc_data['operation_cost']), None
-                                    )
-                                )
-                            
-                            if group_wlc_data['maintenance_cost'] > 0:
-                                group_properties.append(
-                                    ifc_file.createIfcPropertySingleValue(
-                                        "GroupMaintenanceCost", None,
-                                        ifc_file.createIfcReal(group_wlc_data['maintenance_cost']), None
-                                    )
-                                )
-                            
-                            if group_wlc_data['end_of_life_cost'] > 0:
-                                group_properties.append(
-                                    ifc_file.createIfcPropertySingleValue(
-                                        "GroupEndOfLifeCost", None,
-                                        ifc_file.createIfcReal(group_wlc_data['end_of_life_cost']), None
-                                    )
-                                )
-                            
-                            if group_wlc_data['lifespan'] > 0:
-                                group_properties.append(
-                                    ifc_file.createIfcPropertySingleValue(
-                                        "GroupLifespan", None,
-                                        ifc_file.createIfcInteger(group_wlc_data['lifespan']), None
-                                    )
-                                )
-                            
-                            if group_wlc_data['uniformat_code']:
-                                group_properties.append(
-                                    ifc_file.createIfcPropertySingleValue(
-                                        "GroupUniformatCode", None,
-                                        ifc_file.createIfcText(group_wlc_data['uniformat_code']), None
-                                    )
-                                )
-                            
-                            if group_wlc_data['uniformat_desc']:
-                                group_properties.append(
-                                    ifc_file.createIfcPropertySingleValue(
-                                        "GroupUniformatDescription", None,
-                                        ifc_file.createIfcText(group_wlc_data['uniformat_desc']), None
-                                    )
-                                )
-                            
-                            # Ajouter une propriété pour indiquer l'enrichissement spécial par nom
-                            group_properties.append(
-                                ifc_file.createIfcPropertySingleValue(
-                                    "EnrichmentMethod", None,
-                                    ifc_file.createIfcText(f"SpecialGroupMappingByName_{group_name}"), None
-                                )
-                            )
-                            
-                            # Créer le PropertySet pour le groupe
-                            if group_properties:
-                                group_property_set = ifc_file.createIfcPropertySet(
-                                    ifcopenshell.guid.new(),
-                                    ifc_file.by_type('IfcOwnerHistory')[0] if ifc_file.by_type('IfcOwnerHistory') else None,
-                                    "WLC_Group_Data",
-                                    "Données WLC du groupe et propagation aux éléments",
-                                    group_properties
-                                )
-                                
-                                # Lier le PropertySet au groupe
-                                ifc_file.createIfcRelDefinesByProperties(
-                                    ifcopenshell.guid.new(),
-                                    ifc_file.by_type('IfcOwnerHistory')[0] if ifc_file.by_type('IfcOwnerHistory') else None,
-                                    None, None,
-                                    [ifc_group],
-                                    group_property_set
-                                )
-                                
-                                groups_enriched += 1
-                                print(f"   ✅ Groupe enrichi avec {len(group_properties)} propriétés")
-                            
-                            # 2. Propager les données WLC à tous les éléments du groupe
-                            group_elements = []
-                            if hasattr(ifc_group, 'IsGroupedBy'):
-                                for rel in ifc_group.IsGroupedBy:
-                                    if hasattr(rel, 'RelatedObjects'):
-                                        for obj in rel.RelatedObjects:
-                                            if hasattr(obj, 'GlobalId'):
-                                                group_elements.append(obj)
-                            
-                            print(f"   📦 Propagation des données à {len(group_elements)} éléments du groupe")
-                            
-                            for element in group_elements:
-                                try:
-                                    # Créer les propriétés WLC pour l'élément
-                                    element_properties = []
-                                    
-                                    if group_wlc_data['construction_cost'] > 0:
-                                        element_properties.append(
-                                            ifc_file.createIfcPropertySingleValue(
-                                                "ConstructionCost", None,
-                                                ifc_file.createIfcReal(group_wlc_data['construction_cost']), None
-                                            )
-                                        )
-                                    
-                                    if group_wlc_data['operation_cost'] > 0:
-                                        element_properties.append(
-                                            ifc_file.createIfcPropertySingleValue(
-                                                "OperationCost", None,
-                                                ifc_file.createIfcReal(group_wlc_data['operation_cost']), None
-                                            )
-                                        )
-                                    
-                                    if group_wlc_data['maintenance_cost'] > 0:
-                                        element_properties.append(
-                                            ifc_file.createIfcPropertySingleValue(
-                                                "MaintenanceCost", None,
-                                                ifc_file.createIfcReal(group_wlc_data['maintenance_cost']), None
-                                            )
-                                        )
-                                    
-                                    if group_wlc_data['end_of_life_cost'] > 0:
-                                        element_properties.append(
-                                            ifc_file.createIfcPropertySingleValue(
-                                                "EndOfLifeCost", None,
-                                                ifc_file.createIfcReal(group_wlc_data['end_of_life_cost']), None
-                                            )
-                                        )
-                                    
-                                    if group_wlc_data['lifespan'] > 0:
-                                        element_properties.append(
-                                            ifc_file.createIfcPropertySingleValue(
-                                                "Lifespan", None,
-                                                ifc_file.createIfcInteger(group_wlc_data['lifespan']), None
-                                            )
-                                        )
-                                    
-                                    if group_wlc_data['uniformat_code']:
-                                        element_properties.append(
-                                            ifc_file.createIfcPropertySingleValue(
-                                                "UniformatCode", None,
-                                                ifc_file.createIfcText(group_wlc_data['uniformat_code']), None
-                                            )
-                                        )
-                                    
-                                    if group_wlc_data['uniformat_desc']:
-                                        element_properties.append(
-                                            ifc_file.createIfcPropertySingleValue(
-                                                "UniformatDescription", None,
-                                                ifc_file.createIfcText(group_wlc_data['uniformat_desc']), None
-                                            )
-                                        )
-                                    
-                                    # Ajouter la source de l'enrichissement
-                                    element_properties.append(
-                                        ifc_file.createIfcPropertySingleValue(
-                                            "EnrichmentMethod", None,
-                                            ifc_file.createIfcText(f"PropagatedFromGroupByName_{group_name}"), None
-                                        )
-                                    )
-                                    
-                                    element_properties.append(
-                                        ifc_file.createIfcPropertySingleValue(
-                                            "SourceGroupName", None,
-                                            ifc_file.createIfcText(group_name), None
-                                        )
-                                    )
-                                    
-                                    # Créer le PropertySet pour l'élément
-                                    if element_properties:
-                                        element_property_set = ifc_file.createIfcPropertySet(
-                                            ifcopenshell.guid.new(),
-                                            ifc_file.by_type('IfcOwnerHistory')[0] if ifc_file.by_type('IfcOwnerHistory') else None,
-                                            "WLC_Data",
-                                            "Données WLC propagées depuis le groupe parent",
-                                            element_properties
-                                        )
-                                        
-                                        # Lier le PropertySet à l'élément
-                                        ifc_file.createIfcRelDefinesByProperties(
-                                            ifcopenshell.guid.new(),
-                                            ifc_file.by_type('IfcOwnerHistory')[0] if ifc_file.by_type('IfcOwnerHistory') else None,
-                                            None, None,
-                                            [element],
-                                            element_property_set
-                                        )
-                                        
-                                        elements_enriched_from_groups += 1
-                                        
-                                except Exception as e:
-                                    print(f"     ⚠️  Erreur lors de l'enrichissement de l'élément {element.GlobalId}: {e}")
-                                    continue
-                            
-                            print(f"   ✅ {len(group_elements)} éléments enrichis depuis le groupe")
-                        
-                        else:
-                            print(f"   ⚠️  Aucune donnée WLC trouvée pour le groupe '{group_name}' (GUID ontologie: {ontology_guid})")
-                            print(f"       Vérifiez que les données WLC existent dans l'ontologie pour ce GUID")
-                    
-                    else:
-                        print(f"   ℹ️  Groupe ignoré: '{group_name}' (ne fait pas partie des groupes cibles)")
-            
-            print(f"🎯 Enrichissement spécial terminé:")
-            print(f"   • Groupes IfcGroup cibles enrichis: {groups_enriched}")
-            print(f"   • Éléments enrichis depuis les groupes: {elements_enriched_from_groups}")
-            print(f"   • Autres éléments enrichis: {enriched_count}")
-            print(f"     - Par GUID exact: {enriched_by_guid}")
-            print(f"     - Par groupe Uniformat: {enriched_by_uniformat}")
-            
-            total_enriched = enriched_count + elements_enriched_from_groups
-            
-            # ENRICHISSEMENT NORMAL (logique existante) - peut être désactivé si nécessaire
-            print("\n🔧 Enrichissement normal des autres éléments...")
-            
-            # Enrichir les éléments IFC (variables déjà déclarées plus haut)
-            for ifc_element in ifc_file.by_type('IfcElement'):
-                if not hasattr(ifc_element, 'GlobalId'):
-                    continue
-                    
-                wlc_data = None
-                enrichment_method = None
-                
-                # Méthode 1: Enrichissement par GUID exact
-                if ifc_element.GlobalId in wlc_data_by_guid:
-                    wlc_data = wlc_data_by_guid[ifc_element.GlobalId]
-                    enrichment_method = "GUID"
-                    enriched_by_guid += 1
-                
-                # Méthode 2: Enrichissement par groupe Uniformat si pas de GUID correspondant
-                elif not wlc_data:
-                    # Essayer d'extraire le code Uniformat de l'élément IFC
-                    ifc_uniformat_code = extract_ifc_uniformat_code(ifc_element)
-                    
-                    # Si pas trouvé, déterminer basé sur le type d'élément
-                    if not ifc_uniformat_code:
-                        ifc_uniformat_code = determine_uniformat_group(ifc_element)
-                    
-                    if ifc_uniformat_code:
-                        wlc_data = get_uniformat_group_data(ifc_uniformat_code)
-                        if wlc_data:
-                            enrichment_method = f"Uniformat_{ifc_uniformat_code}"
-                            enriched_by_uniformat += 1
-                
-                # Appliquer l'enrichissement si des données ont été trouvées
-                if wlc_data:
-                    # Créer des propriétés personnalisées pour les données WLC
-                    property_set_name = "WLC_Data"
-                    
-                    # Vérifier si le PropertySet existe déjà
-                    existing_pset = None
-                    if hasattr(ifc_element, 'IsDefinedBy'):
-                        for rel in ifc_element.IsDefinedBy:
-                            if hasattr(rel, 'RelatingPropertyDefinition'):
-                                pset = rel.RelatingPropertyDefinition
-                                if hasattr(pset, 'Name') and pset.Name == property_set_name:
-                                    existing_pset = pset
-                                    break
-                    
-                    # Si le PropertySet n'existe pas, le créer
-                    if not existing_pset:
-                        # Créer les propriétés WLC
-                        wlc_properties = []
-                        
-                        if wlc_data['construction_cost'] > 0:
-                            wlc_properties.append(
-                                ifc_file.createIfcPropertySingleValue(
-                                    "ConstructionCost", None,
-                                    ifc_file.createIfcReal(wlc_data['construction_cost']), None
-                                )
-                            )
-                        
-                        if wlc_data['operation_cost'] > 0:
-                            wlc_properties.append(
-                                ifc_file.createIfcPropertySingleValue(
-                                    "OperationCost", None,
-                                    ifc_file.createIfcReal(wlc_data['operation_cost']), None
-                                )
-                            )
-                        
-                        if wlc_data['maintenance_cost'] > 0:
-                            wlc_properties.append(
-                                ifc_file.createIfcPropertySingleValue(
-                                    "MaintenanceCost", None,
-                                    ifc_file.createIfcReal(wlc_data['maintenance_cost']), None
-                                )
-                            )
-                        
-                        if wlc_data['end_of_life_cost'] > 0:
-                            wlc_properties.append(
-                                ifc_file.createIfcPropertySingleValue(
-                                    "EndOfLifeCost", None,
-                                    ifc_file.createIfcReal(wlc_data['end_of_life_cost']), None
-                                )
-                            )
-                        
-                        if wlc_data['lifespan'] > 0:
-                            wlc_properties.append(
-                                ifc_file.createIfcPropertySingleValue(
-                                    "Lifespan", None,
-                                    ifc_file.createIfcInteger(wlc_data['lifespan']), None
-                                )
-                            )
-                        
-                        if wlc_data['uniformat_code']:
-                            wlc_properties.append(
-                                ifc_file.createIfcPropertySingleValue(
-                                    "UniformatCode", None,
-                                    ifc_file.createIfcText(wlc_data['uniformat_code']), None
-                                )
-                            )
-                        
-                        if wlc_data['uniformat_desc']:
-                            wlc_properties.append(
-                                ifc_file.createIfcPropertySingleValue(
-                                    "UniformatDescription", None,
-                                    ifc_file.createIfcText(wlc_data['uniformat_desc']), None
-                                )
-                            )
-                        
-                        # Ajouter la méthode d'enrichissement
-                        if enrichment_method:
-                            wlc_properties.append(
-                                ifc_file.createIfcPropertySingleValue(
-                                    "EnrichmentMethod", None,
-                                    ifc_file.createIfcText(enrichment_method), None
-                                )
-                            )
-                        
-                        # Créer le PropertySet si on a des propriétés
-                        if wlc_properties:
-                            property_set = ifc_file.createIfcPropertySet(
-                                ifcopenshell.guid.new(),
-                                ifc_file.by_type('IfcOwnerHistory')[0],
-                                property_set_name,
-                                "Données de coût du cycle de vie",
-                                wlc_properties
-                            )
-                            
-                            # Lier le PropertySet à l'élément
-                            ifc_file.createIfcRelDefinesByProperties(
-                                ifcopenshell.guid.new(),
-                                ifc_file.by_type('IfcOwnerHistory')[0],
-                                None, None,
-                                [ifc_element],
-                                property_set
-                            )
-                            
-                            enriched_count += 1
-            
-            print(f"✅ Enrichissement terminé:")
-            print(f"   • Total enrichis: {enriched_count} éléments")
-            print(f"   • Par GUID exact: {enriched_by_guid} éléments")
-            print(f"   • Par groupe Uniformat: {enriched_by_uniformat} éléments")
-            
-            # Sauvegarder le fichier enrichi
-            enriched_temp_path = temp_file_path.replace('.ifc', '_enriched.ifc')
-            ifc_file.write(enriched_temp_path)
-            
-            # Lire le fichier enrichi
-            with open(enriched_temp_path, 'rb') as f:
-                enriched_content = f.read()
-            
-            # Mettre à jour le stockage en mémoire
-            ifc_storage['current_file']['content'] = enriched_content
-            ifc_storage['current_file']['enriched'] = True
-            
-            print("✅ Enrichissement terminé avec succès")
+        # Même modèle d'origine et mêmes données WLC : le fichier enrichi est déjà en cache
+        artefact = enriched_cache.lookup(current['source_sha256'], data_version)
+        from_cache = artefact is not None
+        if from_cache:
+            print(f"♻️ Fichier enrichi réutilisé depuis le cache ({data_version[:12]})")
+        else:
+            # Toujours repartir du fichier d'origine : pas de jeux WLC dupliqués
+            print("📂 Chargement du fichier IFC d'origine...")
+            ifc_file = take_source_ifc_model()
             
-            # Message personnalisé selon le type d'enrichissement
-            if groups_enriched > 0:
-                message = f"Fichier IFC enrichi avec enrichissement spécial des groupes! {groups_enriched} groupes IfcGroup enrichis, {elements_enriched_from_groups} éléments enrichis depuis les groupes, {enriched_count} autres éléments enrichis ({enriched_by_guid} par GUID, {enriched_by_uniformat} par groupe Uniformat)."
-            else:
-                message = f"Fichier IFC enrichi avec succès! {enriched_count} éléments enrichis ({enriched_by_guid} par GUID, {enriched_by_uniformat} par groupe Uniformat)."
+            # Index (GUID, Uniformat, jeux existants) construits une fois ; jeux de propriétés partagés par valeur
+            enricher = IfcEnricher(ifc_file)
+            print(f"📂 Fichier IFC ouvert: {len(enricher.elements)} éléments, {len(enricher.groups)} IfcGroup")
+            stats = enricher.enrich(wlc_elements)
             
-            return jsonify({
-                'success': True,
-                'message': message,
-                'total_enriched_elements': total_enriched,
-                'groups_enriched': groups_enriched,
-                'elements_enriched_from_groups': elements_enriched_from_groups,
-                'enriched_elements': enriched_count,
-                'enriched_by_guid': enriched_by_guid,
-                'enriched_by_uniformat': enriched_by_uniformat,
-                'total_wlc_elements': len(wlc_elements)
-            })
+            # Écrire le fichier enrichi dans le cache (le fichier d'origine reste intact)
+            check_cancelled()
+            report_progress(message='Écriture du fichier enrichi...')
+            artefact = enriched_cache.store(current['source_sha256'], data_version, ifc_file.write, stats, file_hash)
             
-        finally:
-            # Nettoyer les fichiers temporaires
-            try:
-                os.unlink(temp_file_path)
-                if 'enriched_temp_path' in locals():
-                    os.unlink(enriched_temp_path)
-            except:
-                pass
+            # Le modèle modifié correspond exactement au fichier enrichi : le mettre en cache
+            ifc_model_cache.put(artefact['sha256'], ifc_file, artefact['size'])
+        
+        use_enriched_file(current, artefact)
+        stats = artefact['stats']
+        
+        print("✅ Enrichissement terminé avec succès")
+        
+        # Message personnalisé selon le type d'enrichissement
+        if stats['groups_enriched'] > 0:
+            message = f"Fichier IFC enrichi avec enrichissement spécial des groupes! {stats['groups_enriched']} groupes IfcGroup enrichis, {stats['elements_enriched_from_groups']} éléments enrichis depuis les groupes, {stats['enriched_elements']} autres éléments enrichis ({stats['enriched_by_guid']} par GUID, {stats['enriched_by_uniformat']} par groupe Uniformat)."
+        else:
+            message = f"Fichier IFC enrichi avec succès! {stats['enriched_elements']} éléments enrichis ({stats['enriched_by_guid']} par GUID, {stats['enriched_by_uniformat']} par groupe Uniformat)."
+        
+        return jsonify({
+            'success': True,
+            'message': message,
+            **stats,
+            'total_wlc_elements': len(wlc_elements),
+            'from_cache': from_cache,
+            'data_version': data_version,
+            'new_size_mb': round(artefact['size'] / (1024 * 1024), 2)
+        })
                 
     except Exception as e:
         print(f"❌ Erreur lors de l'enrichissement: {str(e)}")
@@ -4080,16 +3779,15 @@ def enrich_ifc():
 
 @app.route('/download-enriched-ifc', methods=['POST'])
 def download_enriched_ifc():
-    """Télécharge le fichier IFC enrichi depuis la mémoire"""
+    """Télécharge le fichier IFC courant (enrichi ou original) depuis l'espace de travail"""
     global ifc_storage
     
     try:
-        # Vérifier qu'un fichier est en mémoire
+        # Vérifier qu'un fichier est chargé
         if not ifc_storage['current_file']:
             return jsonify({'error': 'Aucun fichier IFC en mémoire'}), 400
         
-        # Récupérer le contenu du fichier (enrichi ou original)
-        file_content = ifc_storage['current_file']['content']
+        file_path = ifc_storage['current_file']['path']
         original_filename = ifc_storage['current_file']['filename']
         
         # Nom du fichier enrichi
@@ -4098,12 +3796,9 @@ def download_enriched_ifc():
         else:
             download_filename = original_filename.replace('.ifc', '_processed.ifc')
         
-        # Créer un fichier temporaire pour le téléchargement
-        temp_file = io.BytesIO(file_content)
-        temp_file.seek(0)
-        
+        # Servir le fichier depuis le disque (pas de copie en mémoire)
         return send_file(
-            temp_file,
+            file_path,
             as_attachment=True,
             download_name=download_filename,
             mimetype='application/octet-stream'
@@ -4199,7 +3894,7 @@ def update_end_of_life_strategy():
         try:
             response = requests.post(
                 update_endpoint, 
-                data={"update": delete_old_strategy},
+                data=update_dataset({"update": delete_old_strategy}),
                 timeout=30
             )
             
@@ -4222,7 +3917,7 @@ def update_end_of_life_strategy():
         try:
             response = requests.post(
                 update_endpoint, 
-                data={"update": insert_new_strategy},
+                data=update_dataset({"update": insert_new_strategy}),
                 timeout=30
             )
             
@@ -4311,11 +4006,11 @@ def update_group_end_of_life_strategy():
         """
         
         # Exécuter les requêtes
-        response = requests.post(GRAPHDB_REPO.rstrip("/") + "/statements", data={"update": delete_query})
+        response = requests.post(GRAPHDB_REPO.rstrip("/") + "/statements", data=update_dataset({"update": delete_query}))
         if not response.ok:
             return jsonify({'error': 'Erreur lors de la suppression des anciennes stratégies'}), 500
         
-        response = requests.post(GRAPHDB_REPO.rstrip("/") + "/statements", data={"update": insert_query})
+        response = requests.post(GRAPHDB_REPO.rstrip("/") + "/statements", data=update_dataset({"update": insert_query}))
         if not response.ok:
             return jsonify({'error': 'Erreur lors de l\'ajout des nouvelles stratégies'}), 500
         
@@ -4350,7 +4045,7 @@ def get_end_of_life_statistics():
         
         response = requests.post(
             GRAPHDB_REPO,
-            data={"query": stats_query},
+            data=query_dataset({"query": stats_query}),
             headers={"Content-Type": "application/x-www-form-urlencoded", "Accept": "application/json"},
             timeout=30
         )
@@ -4422,7 +4117,7 @@ def get_end_of_life_statistics():
         
         response = requests.post(
             GRAPHDB_REPO,
-            data={"query": total_elements_query},
+            data=query_dataset({"query": total_elements_query}),
             headers={"Content-Type": "application/x-www-form-urlencoded", "Accept": "application/json"},
             timeout=30
         )
@@ -4484,7 +4179,7 @@ def get_eol_management_data():
         
         response = requests.post(
             GRAPHDB_REPO,
-            data={"query": eol_query},
+            data=query_dataset({"query": eol_query}),
             headers={"Content-Type": "application/x-www-form-urlencoded", "Accept": "application/json"},
             timeout=30
         )
@@ -4552,12 +4247,12 @@ def update_eol_destination():
         # Exécuter les requêtes
         import requests
         
-        response = requests.post(GRAPHDB_REPO.rstrip("/") + "/statements", data={"update": delete_old})
+        response = requests.post(GRAPHDB_REPO.rstrip("/") + "/statements", data=update_dataset({"update": delete_old}))
         if not response.ok:
             return jsonify({'error': 'Erreur lors de la suppression'}), 500
         
         if insert_new:
-            response = requests.post(GRAPHDB_REPO.rstrip("/") + "/statements", data={"update": insert_new})
+            response = requests.post(GRAPHDB_REPO.rstrip("/") + "/statements", data=update_dataset({"update": insert_new}))
             if not response.ok:
                 return jsonify({'error': 'Erreur lors de l\'ajout'}), 500
         
@@ -4607,12 +4302,12 @@ def update_eol_responsible():
         # Exécuter les requêtes
         import requests
         
-        response = requests.post(GRAPHDB_REPO.rstrip("/") + "/statements", data={"update": delete_old})
+        response = requests.post(GRAPHDB_REPO.rstrip("/") + "/statements", data=update_dataset({"update": delete_old}))
         if not response.ok:
             return jsonify({'error': 'Erreur lors de la suppression'}), 500
         
         if insert_new:
-            response = requests.post(GRAPHDB_REPO.rstrip("/") + "/statements", data={"update": insert_new})
+            response = requests.post(GRAPHDB_REPO.rstrip("/") + "/statements", data=update_dataset({"update": insert_new}))
             if not response.ok:
                 return jsonify({'error': 'Erreur lors de l\'ajout'}), 500
         
@@ -4638,7 +4333,7 @@ def get_eol_responsibles():
         
         response = requests.post(
             GRAPHDB_REPO,
-            data={"query": stakeholders_query},
+            data=query_dataset({"query": stakeholders_query}),
             headers={"Content-Type": "application/x-www-form-urlencoded", "Accept": "application/json"},
             timeout=30
         )
@@ -4734,7 +4429,7 @@ def update_bulk_eol_data():
         import requests
         
         for update_query in updates:
-            response = requests.post(GRAPHDB_REPO.rstrip("/") + "/statements", data={"update": update_query})
+            response = requests.post(GRAPHDB_REPO.rstrip("/") + "/statements", data=update_dataset({"update": update_query}))
             if not response.ok:
                 return jsonify({'error': f'Erreur lors de la mise à jour en lot'}), 500
         
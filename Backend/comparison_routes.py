@@ -7,14 +7,66 @@ from flask import jsonify, request, make_response
 from datetime import datetime
 import traceback
 import json
+import math
 import requests
-from config import GRAPHDB_REPO
+from config import GRAPHDB_REPO, COMPARISON_TOP_N
 from sparql_client import query_graphdb
+from project_graphs import query_dataset
+from element_diff import compare_element_frames, empty_elements_frame, elements_to_frame
+from analysis_store import create_analysis_store
 
 # Variable globale pour stocker l'analyse précédente temporairement
 previous_analysis_graph = None
 previous_analysis_info = None
 
+def _parse_threshold(value, name):
+    if isinstance(value, bool):
+        raise ValueError(f"{name} invalide: {value}")
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} invalide: {value}")
+    if not math.isfinite(value) or value < 0:
+        raise ValueError(f"{name} invalide: {value}")
+    return value
+
+def parse_comparison_options(options):
+    """
+    Valide les options de /compare-analyses.
+    
+    Returns:
+        tuple: (tolérance, top_n borné, tolérances par champ ou None)
+    
+    Raises:
+        ValueError: option non numérique ou négative
+    """
+    if not isinstance(options, dict):
+        raise ValueError("Options de comparaison invalides (objet JSON attendu)")
+    tolerance = _parse_threshold(options.get('tolerance', 0.01), 'Tolérance')
+    
+    top_n = options.get('top_n')
+    if top_n is None:
+        top_n = COMPARISON_TOP_N
+    elif isinstance(top_n, bool) or not isinstance(top_n, (int, float, str)):
+        raise ValueError(f"top_n invalide: {top_n}")
+    else:
+        try:
+            top_n = int(top_n)
+        except ValueError:
+            raise ValueError(f"top_n invalide: {top_n}")
+        if top_n < 0:
+            raise ValueError(f"top_n invalide: {top_n}")
+    
+    field_tolerances = options.get('field_tolerances')
+    if field_tolerances is not None:
+        if not isinstance(field_tolerances, dict):
+            raise ValueError("field_tolerances doit être un dictionnaire {champ: seuil}")
+        field_tolerances = {
+            field: _parse_threshold(value, f"Tolérance de {field}")
+            for field, value in field_tolerances.items()
+        }
+    return tolerance, top_n, field_tolerances
+
 def register_comparison_routes(app, g, calculate_wlc_dynamically, get_multi_stakeholder_view):
     """
     Enregistre les routes de comparaison d'analyses
@@ -61,7 +113,7 @@ def register_comparison_routes(app, g, calculate_wlc_dynamically, get_multi_stak
             # 3. RÉCUPÉRER TOUTES LES DONNÉES DE GRAPHDB (contenu original)
             print("📊 Récupération des données de GraphDB...")
             
-            # Requête pour récupérer TOUT le contenu du repository
+            # Requête pour récupérer TOUT le contenu du projet (graphe du projet + ontologie)
             sparql_query = """
             CONSTRUCT { ?s ?p ?o }
             WHERE { ?s ?p ?o }
@@ -70,9 +122,9 @@ def register_comparison_routes(app, g, calculate_wlc_dynamically, get_multi_stak
             # Exécuter la requête sur GraphDB
             response = requests.get(
                 f"{GRAPHDB_REPO}",
-                params={
+                params=query_dataset({
                     'query': sparql_query
-                },
+                }),
                 headers={'Accept': 'text/turtle'}
             )
             
@@ -176,18 +228,11 @@ def register_comparison_routes(app, g, calculate_wlc_dynamically, get_multi_stak
             if file.filename == '':
                 return jsonify({'success': False, 'error': 'Aucun fichier sélectionné'}), 400
             
-            # Lire le contenu du fichier
-            file_content = file.read().decode('utf-8')
-            
-            # Parser le graphe RDF
-            previous_analysis_graph = Graph()
-            previous_analysis_graph.parse(data=file_content, format='turtle')
-            
-            print(f"Graphe importé: {len(previous_analysis_graph)} triplets")
+            # Charger le fichier dans le magasin embarqué (sans décodage intermédiaire)
+            previous_analysis_graph = create_analysis_store()
+            previous_analysis_graph.load(file.read(), file.filename)
             
-            # Extraire les informations de l'analyse
-            WLC = Namespace("http://www.semanticweb.org/adamy/ontologies/2025/WLCONTO#")
-            ANALYSIS = Namespace("http://wlc-platform.com/analysis/")
+            print(f"Graphe importé ({previous_analysis_graph.backend}): {len(previous_analysis_graph)} triplets")
             
             # Rechercher les métadonnées de l'analyse
             analysis_query = """
@@ -214,7 +259,8 @@ def register_comparison_routes(app, g, calculate_wlc_dynamically, get_multi_stak
             previous_analysis_info = {
                 'filename': file.filename,
                 'elements_count': elements_count,
-                'triplets_count': len(previous_analysis_graph)
+                'triplets_count': len(previous_analysis_graph),
+                'backend': previous_analysis_graph.backend
             }
             
             if analysis_results:
@@ -222,11 +268,11 @@ def register_comparison_routes(app, g, calculate_wlc_dynamically, get_multi_stak
                 if result[1]:  # date
                     previous_analysis_info['date'] = str(result[1])
                 if result[2]:  # lifespan
-                    previous_analysis_info['lifespan'] = int(result[2])
+                    previous_analysis_info['lifespan'] = int(float(result[2]))
                 if result[3]:  # totalWLC
                     previous_analysis_info['total_wlc'] = float(result[3])
                 if result[4]:  # elementsCount
-                    previous_analysis_info['elements_count'] = int(result[4])
+                    previous_analysis_info['elements_count'] = int(float(result[4]))
             
             print(f"✅ Analyse importée: {previous_analysis_info}")
             
@@ -253,6 +299,12 @@ def register_comparison_routes(app, g, calculate_wlc_dynamically, get_multi_stak
             if not previous_analysis_graph:
                 return jsonify({'success': False, 'error': 'Aucune analyse précédente importée'}), 400
             
+            options = request.get_json(silent=True) or {}
+            try:
+                tolerance, top_n, field_tolerances = parse_comparison_options(options)
+            except ValueError as e:
+                return jsonify({'success': False, 'error': str(e)}), 400
+            
             # 1. ANALYSER L'ANALYSE ACTUELLE
             current_analysis = analyze_current_state(g, get_multi_stakeholder_view)
             
@@ -260,7 +312,12 @@ def register_comparison_routes(app, g, calculate_wlc_dynamically, get_multi_stak
             previous_analysis = analyze_previous_state(previous_analysis_graph)
             
             # 3. COMPARER LES ANALYSES (PASSER LE GRAPHE PRÉCÉDENT)
-            comparison = compare_analysis_states(current_analysis, previous_analysis, previous_analysis_graph)
+            comparison = compare_analysis_states(
+                current_analysis, previous_analysis, previous_analysis_graph,
+                tolerance=tolerance,
+                top_n=top_n,
+                field_tolerances=field_tolerances
+            )
             
             print(f"✅ Comparaison terminée")
             
@@ -763,7 +820,7 @@ def analyze_previous_state(previous_graph):
                 result['total_wlc'] = float(main_result[2])
                 print(f"   - WLC nominal trouvé: {result['total_wlc']:,.2f}$")
             if main_result[3]:  # elementsCount
-                result['elements_count'] = int(main_result[3])
+                result['elements_count'] = int(float(main_result[3]))
                 print(f"   - Nombre d'éléments trouvé: {result['elements_count']}")
         
         # 5. COHÉRENCE DES DONNÉES
@@ -804,7 +861,7 @@ def analyze_previous_state(previous_graph):
             'stakeholders_analysis': {}
         }
 
-def compare_analysis_states(current, previous, previous_graph):
+def compare_analysis_states(current, previous, previous_graph, tolerance=0.01, top_n=COMPARISON_TOP_N, field_tolerances=None):
     """Compare deux états d'analyse"""
     try:
         print("🔍 Comparaison des états d'analyse...")
@@ -813,8 +870,7 @@ def compare_analysis_states(current, previous, previous_graph):
         current_wlc = current.get('total_wlc', 0)
         previous_wlc = previous.get('total_wlc', 0)
         
-        # Seuil de tolérance pour éviter les faux positifs dus aux arrondis (0.01$)
-        tolerance = 0.01
+        # Seuil de tolérance pour éviter les faux positifs dus aux arrondis (0.01$ par défaut)
         
         wlc_absolute_change = current_wlc - previous_wlc
         wlc_percentage_change = (wlc_absolute_change / previous_wlc * 100) if previous_wlc > 0 else 0
@@ -919,7 +975,11 @@ def compare_analysis_states(current, previous, previous_graph):
             print(f"🔍 Éléments précédents récupérés: {len(previous_elements)}")
             
             # Analyser les changements d'éléments
-            elements_comparison = compare_elements(current_elements, previous_elements, tolerance)
+            elements_comparison = compare_elements(
+                current_elements, previous_elements, tolerance,
+                top_n=int(top_n) if top_n is not None else None,
+                field_tolerances=field_tolerances
+            )
             print(f"🔍 Comparaison éléments terminée: {elements_comparison.get('total_changes', 0)} changements")
             
         except Exception as e:
@@ -1153,36 +1213,27 @@ def get_current_elements_data():
         
         elements_result = query_graphdb(elements_query)
         
-        elements_data = {}
-        for row in elements_result:
-            guid = row['guid']
-            construction_cost = float(row.get('construction_cost', 0) or 0)
-            operation_cost = float(row.get('operation_cost', 0) or 0)
-            maintenance_cost = float(row.get('maintenance_cost', 0) or 0)
-            end_of_life_cost = float(row.get('end_of_life_cost', 0) or 0)
-            
-            total_cost = construction_cost + operation_cost + maintenance_cost + end_of_life_cost
-            
-            elements_data[guid] = {
-                'guid': guid,
-                'description': row.get('description', 'N/A'),
-                'ifc_class': row.get('ifcClass', 'N/A'),
-                'material': row.get('material', 'N/A'),
-                'uniformat_code': row.get('uniformatCode', 'N/A'),
-                'uniformat_description': row.get('uniformatDescription', 'N/A'),
-                'construction_cost': construction_cost,
-                'operation_cost': operation_cost,
-                'maintenance_cost': maintenance_cost,
-                'end_of_life_cost': end_of_life_cost,
-                'total_cost': total_cost
-            }
+        # Construction colonnaire : une liste par champ, une ligne par résultat
+        columns = {
+            'guid': [row['guid'] for row in elements_result],
+            'description': [row.get('description', 'N/A') for row in elements_result],
+            'ifc_class': [row.get('ifcClass', 'N/A') for row in elements_result],
+            'material': [row.get('material', 'N/A') for row in elements_result],
+            'uniformat_code': [row.get('uniformatCode', 'N/A') for row in elements_result],
+            'uniformat_description': [row.get('uniformatDescription', 'N/A') for row in elements_result],
+            'construction_cost': [row.get('construction_cost') for row in elements_result],
+            'operation_cost': [row.get('operation_cost') for row in elements_result],
+            'maintenance_cost': [row.get('maintenance_cost') for row in elements_result],
+            'end_of_life_cost': [row.get('end_of_life_cost') for row in elements_result]
+        }
+        elements_data = elements_to_frame(columns)
         
         print(f"✅ {len(elements_data)} éléments actuels récupérés")
         return elements_data
         
     except Exception as e:
         print(f"❌ Erreur récupération éléments actuels: {e}")
-        return {}
+        return empty_elements_frame()
 
 def get_previous_elements_data(previous_graph):
     """Récupère les données détaillées des éléments de l'analyse précédente"""
@@ -1227,120 +1278,50 @@ def get_previous_elements_data(previous_graph):
         
         elements_results = list(previous_graph.query(elements_query))
         
-        elements_data = {}
-        for row in elements_results:
-            guid = str(row[1]) if row[1] else 'Inconnu'
-            description = str(row[2]) if row[2] else 'N/A'
-            ifc_class = str(row[3]) if row[3] else 'N/A'
-            material = str(row[4]) if row[4] else 'N/A'
-            uniformat_code = str(row[5]) if row[5] else 'N/A'
-            uniformat_description = str(row[6]) if row[6] else 'N/A'
-            
-            construction_cost = float(row[7]) if row[7] else 0
-            operation_cost = float(row[8]) if row[8] else 0
-            maintenance_cost = float(row[9]) if row[9] else 0
-            end_of_life_cost = float(row[10]) if row[10] else 0
-            
-            total_cost = construction_cost + operation_cost + maintenance_cost + end_of_life_cost
-            
-            elements_data[guid] = {
-                'guid': guid,
-                'description': description,
-                'ifc_class': ifc_class,
-                'material': material,
-                'uniformat_code': uniformat_code,
-                'uniformat_description': uniformat_description,
-                'construction_cost': construction_cost,
-                'operation_cost': operation_cost,
-                'maintenance_cost': maintenance_cost,
-                'end_of_life_cost': end_of_life_cost,
-                'total_cost': total_cost
-            }
+        def column(index, default):
+            return [str(row[index]) if row[index] else default for row in elements_results]
+        
+        # Construction colonnaire (mêmes colonnes que get_current_elements_data)
+        columns = {
+            'guid': column(1, 'Inconnu'),
+            'description': column(2, 'N/A'),
+            'ifc_class': column(3, 'N/A'),
+            'material': column(4, 'N/A'),
+            'uniformat_code': column(5, 'N/A'),
+            'uniformat_description': column(6, 'N/A'),
+            'construction_cost': column(7, 0),
+            'operation_cost': column(8, 0),
+            'maintenance_cost': column(9, 0),
+            'end_of_life_cost': column(10, 0)
+        }
+        elements_data = elements_to_frame(columns)
         
         print(f"✅ {len(elements_data)} éléments précédents récupérés")
         return elements_data
         
     except Exception as e:
         print(f"❌ Erreur récupération éléments précédents: {e}")
-        return {}
+        return empty_elements_frame()
 
-def compare_elements(current_elements, previous_elements, tolerance=0.01):
-    """Compare les éléments entre deux analyses"""
+def compare_elements(current_elements, previous_elements, tolerance=0.01, top_n=COMPARISON_TOP_N, field_tolerances=None):
+    """
+    Compare les éléments entre deux analyses (jointure colonnaire par GUID)
+    
+    Args:
+        current_elements: table ou dictionnaire des éléments actuels
+        previous_elements: table ou dictionnaire des éléments précédents
+        tolerance (float): seuil de changement par défaut
+        top_n (int, optional): nombre maximal d'éléments détaillés par catégorie
+            (COMPARISON_TOP_N par défaut, None : tous)
+        field_tolerances (dict, optional): seuils spécifiques par champ de coût
+    """
     try:
         print("🔍 Comparaison détaillée des éléments...")
         
-        current_guids = set(current_elements.keys())
-        previous_guids = set(previous_elements.keys())
-        
-        # Éléments ajoutés
-        added_guids = current_guids - previous_guids
-        added_elements = []
-        for guid in added_guids:
-            element_data = current_elements[guid].copy()
-            added_elements.append(element_data)
-        
-        # Éléments supprimés
-        removed_guids = previous_guids - current_guids
-        removed_elements = []
-        for guid in removed_guids:
-            element_data = previous_elements[guid].copy()
-            removed_elements.append(element_data)
-        
-        # Éléments modifiés (présents dans les deux mais avec des coûts différents)
-        common_guids = current_guids & previous_guids
-        modified_elements = []
-        
-        for guid in common_guids:
-            current_element = current_elements[guid]
-            previous_element = previous_elements[guid]
-            
-            current_total = current_element['total_cost']
-            previous_total = previous_element['total_cost']
-            cost_change = current_total - previous_total
-            
-            if abs(cost_change) >= tolerance:
-                percentage_change = (cost_change / previous_total * 100) if previous_total > 0 else 0
-                
-                modified_element = {
-                    'guid': guid,
-                    'description': current_element.get('description', 'N/A'),
-                    'ifc_class': current_element.get('ifc_class', 'N/A'),
-                    'material': current_element.get('material', 'N/A'),
-                    'uniformat_code': current_element.get('uniformat_code', 'N/A'),
-                    'uniformat_description': current_element.get('uniformat_description', 'N/A'),
-                    'current_cost': current_total,
-                    'previous_cost': previous_total,
-                    'cost_change': cost_change,
-                    'percentage_change': percentage_change,
-                    'current_breakdown': {
-                        'construction': current_element['construction_cost'],
-                        'operation': current_element['operation_cost'],
-                        'maintenance': current_element['maintenance_cost'],
-                        'end_of_life': current_element['end_of_life_cost']
-                    },
-                    'previous_breakdown': {
-                        'construction': previous_element['construction_cost'],
-                        'operation': previous_element['operation_cost'],
-                        'maintenance': previous_element['maintenance_cost'],
-                        'end_of_life': previous_element['end_of_life_cost']
-                    }
-                }
-                modified_elements.append(modified_element)
-        
-        # Trier les éléments par importance du changement
-        added_elements.sort(key=lambda x: x['total_cost'], reverse=True)
-        removed_elements.sort(key=lambda x: x['total_cost'], reverse=True)
-        modified_elements.sort(key=lambda x: abs(x['cost_change']), reverse=True)
-        
-        result = {
-            'added': added_elements,
-            'removed': removed_elements,
-            'modified': modified_elements,
-            'added_count': len(added_elements),
-            'removed_count': len(removed_elements),
-            'modified_count': len(modified_elements),
-            'total_changes': len(added_elements) + len(removed_elements) + len(modified_elements)
-        }
+        result = compare_element_frames(
+            current_elements, previous_elements,
+            tolerance=tolerance, field_tolerances=field_tolerances, top_n=top_n
+        )
         
         print(f"✅ Comparaison éléments terminée:")
         print(f"   - Éléments ajoutés: {result['added_count']}")
@@ -1360,4 +1341,4 @@ def compare_elements(current_elements, previous_elements, tolerance=0.01):
             'removed_count': 0,
             'modified_count': 0,
             'total_changes': 0
-        } 
\ No newline at end of file
+        } 
@@ -8,12 +8,82 @@ GRAPHDB_URL = os.getenv('GRAPHDB_URL', 'http://localhost:7200')
 GRAPHDB_REPO_NAME = os.getenv('GRAPHDB_REPO_NAME', 'wlconto')
 GRAPHDB_REPO = f"{GRAPHDB_URL}/repositories/{GRAPHDB_REPO_NAME}"
 
+# Un graphe nommé par projet (instances) ; l'ontologie reste dans les graphes ONTOLOGY_GRAPHS
+# (par défaut le graphe par défaut du repository, rdf4j:nil)
+DEFAULT_PROJECT = os.getenv('DEFAULT_PROJECT', 'default')
+PROJECT_GRAPH_BASE = os.getenv('PROJECT_GRAPH_BASE', 'http://example.com/graph/')
+ONTOLOGY_GRAPHS = [
+    graph.strip()
+    for graph in os.getenv('ONTOLOGY_GRAPHS', 'http://rdf4j.org/schema/rdf4j#nil').split(',')
+    if graph.strip()
+]
+
 # Configuration de l'application
 UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads')
 ALLOWED_EXTENSIONS = {'xlsx', 'xls', 'csv', 'ifc'}
 
+# Backend de l'analyse précédente (comparaison) : auto, oxigraph ou rdflib
+PREVIOUS_ANALYSIS_BACKEND = os.getenv('PREVIOUS_ANALYSIS_BACKEND', 'auto')
+
+# Comparaison d'analyses : nombre maximal d'éléments détaillés par catégorie (ajoutés, retirés, modifiés)
+COMPARISON_TOP_N = int(os.getenv('COMPARISON_TOP_N', '500'))
+
+# Cache des modèles IFC ouverts : borne mémoire (Mo) et facteur mémoire/taille du fichier
+IFC_MODEL_CACHE_MAX_MB = int(os.getenv('IFC_MODEL_CACHE_MAX_MB', '4096'))
+IFC_MODEL_MEMORY_FACTOR = float(os.getenv('IFC_MODEL_MEMORY_FACTOR', '8'))
+
+# Extraction IFC parallèle : nombre de processus (0 = nombre de cœurs) et seuil d'éléments
+IFC_EXTRACTION_WORKERS = int(os.getenv('IFC_EXTRACTION_WORKERS', '0'))
+IFC_PARALLEL_MIN_ELEMENTS = int(os.getenv('IFC_PARALLEL_MIN_ELEMENTS', '20000'))
+
+# Espace de travail disque des fichiers IFC importés (et enrichis)
+IFC_WORKSPACE_DIR = os.getenv('IFC_WORKSPACE_DIR', os.path.join(UPLOAD_FOLDER, 'ifc_workspace'))
+
+# Cache des fichiers IFC enrichis (par modèle d'origine et version des données WLC)
+IFC_ENRICHED_CACHE_DIR = os.path.join(IFC_WORKSPACE_DIR, 'enriched')
+IFC_ENRICHED_CACHE_MAX_FILES = int(os.getenv('IFC_ENRICHED_CACHE_MAX_FILES', '20'))
+
+# Espaces de travail par projet / session et résumés d'analyse rapide (par empreinte de fichier)
+IFC_WORKSPACES_DIR = os.path.join(IFC_WORKSPACE_DIR, 'workspaces')
+IFC_SCANS_DIR = os.path.join(IFC_WORKSPACE_DIR, 'scans')
+
+# Upload IFC par morceaux : sessions reprenables et taille des morceaux (octets)
+IFC_UPLOAD_SESSIONS_DIR = os.path.join(IFC_WORKSPACE_DIR, 'sessions')
+IFC_UPLOAD_CHUNK_SIZE = int(os.getenv('IFC_UPLOAD_CHUNK_SIZE', str(8 * 1024 * 1024)))
+IFC_UPLOAD_MAX_CHUNK_SIZE = int(os.getenv('IFC_UPLOAD_MAX_CHUNK_SIZE', str(64 * 1024 * 1024)))
+
+# Tâches de fond (parsing, enrichissement) : threads, tâches en attente et historique conservé
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', '2'))
+JOB_QUEUE_MAX = int(os.getenv('JOB_QUEUE_MAX', '16'))
+JOB_HISTORY_SIZE = int(os.getenv('JOB_HISTORY_SIZE', '100'))
+
+# Pipeline d'ingestion IFC -> GraphDB : threads d'écriture, lots en file et éléments par lot
+INGEST_WRITERS = int(os.getenv('INGEST_WRITERS', '4'))
+INGEST_QUEUE_BATCHES = int(os.getenv('INGEST_QUEUE_BATCHES', '8'))
+INGEST_BATCH_SIZE = int(os.getenv('INGEST_BATCH_SIZE', '500'))
+
+# Import en masse des coûts (Excel / CSV) : lignes par requête DELETE/INSERT et lignes lues par bloc
+COST_IMPORT_BATCH_SIZE = int(os.getenv('COST_IMPORT_BATCH_SIZE', '500'))
+COST_IMPORT_CHUNK_ROWS = int(os.getenv('COST_IMPORT_CHUNK_ROWS', '50000'))
+
+# Base de référence des durées de vie (Uniformat / classe IFC / matériau), persistée en JSON
+LIFESPAN_DB_PATH = os.getenv('LIFESPAN_DB_PATH', os.path.join(UPLOAD_FOLDER, 'lifespan_db.json'))
+
+# Empreintes des liaisons coûts -> années, un fichier JSON par projet (hors graphe des instances)
+YEAR_LINK_STATE_DIR = os.getenv('YEAR_LINK_STATE_DIR', os.path.join(UPLOAD_FOLDER, 'year_links'))
+
+# Version des éléments par projet (fichiers témoins de l'index du tableau, partagés entre workers)
+ELEMENT_INDEX_VERSION_DIR = os.getenv('ELEMENT_INDEX_VERSION_DIR', os.path.join(UPLOAD_FOLDER, 'element_index'))
+
 # Création du dossier uploads s'il n'existe pas
 os.makedirs(UPLOAD_FOLDER, exist_ok=True) 
+os.makedirs(IFC_WORKSPACE_DIR, exist_ok=True)
+os.makedirs(IFC_UPLOAD_SESSIONS_DIR, exist_ok=True)
+os.makedirs(IFC_ENRICHED_CACHE_DIR, exist_ok=True)
+os.makedirs(IFC_WORKSPACES_DIR, exist_ok=True)
+os.makedirs(IFC_SCANS_DIR, exist_ok=True)
+os.makedirs(YEAR_LINK_STATE_DIR, exist_ok=True)
+os.makedirs(ELEMENT_INDEX_VERSION_DIR, exist_ok=True)
 
 # Debug: Afficher la configuration GraphDB
 print(f"GraphDB URL configurée: {GRAPHDB_REPO}")
@@ -0,0 +1,206 @@
+"""
+Moteur de comparaison d'éléments en colonnes (jointure par GUID)
+
+Les éléments de chaque analyse sont représentés sous forme de table
+(un DataFrame indexé par GUID : quatre coûts de phase + attributs).
+La comparaison est une jointure par clé avec des masques de changement
+par champ, des seuils de tolérance et un classement des N plus grands
+changements : la détection ne boucle jamais en Python sur les éléments,
+seules les lignes renvoyées au frontend sont matérialisées.
+"""
+
+import numpy as np
+import pandas as pd
+
+COST_FIELDS = ['construction_cost', 'operation_cost', 'maintenance_cost', 'end_of_life_cost']
+ATTRIBUTE_FIELDS = ['description', 'ifc_class', 'material', 'uniformat_code', 'uniformat_description']
+ELEMENT_COLUMNS = ['guid'] + ATTRIBUTE_FIELDS + COST_FIELDS + ['total_cost']
+
+# Clés utilisées dans les ventilations renvoyées au frontend
+BREAKDOWN_KEYS = {
+    'construction_cost': 'construction',
+    'operation_cost': 'operation',
+    'maintenance_cost': 'maintenance',
+    'end_of_life_cost': 'end_of_life'
+}
+
+
+def empty_elements_frame():
+    """Retourne une table d'éléments vide avec les bonnes colonnes"""
+    return elements_to_frame([])
+
+
+def elements_to_frame(elements):
+    """
+    Convertit des éléments en table colonnaire indexée par GUID.
+
+    Args:
+        elements: DataFrame, dictionnaire {guid: élément}, liste de dictionnaires
+                  ou dictionnaire de colonnes {colonne: [valeurs]}
+
+    Returns:
+        pd.DataFrame: une ligne par GUID (le dernier doublon l'emporte)
+    """
+    if isinstance(elements, pd.DataFrame) and list(elements.columns) == ELEMENT_COLUMNS:
+        # Table déjà normalisée (sortie de elements_to_frame)
+        return elements
+    if isinstance(elements, pd.DataFrame):
+        frame = elements.copy()
+    elif isinstance(elements, dict) and elements and all(isinstance(v, list) for v in elements.values()):
+        frame = pd.DataFrame(elements)
+    elif isinstance(elements, dict):
+        frame = pd.DataFrame(list(elements.values()))
+    else:
+        frame = pd.DataFrame(list(elements))
+
+    if 'guid' not in frame.columns:
+        frame['guid'] = frame.index.astype(str) if len(frame) else pd.Series(dtype=object)
+
+    for field in ATTRIBUTE_FIELDS:
+        if field not in frame.columns:
+            frame[field] = 'N/A'
+        frame[field] = frame[field].fillna('N/A').astype(str)
+
+    for field in COST_FIELDS:
+        if field not in frame.columns:
+            frame[field] = 0.0
+        frame[field] = pd.to_numeric(frame[field], errors='coerce').fillna(0.0).astype(float)
+
+    frame['total_cost'] = frame[COST_FIELDS].sum(axis=1) if len(frame) else pd.Series(dtype=float)
+    frame['guid'] = frame['guid'].astype(str)
+    frame = frame.drop_duplicates(subset='guid', keep='last')
+
+    return frame[ELEMENT_COLUMNS].set_index('guid', drop=False)
+
+
+def _field_tolerances(tolerance, field_tolerances):
+    """Seuil de tolérance par champ de coût (+ total)"""
+    tolerances = {field: tolerance for field in COST_FIELDS + ['total_cost']}
+    if field_tolerances:
+        for field, value in field_tolerances.items():
+            if field in tolerances and value is not None:
+                tolerances[field] = float(value)
+    return tolerances
+
+
+def _rank(values, top_n):
+    """Indices triés par valeur décroissante, limités aux N premiers"""
+    order = np.argsort(-values, kind='stable')
+    if top_n is not None and top_n >= 0:
+        order = order[:top_n]
+    return order
+
+
+def _element_records(frame, order):
+    """Matérialise les lignes sélectionnées en dictionnaires (format historique)"""
+    if not len(order):
+        return []
+    return frame.iloc[order].to_dict('records')
+
+
+def compare_element_frames(current, previous, tolerance=0.01, field_tolerances=None, top_n=None):
+    """
+    Compare deux tables d'éléments par jointure sur le GUID.
+
+    Args:
+        current: éléments de l'analyse actuelle (voir elements_to_frame)
+        previous: éléments de l'analyse précédente
+        tolerance (float): seuil par défaut en dessous duquel un écart est ignoré
+        field_tolerances (dict, optional): seuils spécifiques par champ de coût
+        top_n (int, optional): nombre maximal d'éléments détaillés par catégorie
+
+    Returns:
+        dict: éléments ajoutés, supprimés, modifiés (classés) et compteurs
+    """
+    cur = elements_to_frame(current)
+    prev = elements_to_frame(previous)
+    tolerances = _field_tolerances(tolerance, field_tolerances)
+
+    in_previous = cur.index.isin(prev.index)
+    in_current = prev.index.isin(cur.index)
+
+    # Éléments ajoutés / supprimés : classement par coût total décroissant
+    added = cur[~in_previous]
+    removed = prev[~in_current]
+    added_order = _rank(added['total_cost'].to_numpy(), top_n)
+    removed_order = _rank(removed['total_cost'].to_numpy(), top_n)
+
+    # Éléments communs : alignement des deux tables sur les mêmes GUID
+    common = cur[in_previous]
+    prev_common = prev.reindex(common.index)
+
+    cur_costs = common[COST_FIELDS + ['total_cost']].to_numpy()
+    prev_costs = prev_common[COST_FIELDS + ['total_cost']].to_numpy()
+    deltas = cur_costs - prev_costs
+
+    cost_masks = {}
+    for col, field in enumerate(COST_FIELDS + ['total_cost']):
+        cost_masks[field] = np.abs(deltas[:, col]) >= tolerances[field]
+
+    attribute_masks = {}
+    for field in ATTRIBUTE_FIELDS:
+        attribute_masks[field] = common[field].to_numpy() != prev_common[field].to_numpy()
+
+    modified_mask = np.zeros(len(common), dtype=bool)
+    for mask in cost_masks.values():
+        modified_mask |= mask
+
+    total_change = deltas[:, -1]
+    previous_total = prev_costs[:, -1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        percentage = np.where(previous_total > 0, total_change / previous_total * 100, 0.0)
+
+    modified_idx = np.flatnonzero(modified_mask)
+    modified_order = modified_idx[_rank(np.abs(total_change[modified_idx]), top_n)]
+
+    # Matérialisation colonne par colonne des seules lignes retenues
+    cur_sel = common.iloc[modified_order]
+    prev_sel = prev_common.iloc[modified_order]
+    changed = [(f, cost_masks[f][modified_order]) for f in COST_FIELDS]
+    changed += [(f, attribute_masks[f][modified_order]) for f in ATTRIBUTE_FIELDS]
+    columns = {f: cur_sel[f].tolist() for f in ['guid'] + ATTRIBUTE_FIELDS + COST_FIELDS}
+    prev_columns = {f: prev_sel[f].tolist() for f in COST_FIELDS}
+    current_totals = cur_costs[modified_order, -1].tolist()
+    previous_totals = prev_costs[modified_order, -1].tolist()
+    changes = total_change[modified_order].tolist()
+    percentages = percentage[modified_order].tolist()
+
+    modified_elements = []
+    for k in range(len(modified_order)):
+        modified_elements.append({
+            'guid': columns['guid'][k],
+            'description': columns['description'][k],
+            'ifc_class': columns['ifc_class'][k],
+            'material': columns['material'][k],
+            'uniformat_code': columns['uniformat_code'][k],
+            'uniformat_description': columns['uniformat_description'][k],
+            'current_cost': current_totals[k],
+            'previous_cost': previous_totals[k],
+            'cost_change': changes[k],
+            'percentage_change': percentages[k],
+            'current_construction_cost': columns['construction_cost'][k],
+            'previous_construction_cost': prev_columns['construction_cost'][k],
+            'current_breakdown': {BREAKDOWN_KEYS[f]: columns[f][k] for f in COST_FIELDS},
+            'previous_breakdown': {BREAKDOWN_KEYS[f]: prev_columns[f][k] for f in COST_FIELDS},
+            'changed_fields': [f for f, mask in changed if mask[k]]
+        })
+
+    field_changes = {f: int(cost_masks[f].sum()) for f in COST_FIELDS}
+    field_changes.update({f: int(attribute_masks[f].sum()) for f in ATTRIBUTE_FIELDS})
+
+    added_count = int(len(added))
+    removed_count = int(len(removed))
+    modified_count = int(modified_mask.sum())
+
+    return {
+        'added': _element_records(added, added_order),
+        'removed': _element_records(removed, removed_order),
+        'modified': modified_elements,
+        'added_count': added_count,
+        'removed_count': removed_count,
+        'modified_count': modified_count,
+        'total_changes': added_count + removed_count + modified_count,
+        'field_changes': field_changes,
+        'top_n': top_n,
+        'truncated': top_n is not None and max(added_count, removed_count, modified_count) > top_n
+    }
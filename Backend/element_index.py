@@ -0,0 +1,352 @@
+"""
+Index en mémoire des éléments pour le tableau paginé (filtres, tri, pages)
+
+L'index est construit une seule fois à partir de la liste complète des
+éléments (même format que /get-ifc-elements) puis réutilisé tant que les
+données n'ont pas changé. Les routes qui écrivent des données d'éléments
+ou de coûts changent la version des données du projet (voir
+invalidate_element_index), enregistrée dans un fichier témoin partagé par
+tous les workers ; l'index est reconstruit paresseusement à la requête
+suivante.
+
+Structures maintenues :
+- codes Uniformat triés        -> filtre par préfixe (bisect)
+- classe IFC / matériau / description -> ensembles d'indices
+- durées de vie triées         -> filtre par intervalle (bisect)
+- ensemble des éléments avec au moins un coût
+- ordres de tri précalculés par colonne (construits à la demande)
+"""
+
+import os
+import threading
+import uuid
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+
+from config import ELEMENT_INDEX_VERSION_DIR
+
+COST_KEYS = ['ConstructionCost', 'OperationCost', 'MaintenanceCost', 'EndOfLifeCost']
+NUMERIC_KEYS = COST_KEYS + ['Lifespan']
+TEXT_KEYS = ['GlobalId', 'IfcClass', 'Uniformat', 'UniformatDesc', 'Material', 'EndOfLifeStrategy']
+SORT_KEYS = TEXT_KEYS + NUMERIC_KEYS
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def _to_number(value):
+    """Convertit une valeur SPARQL en nombre, None si absente ou invalide"""
+    if value is None or value == '':
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def ifc_class_name(value):
+    """Nom court de la classe IFC (fragment de l'URI)"""
+    if not value:
+        return ''
+    return value.rsplit('#', 1)[-1].rsplit('/', 1)[-1]
+
+
+class ElementIndex:
+    """Index immuable d'une version donnée des éléments"""
+
+    def __init__(self, elements, version='0'):
+        self.elements = list(elements)
+        self.version = version
+        self._orders = {}
+        self._order_lock = threading.Lock()
+
+        by_class = defaultdict(set)
+        by_material = defaultdict(set)
+        by_description = defaultdict(set)
+        uniformat = []
+        lifespans = []
+        with_cost = set()
+
+        for i, element in enumerate(self.elements):
+            uniformat.append(((element.get('Uniformat') or '').upper(), i))
+            by_class[ifc_class_name(element.get('IfcClass')).lower()].add(i)
+            by_material[(element.get('Material') or '').strip().lower()].add(i)
+            by_description[element.get('UniformatDesc') or ''].add(i)
+
+            lifespan = _to_number(element.get('Lifespan'))
+            if lifespan is not None:
+                lifespans.append((lifespan, i))
+
+            if any((_to_number(element.get(key)) or 0) > 0 for key in COST_KEYS):
+                with_cost.add(i)
+
+        uniformat.sort()
+        lifespans.sort()
+        self._uniformat_keys = [code for code, _ in uniformat]
+        self._uniformat_ids = [i for _, i in uniformat]
+        self._lifespan_keys = [value for value, _ in lifespans]
+        self._lifespan_ids = [i for _, i in lifespans]
+        # Position de chaque élément dans les listes triées (test d'intervalle en O(1))
+        self._uniformat_pos = [0] * len(self.elements)
+        for position, i in enumerate(self._uniformat_ids):
+            self._uniformat_pos[i] = position
+        self._lifespan_pos = [-1] * len(self.elements)
+        for position, i in enumerate(self._lifespan_ids):
+            self._lifespan_pos[i] = position
+        self._by_class = dict(by_class)
+        self._by_material = dict(by_material)
+        self._by_description = dict(by_description)
+        self._with_cost = with_cost
+        self._without_cost = set(range(len(self.elements))) - with_cost
+        # Texte de recherche (GUID, description, matériau) en minuscules
+        self._search_text = [
+            '\x00'.join((e.get('GlobalId') or '', e.get('UniformatDesc') or '', e.get('Material') or '')).lower()
+            for e in self.elements
+        ]
+
+        self.facets = {
+            'ifc_classes': sorted(name for name in {ifc_class_name(e.get('IfcClass')) for e in self.elements} if name),
+            'materials': sorted(name for name in {(e.get('Material') or '').strip() for e in self.elements} if name),
+            'descriptions': sorted(desc for desc in self._by_description if desc)
+        }
+
+    def __len__(self):
+        return len(self.elements)
+
+    # ---- Filtres ----
+
+    def _uniformat_prefix(self, prefix):
+        """Intervalle [lo, hi) des codes Uniformat commençant par le préfixe"""
+        prefix = prefix.upper()
+        lo = bisect_left(self._uniformat_keys, prefix)
+        hi = bisect_left(self._uniformat_keys, prefix + '\uffff')
+        return lo, hi
+
+    def _lifespan_range(self, minimum, maximum):
+        """Intervalle [lo, hi) des durées de vie comprises entre les bornes"""
+        lo = bisect_left(self._lifespan_keys, minimum) if minimum is not None else 0
+        hi = bisect_right(self._lifespan_keys, maximum) if maximum is not None else len(self._lifespan_keys)
+        return lo, hi
+
+    @staticmethod
+    def _union(index, keys):
+        if len(keys) == 1:
+            return index.get(keys[0], set())
+        result = set()
+        for key in keys:
+            result |= index.get(key, set())
+        return result
+
+    def filter(self, uniformat=None, ifc_classes=None, materials=None, descriptions=None,
+               lifespan_min=None, lifespan_max=None, has_cost=None, text=None):
+        """
+        Retourne l'ensemble des indices correspondant aux filtres,
+        ou None si aucun filtre n'est actif (tous les éléments).
+        """
+        sets = []
+        ranges = []  # (positions, lo, hi, indices triés)
+        if uniformat:
+            lo, hi = self._uniformat_prefix(uniformat)
+            ranges.append((self._uniformat_pos, lo, hi, self._uniformat_ids))
+        if lifespan_min is not None or lifespan_max is not None:
+            lo, hi = self._lifespan_range(lifespan_min, lifespan_max)
+            ranges.append((self._lifespan_pos, lo, hi, self._lifespan_ids))
+        if ifc_classes:
+            sets.append(self._union(self._by_class, [ifc_class_name(c).lower() for c in ifc_classes]))
+        if materials:
+            sets.append(self._union(self._by_material, [m.strip().lower() for m in materials]))
+        if descriptions:
+            sets.append(self._union(self._by_description, descriptions))
+        if has_cost is True:
+            sets.append(self._with_cost)
+        elif has_cost is False:
+            sets.append(self._without_cost)
+
+        if not sets and not ranges and not text:
+            return None
+
+        if sets:
+            # Intersection des ensembles en partant du plus petit
+            sets.sort(key=len)
+            candidates = sets[0].intersection(*sets[1:]) if len(sets) > 1 else sets[0]
+        elif ranges:
+            # Parcours du plus petit intervalle, les autres sont testés par position
+            ranges.sort(key=lambda r: r[2] - r[1])
+            _, lo, hi, ids = ranges.pop(0)
+            candidates = ids[lo:hi]
+        else:
+            candidates = range(len(self.elements))
+
+        for pos, lo, hi, _ in ranges:
+            candidates = [i for i in candidates if lo <= pos[i] < hi]
+
+        if text:
+            needle = text.lower()
+            search_text = self._search_text
+            candidates = [i for i in candidates if needle in search_text[i]]
+
+        return candidates if isinstance(candidates, set) else set(candidates)
+
+    # ---- Tri ----
+
+    def _order(self, key):
+        """
+        Ordre croissant précalculé pour une colonne.
+
+        Returns:
+            tuple: (indices triés avec valeurs présentes, indices sans valeur, rang par indice)
+        """
+        order = self._orders.get(key)
+        if order is not None:
+            return order
+
+        with self._order_lock:
+            order = self._orders.get(key)
+            if order is None:
+                present, missing = [], []
+                for i, element in enumerate(self.elements):
+                    if key in NUMERIC_KEYS:
+                        value = _to_number(element.get(key))
+                    else:
+                        value = (element.get(key) or '').lower() or None
+                    if value is None:
+                        missing.append(i)
+                    else:
+                        present.append((value, i))
+                present.sort()
+                present = [i for _, i in present]
+                rank = [0] * len(self.elements)
+                for position, i in enumerate(present + missing):
+                    rank[i] = position
+                order = (present, missing, rank)
+                self._orders[key] = order
+        return order
+
+    def _page_ids(self, matches, sort, descending, offset, limit):
+        """Indices de la page demandée (valeurs absentes toujours en dernier)"""
+        if not sort:
+            ids = range(len(self.elements)) if matches is None else sorted(matches)
+            return list(ids[offset:offset + limit])
+
+        present, missing, rank = self._order(sort)
+        if matches is None:
+            ordered = present[::-1] + missing if descending else present + missing
+            return ordered[offset:offset + limit]
+
+        # Tri des seuls candidats par leur rang précalculé
+        if descending:
+            boundary = len(present)
+            key = lambda i: (rank[i] >= boundary, -rank[i] if rank[i] < boundary else rank[i])
+        else:
+            key = rank.__getitem__
+        return sorted(matches, key=key)[offset:offset + limit]
+
+    def search(self, page=1, page_size=DEFAULT_PAGE_SIZE, sort=None, order='asc', **filters):
+        """
+        Filtre, trie et pagine les éléments.
+
+        Args:
+            page (int): numéro de page (à partir de 1)
+            page_size (int): nombre d'éléments par page (plafonné à MAX_PAGE_SIZE)
+            sort (str, optional): colonne de tri (voir SORT_KEYS)
+            order (str): "asc" ou "desc"
+            **filters: voir filter()
+
+        Returns:
+            dict: total filtré, page demandée et éléments de la page
+        """
+        page_size = max(1, min(int(page_size or DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE))
+        page = max(1, int(page or 1))
+        if sort not in SORT_KEYS:
+            sort = None
+        descending = (order or 'asc').lower() == 'desc'
+
+        matches = self.filter(**filters)
+        total = len(self.elements) if matches is None else len(matches)
+        offset = (page - 1) * page_size
+
+        ids = self._page_ids(matches, sort, descending, offset, page_size)
+
+        return {
+            'total': total,
+            'page': page,
+            'page_size': page_size,
+            'pages': (total + page_size - 1) // page_size,
+            'sort': sort,
+            'order': 'desc' if descending else 'asc',
+            'elements': [self.elements[i] for i in ids]
+        }
+
+    def guids(self, **filters):
+        """GUIDs de tous les éléments filtrés (sélection « tous filtrés », sans pagination)"""
+        matches = self.filter(**filters)
+        ids = range(len(self.elements)) if matches is None else sorted(matches)
+        return [self.elements[i].get('GlobalId') for i in ids]
+
+
+# Index partagés par les requêtes (un par projet) ; la version des données
+# de chaque projet est un fichier témoin partagé par tous les workers
+_element_indexes = {}
+_state_lock = threading.Lock()
+_build_lock = threading.Lock()
+
+
+def _version_path(key):
+    return os.path.join(ELEMENT_INDEX_VERSION_DIR, f"{key}.version")
+
+
+def data_version(key='default'):
+    """Version courante des éléments d'un projet ('0' si jamais modifiés)"""
+    try:
+        with open(_version_path(key), 'r', encoding='utf-8') as f:
+            return f.read().strip() or '0'
+    except FileNotFoundError:
+        return '0'
+
+
+def invalidate_element_index(key='default'):
+    """Signale que les éléments du projet ont changé (reconstruction à la prochaine requête, tous workers)"""
+    path = _version_path(key)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(uuid.uuid4().hex)
+    os.replace(tmp_path, path)
+
+
+def get_element_index(load_elements, refresh=False, key='default'):
+    """
+    Retourne l'index à jour, en le reconstruisant si les données ont changé.
+
+    Args:
+        load_elements (callable): fonction retournant la liste complète des éléments
+        refresh (bool): force la reconstruction
+        key (str): projet dont les éléments sont indexés
+
+    Returns:
+        ElementIndex: index de la version courante
+    """
+    if refresh:
+        invalidate_element_index(key)
+
+    version = data_version(key)
+    with _state_lock:
+        index = _element_indexes.get(key)
+    if index is not None and index.version == version:
+        return index
+
+    with _build_lock:
+        # Un autre thread a peut-être déjà reconstruit l'index
+        version = data_version(key)
+        with _state_lock:
+            index = _element_indexes.get(key)
+        if index is not None and index.version == version:
+            return index
+
+        print(f"🔎 Construction de l'index des éléments ({key}, version {version[:8]})")
+        index = ElementIndex(load_elements(), version)
+        with _state_lock:
+            # Les index périmés des autres projets sont libérés
+            for other in [k for k, v in _element_indexes.items() if k != key and v.version != data_version(k)]:
+                del _element_indexes[other]
+            _element_indexes[key] = index
+        return index
@@ -0,0 +1,120 @@
+"""
+Cache disque des fichiers IFC enrichis
+
+Un fichier enrichi est entièrement déterminé par :
+- l'empreinte SHA-256 du fichier IFC d'origine (jamais modifié)
+- la version des données WLC (empreinte des lignes lues dans l'ontologie)
+- la version du moteur d'enrichissement
+
+Chaque combinaison est enrichie une seule fois ; les appels suivants à
+/enrich-ifc et /download-enriched-ifc réutilisent le fichier en cache. Un
+second enrichissement repart toujours du fichier d'origine : les jeux de
+propriétés WLC ne sont jamais dupliqués.
+"""
+
+import hashlib
+import json
+import os
+import threading
+
+from config import IFC_ENRICHED_CACHE_DIR, IFC_ENRICHED_CACHE_MAX_FILES
+from workspace_store import workspace_store
+
+# À incrémenter quand le contenu produit par ifc_enrichment change
+ENRICHMENT_ENGINE_VERSION = 2
+
+_lock = threading.Lock()
+
+
+def wlc_data_version(rows):
+    """Empreinte des données WLC (indépendante de l'ordre des lignes)"""
+    digest = hashlib.sha256(f"engine:{ENRICHMENT_ENGINE_VERSION}\n".encode())
+    for line in sorted(json.dumps(row, sort_keys=True) for row in rows):
+        digest.update(line.encode('utf-8'))
+        digest.update(b'\n')
+    return digest.hexdigest()
+
+
+def _paths(source_sha256, data_version):
+    base = os.path.join(IFC_ENRICHED_CACHE_DIR, f"{source_sha256[:24]}_{data_version[:24]}")
+    return base + '.ifc', base + '.json'
+
+
+def lookup(source_sha256, data_version):
+    """
+    Fichier enrichi en cache pour (modèle d'origine, version des données).
+
+    Returns:
+        dict | None: {'path', 'size', 'sha256', 'stats'} si présent
+    """
+    ifc_path, meta_path = _paths(source_sha256, data_version)
+    if not (os.path.exists(ifc_path) and os.path.exists(meta_path)):
+        return None
+    with open(meta_path, 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    os.utime(meta_path)  # récemment utilisé (éviction)
+    meta['path'] = ifc_path
+    return meta
+
+
+def store(source_sha256, data_version, write_model, stats, file_hash):
+    """
+    Écrit un fichier enrichi dans le cache (écriture atomique).
+
+    Args:
+        write_model (callable): écrit le modèle enrichi au chemin donné
+        stats (dict): compteurs d'enrichissement conservés avec le fichier
+        file_hash (callable): empreinte SHA-256 d'un fichier
+
+    Returns:
+        dict: même forme que lookup()
+    """
+    ifc_path, meta_path = _paths(source_sha256, data_version)
+    # Nom propre au processus et au thread ; extension .ifc conservée pour ifcopenshell.write
+    tmp_path = f"{ifc_path[:-len('.ifc')]}.{os.getpid()}.{threading.get_ident()}.tmp.ifc"
+    write_model(tmp_path)
+    os.replace(tmp_path, ifc_path)
+
+    meta = {
+        'source_sha256': source_sha256,
+        'data_version': data_version,
+        'size': os.path.getsize(ifc_path),
+        'sha256': file_hash(ifc_path),
+        'stats': stats
+    }
+    tmp_meta_path = f"{meta_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_meta_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    os.replace(tmp_meta_path, meta_path)
+
+    prune()
+    meta['path'] = ifc_path
+    return meta
+
+
+def is_cached_file(path):
+    """Vrai si le chemin désigne un fichier du cache (à ne pas supprimer avec l'upload)"""
+    return bool(path) and os.path.dirname(os.path.abspath(path)) == os.path.abspath(IFC_ENRICHED_CACHE_DIR)
+
+
+def prune(max_files=IFC_ENRICHED_CACHE_MAX_FILES):
+    """
+    Supprime les fichiers enrichis les moins récemment utilisés au-delà de max_files.
+
+    Un fichier encore utilisé comme fichier courant d'un espace de travail
+    (voir use_enriched_file) n'est jamais évincé.
+    """
+    with _lock:
+        in_use = workspace_store.current_paths()
+        entries = [
+            os.path.join(IFC_ENRICHED_CACHE_DIR, name)
+            for name in os.listdir(IFC_ENRICHED_CACHE_DIR) if name.endswith('.json')
+        ]
+        entries.sort(key=os.path.getmtime, reverse=True)
+        for meta_path in entries[max_files:]:
+            if os.path.abspath(meta_path[:-5] + '.ifc') in in_use:
+                continue
+            for path in (meta_path, meta_path[:-5] + '.ifc'):
+                if os.path.exists(path):
+                    os.unlink(path)
+            print(f"🗑️ Fichier enrichi évincé du cache: {os.path.basename(meta_path)[:-5]}")
@@ -0,0 +1,56 @@
+"""
+Verrou exclusif partagé entre threads et processus (workers gunicorn)
+
+Un verrou de thread sérialise les threads du processus, puis fcntl.flock
+sur un fichier .lock sérialise les processus. Sans fcntl (Windows), seul
+le verrou de thread s'applique : un seul worker doit alors être utilisé.
+"""
+
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+class FileLock:
+    """
+    Verrou exclusif non réentrant associé à un fichier de verrou.
+
+    Args:
+        path (str): fichier de verrou (créé au besoin, jamais lu)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._thread_lock = threading.Lock()
+        self._fd = None
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        if fcntl is None:
+            return self
+        try:
+            fd = os.open(self.path, os.O_CREAT | os.O_RDWR, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            except BaseException:
+                os.close(fd)
+                raise
+        except BaseException:
+            self._thread_lock.release()
+            raise
+        self._fd = fd
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        fd, self._fd = self._fd, None
+        try:
+            if fd is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+                os.close(fd)
+        finally:
+            self._thread_lock.release()
+        return False
@@ -0,0 +1,123 @@
+"""
+Cache des modèles IFC ouverts (ifcopenshell) partagé entre les routes IFC
+
+Ouvrir un gros modèle (300 Mo) prend 30 à 60 s : le modèle est ouvert une
+seule fois et réutilisé par /parse-ifc, /parse-ifc-groups et /enrich-ifc.
+
+- clé : empreinte SHA-256 du contenu du fichier (voir ifc_workspace)
+- éviction LRU bornée en mémoire (IFC_MODEL_CACHE_MAX_MB) ; le coût d'une
+  entrée est estimé à partir de la taille du fichier source
+- invalidation explicite à chaque nouvel upload
+- take() retire le modèle du cache pour les traitements qui le modifient
+  (enrichissement) afin qu'aucune autre route ne voie un modèle à moitié modifié
+"""
+
+import threading
+from collections import OrderedDict
+
+from config import IFC_MODEL_CACHE_MAX_MB, IFC_MODEL_MEMORY_FACTOR
+
+
+class IfcModelCache:
+    """Cache LRU de modèles ifcopenshell borné par une estimation mémoire"""
+
+    def __init__(self, max_bytes, memory_factor=IFC_MODEL_MEMORY_FACTOR):
+        self.max_bytes = max_bytes
+        self.memory_factor = memory_factor
+        self._entries = OrderedDict()  # clé -> (modèle, coût estimé)
+        self._lock = threading.Lock()
+        self._open_locks = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _estimate(self, size):
+        return int(size * self.memory_factor)
+
+    @property
+    def used_bytes(self):
+        return sum(cost for _, cost in self._entries.values())
+
+    def _evict(self):
+        """Retire les modèles les moins récemment utilisés jusqu'à respecter la borne"""
+        while len(self._entries) > 1 and self.used_bytes > self.max_bytes:
+            key, _ = self._entries.popitem(last=False)
+            print(f"🗑️ Modèle IFC évincé du cache: {key[:12]}")
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, model, size):
+        """Ajoute un modèle ouvert (size = taille du fichier source en octets)"""
+        with self._lock:
+            self._entries[key] = (model, self._estimate(size))
+            self._entries.move_to_end(key)
+            self._evict()
+
+    def get_or_open(self, key, opener, size):
+        """
+        Retourne le modèle en cache ou l'ouvre une seule fois.
+
+        Args:
+            key (str): empreinte du contenu
+            opener (callable): fonction ouvrant le modèle si absent du cache
+            size (int): taille du fichier source (estimation mémoire)
+
+        Returns:
+            ifcopenshell.file: modèle ouvert
+        """
+        model = self.get(key)
+        if model is not None:
+            self.hits += 1
+            return model
+
+        with self._lock:
+            open_lock = self._open_locks.setdefault(key, threading.Lock())
+
+        # Une seule ouverture par clé, même si plusieurs requêtes arrivent en même temps
+        with open_lock:
+            model = self.get(key)
+            if model is not None:
+                self.hits += 1
+                return model
+
+            self.misses += 1
+            print(f"📂 Ouverture du modèle IFC (cache manquant: {key[:12]})")
+            model = opener()
+            self.put(key, model, size)
+
+        with self._lock:
+            self._open_locks.pop(key, None)
+        return model
+
+    def take(self, key):
+        """Retire et retourne le modèle (None s'il n'est pas en cache)"""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            return entry[0] if entry else None
+
+    def invalidate(self, key=None):
+        """Vide le cache (ou une seule entrée)"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'used_mb': round(self.used_bytes / (1024 * 1024), 1),
+                'max_mb': round(self.max_bytes / (1024 * 1024), 1),
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+# Instance partagée par l'application
+ifc_model_cache = IfcModelCache(IFC_MODEL_CACHE_MAX_MB * 1024 * 1024)
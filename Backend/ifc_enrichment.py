@@ -0,0 +1,323 @@
+"""
+Moteur d'enrichissement IFC avec les données WLC de l'ontologie
+
+Les index sont construits une seule fois par enrichissement :
+- GUID -> entité IFC (IfcElement et IfcGroup)
+- code Uniformat porté par chaque élément (un seul passage sur les
+  IfcRelDefinesByProperties)
+- éléments possédant déjà un jeu WLC_Data (jamais dupliqué)
+- moyennes WLC par code Uniformat, calculées une fois par groupe
+
+Les jeux de propriétés sont partagés par valeur : tous les éléments dont
+les données WLC sont identiques référencent le même IfcPropertySet, lié par
+un seul IfcRelDefinesByProperties. Le nombre d'entités créées dépend du
+nombre de combinaisons de valeurs distinctes, pas du nombre d'éléments.
+"""
+
+import ifcopenshell
+import ifcopenshell.guid
+
+from jobs import check_cancelled, report_progress
+
+WLC_PSET_NAME = "WLC_Data"
+WLC_PSET_DESCRIPTION = "Données de coût du cycle de vie"
+WLC_GROUP_PSET_NAME = "WLC_Group_Data"
+
+# Groupes cibles recherchés par nom (plus robuste que par GUID) : nom -> GUID ontologie
+TARGET_GROUPS_BY_NAME = {
+    'Murs-rideaux MR_V3_ENV': '3ffPwhTTv76OU5CdZc3Mgo',
+    'Murs de base R02.1': 'c6175a257c2049a88f8c16'
+}
+
+# Mapping des types IFC vers les groupes Uniformat
+UNIFORMAT_BY_IFC_TYPE = {
+    'ifcwall': 'B2010',
+    'ifcwallstandardcase': 'B2010',
+    'ifcwindow': 'B2020',
+    'ifcdoor': 'B2020',
+    'ifcslab': 'B1010',
+    'ifcroof': 'B3010',
+    'ifcbeam': 'B1020',
+    'ifccolumn': 'B1020',
+    'ifcstair': 'B2030',
+    'ifcrailing': 'B2030',
+    'ifcflowsegment': 'D3040',
+    'ifcflowfitting': 'D3040',
+    'ifcflowterminal': 'D3040',
+    'ifcairtoairheatrecovery': 'D3030',
+    'ifcchiller': 'D3030',
+    'ifcboiler': 'D3020',
+    'ifcunitaryequipment': 'D3050',
+    'ifcfan': 'D3040',
+    'ifcpump': 'D3040',
+    'ifcelectricmotor': 'D5020',
+    'ifclightfixture': 'D5010',
+    'ifcelectricappliance': 'D5020'
+}
+
+# Mots-clés dans le nom de l'élément, dans l'ordre de priorité
+UNIFORMAT_BY_NAME_KEYWORDS = (
+    (('chauffage', 'heating', 'radiator', 'radiateur'), 'D3020'),
+    (('climatisation', 'cooling', 'air conditioner'), 'D3030'),
+    (('ventilation', 'fan', 'air handling'), 'D3040'),
+    (('mur', 'wall', 'rideau'), 'B2010'),
+    (('window', 'fenêtre'), 'B2020'),
+    (('door', 'porte'), 'B2020')
+)
+
+# (clé des données WLC, nom de la propriété, type IFC) dans l'ordre d'écriture
+WLC_PROPERTIES = (
+    ('construction_cost', 'ConstructionCost', 'IfcReal'),
+    ('operation_cost', 'OperationCost', 'IfcReal'),
+    ('maintenance_cost', 'MaintenanceCost', 'IfcReal'),
+    ('end_of_life_cost', 'EndOfLifeCost', 'IfcReal'),
+    ('lifespan', 'Lifespan', 'IfcInteger'),
+    ('uniformat_code', 'UniformatCode', 'IfcText'),
+    ('uniformat_desc', 'UniformatDescription', 'IfcText')
+)
+
+
+def _number(value, cast=float):
+    return cast(float(value)) if value else 0
+
+
+def wlc_data_from_rows(rows):
+    """
+    Organise les lignes SPARQL des données WLC.
+
+    Returns:
+        tuple: (données par GUID, liste des données par code Uniformat)
+    """
+    by_guid = {}
+    by_uniformat = {}
+    for row in rows:
+        uniformat_code = row.get('uniformatCode', '')
+        wlc_data = {
+            'construction_cost': _number(row.get('constructionCost')),
+            'operation_cost': _number(row.get('operationCost')),
+            'maintenance_cost': _number(row.get('maintenanceCost')),
+            'end_of_life_cost': _number(row.get('endOfLifeCost')),
+            'lifespan': _number(row.get('lifespan'), int),
+            'uniformat_code': uniformat_code,
+            'uniformat_desc': row.get('uniformatDesc', '')
+        }
+        if row.get('guid'):
+            by_guid[row['guid']] = wlc_data
+        if uniformat_code:
+            by_uniformat.setdefault(uniformat_code, []).append(wlc_data)
+    return by_guid, by_uniformat
+
+
+def uniformat_aggregates(by_uniformat):
+    """Moyennes WLC par code Uniformat (calculées une seule fois par groupe)"""
+    aggregates = {}
+    for code, group in by_uniformat.items():
+        if not group:
+            continue
+        count = len(group)
+        lifespans = [d['lifespan'] for d in group if d['lifespan'] > 0]
+        aggregates[code] = {
+            'construction_cost': sum(d['construction_cost'] for d in group) / count,
+            'operation_cost': sum(d['operation_cost'] for d in group) / count,
+            'maintenance_cost': sum(d['maintenance_cost'] for d in group) / count,
+            'end_of_life_cost': sum(d['end_of_life_cost'] for d in group) / count,
+            'lifespan': int(sum(lifespans) / len(lifespans)) if lifespans else 0,
+            'uniformat_code': code,
+            'uniformat_desc': group[0]['uniformat_desc']
+        }
+    return aggregates
+
+
+def wlc_property_values(wlc_data, prefix=''):
+    """Valeurs des propriétés WLC (tuple hachable : sert de clé de partage)"""
+    values = []
+    for key, name, ifc_type in WLC_PROPERTIES:
+        value = wlc_data[key]
+        if (ifc_type == 'IfcText' and value) or (ifc_type != 'IfcText' and value > 0):
+            values.append((prefix + name, ifc_type, value))
+    return tuple(values)
+
+
+def guess_uniformat_code(element):
+    """Groupe Uniformat déduit du type de l'élément, puis de son nom"""
+    code = UNIFORMAT_BY_IFC_TYPE.get(element.is_a().lower())
+    if code:
+        return code
+    name = (element.Name or '').lower()
+    for keywords, code in UNIFORMAT_BY_NAME_KEYWORDS:
+        if any(keyword in name for keyword in keywords):
+            return code
+    return None
+
+
+class SharedPropertySetWriter:
+    """
+    Regroupe les affectations de jeux de propriétés par valeur, puis crée
+    un IfcPropertySet et un IfcRelDefinesByProperties par valeur distincte.
+    """
+
+    def __init__(self, ifc_file, owner_history):
+        self.ifc_file = ifc_file
+        self.owner_history = owner_history
+        self._pending = {}  # (nom, description, valeurs) -> éléments
+
+    def assign(self, element, name, description, values):
+        self._pending.setdefault((name, description, values), []).append(element)
+
+    def _property(self, name, ifc_type, value):
+        return self.ifc_file.createIfcPropertySingleValue(
+            name, None, self.ifc_file.create_entity(ifc_type, value), None
+        )
+
+    def flush(self):
+        """Crée les jeux partagés ; retourne (jeux créés, éléments liés)"""
+        psets = 0
+        linked = 0
+        for (name, description, values), elements in self._pending.items():
+            check_cancelled()
+            property_set = self.ifc_file.createIfcPropertySet(
+                ifcopenshell.guid.new(), self.owner_history, name, description,
+                [self._property(*value) for value in values]
+            )
+            self.ifc_file.createIfcRelDefinesByProperties(
+                ifcopenshell.guid.new(), self.owner_history, None, None, elements, property_set
+            )
+            psets += 1
+            linked += len(elements)
+        self._pending.clear()
+        return psets, linked
+
+
+class IfcEnricher:
+    """Enrichissement d'un modèle IFC ouvert avec les données WLC"""
+
+    def __init__(self, ifc_file):
+        self.ifc_file = ifc_file
+        owner_histories = ifc_file.by_type('IfcOwnerHistory')
+        self.owner_history = owner_histories[0] if owner_histories else None
+        self.elements = ifc_file.by_type('IfcElement')
+        self.entity_by_guid = {element.GlobalId: element for element in self.elements}
+        self.groups = ifc_file.by_type('IfcGroup')
+        self.uniformat_by_element = {}
+        self.with_wlc_pset = set()
+        self._index_property_sets()
+        self.writer = SharedPropertySetWriter(ifc_file, self.owner_history)
+
+    def _index_property_sets(self):
+        """Un passage : code Uniformat par élément et éléments ayant déjà WLC_Data"""
+        for rel in self.ifc_file.by_type('IfcRelDefinesByProperties'):
+            pset = rel.RelatingPropertyDefinition
+            if isinstance(pset, (tuple, list)):
+                continue
+            related_ids = [obj.id() for obj in rel.RelatedObjects or ()]
+            if getattr(pset, 'Name', None) == WLC_PSET_NAME:
+                self.with_wlc_pset.update(related_ids)
+
+            code = None
+            for prop in getattr(pset, 'HasProperties', None) or ():
+                if prop.Name and 'uniformat' in prop.Name.lower():
+                    nominal = getattr(prop, 'NominalValue', None)
+                    if nominal is not None and hasattr(nominal, 'wrappedValue'):
+                        code = nominal.wrappedValue
+                        break
+            if code:
+                for entity_id in related_ids:
+                    self.uniformat_by_element.setdefault(entity_id, code)
+
+    def _assign_wlc(self, element, wlc_data, method, extra=(), description=WLC_PSET_DESCRIPTION):
+        """Affecte un jeu WLC_Data à un élément (une seule fois par élément)"""
+        if element.id() in self.with_wlc_pset:
+            return False
+        values = wlc_property_values(wlc_data) + ((('EnrichmentMethod', 'IfcText', method),) if method else ()) + extra
+        if not values:
+            return False
+        self.writer.assign(element, WLC_PSET_NAME, description, values)
+        self.with_wlc_pset.add(element.id())
+        return True
+
+    def _enrich_target_groups(self, by_guid, stats):
+        group_writer = SharedPropertySetWriter(self.ifc_file, self.owner_history)
+        for ifc_group in self.groups:
+            group_name = (ifc_group.Name or '').strip()
+            if group_name not in TARGET_GROUPS_BY_NAME:
+                continue
+            ontology_guid = TARGET_GROUPS_BY_NAME[group_name]
+            group_wlc_data = by_guid.get(ontology_guid)
+            print(f"🎯 Groupe cible trouvé par nom: '{group_name}' (GUID ontologie: {ontology_guid})")
+            if not group_wlc_data:
+                print(f"   ⚠️  Aucune donnée WLC trouvée pour le groupe '{group_name}'")
+                continue
+
+            # 1. Le groupe lui-même
+            group_values = wlc_property_values(group_wlc_data, prefix='Group') + (
+                ('EnrichmentMethod', 'IfcText', f"SpecialGroupMappingByName_{group_name}"),
+            )
+            group_writer.assign(ifc_group, WLC_GROUP_PSET_NAME,
+                                "Données WLC du groupe et propagation aux éléments", group_values)
+            stats['groups_enriched'] += 1
+
+            # 2. Propagation aux éléments du groupe (un seul jeu partagé par groupe)
+            extra = (('SourceGroupName', 'IfcText', group_name),)
+            members = [
+                obj for rel in getattr(ifc_group, 'IsGroupedBy', None) or ()
+                for obj in rel.RelatedObjects or () if hasattr(obj, 'GlobalId')
+            ]
+            for element in members:
+                if self._assign_wlc(element, group_wlc_data, f"PropagatedFromGroupByName_{group_name}", extra,
+                                    description="Données WLC propagées depuis le groupe parent"):
+                    stats['elements_enriched_from_groups'] += 1
+            print(f"   📦 Propagation des données à {len(members)} éléments du groupe")
+        group_writer.flush()
+
+    def enrich(self, wlc_rows):
+        """
+        Applique les données WLC au modèle.
+
+        Args:
+            wlc_rows: lignes SPARQL (guid, coûts, durée de vie, Uniformat)
+
+        Returns:
+            dict: compteurs d'enrichissement
+        """
+        by_guid, by_uniformat = wlc_data_from_rows(wlc_rows)
+        aggregates = uniformat_aggregates(by_uniformat)
+        print(f"📊 Données WLC organisées: {len(by_guid)} GUIDs, {len(aggregates)} groupes Uniformat")
+
+        stats = {
+            'groups_enriched': 0,
+            'elements_enriched_from_groups': 0,
+            'enriched_elements': 0,
+            'enriched_by_guid': 0,
+            'enriched_by_uniformat': 0
+        }
+
+        self._enrich_target_groups(by_guid, stats)
+
+        total = len(self.elements)
+        report_progress(processed=0, total=total, message='Enrichissement des éléments...')
+        for index, element in enumerate(self.elements):
+            if index % 1000 == 0:
+                check_cancelled()
+                report_progress(processed=index)
+
+            wlc_data = by_guid.get(element.GlobalId)
+            if wlc_data is not None:
+                method = "GUID"
+                stats['enriched_by_guid'] += 1
+            else:
+                code = self.uniformat_by_element.get(element.id()) or guess_uniformat_code(element)
+                wlc_data = aggregates.get(code) if code else None
+                if wlc_data is None:
+                    continue
+                method = f"Uniformat_{code}"
+                stats['enriched_by_uniformat'] += 1
+
+            if self._assign_wlc(element, wlc_data, method):
+                stats['enriched_elements'] += 1
+
+        report_progress(processed=total, message='Création des jeux de propriétés partagés...')
+        psets, linked = self.writer.flush()
+        stats['property_sets_created'] = psets
+        stats['total_enriched_elements'] = stats['enriched_elements'] + stats['elements_enriched_from_groups']
+        print(f"✅ Enrichissement: {linked} éléments liés à {psets} jeux de propriétés partagés")
+        return stats
@@ -0,0 +1,347 @@
+"""
+Extraction des propriétés des éléments IFC (Uniformat, matériau, classe)
+
+Les jeux de propriétés sont décodés une seule fois (PropertySetIndex),
+y compris ceux hérités des types, puis résolus par élément par simple
+recherche dans l'index.
+
+Pour les gros modèles, la liste des IDs des IfcElement est découpée en
+plages réparties sur un pool de processus : chaque worker ouvre le modèle
+une seule fois (initializer) puis retourne des enregistrements compacts
+(tuples) pour sa plage. En dessous de IFC_PARALLEL_MIN_ELEMENTS, ou si le
+pool échoue, l'extraction reste séquentielle sur le modèle déjà ouvert.
+"""
+
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import ifcopenshell
+
+from config import IFC_EXTRACTION_WORKERS, IFC_PARALLEL_MIN_ELEMENTS
+
+# Ordre des champs des enregistrements retournés par extract_elements
+ELEMENT_RECORD_FIELDS = ('guid', 'name', 'ifc_class', 'uniformat_code', 'uniformat_desc', 'material',
+                         'material_layers')
+
+# Nombre de plages par worker (équilibrage de charge)
+CHUNKS_PER_WORKER = 4
+
+
+def _property_text(prop):
+    """Valeur textuelle d'une IfcPropertySingleValue (None si absente)"""
+    value = getattr(prop, 'NominalValue', None)
+    if value is None:
+        return None
+    return str(value.wrappedValue)
+
+
+def decode_property_set(pset):
+    """
+    Retourne (uniformat_code, uniformat_desc, material) décodés d'un jeu de propriétés.
+    Les noms de propriétés sont mis en minuscules une seule fois par jeu.
+    """
+    uniformat_code = None
+    uniformat_desc = None
+    material = None
+    for prop in getattr(pset, 'HasProperties', None) or ():
+        pname = (prop.Name or '').lower()
+        if "uniformat" in pname and "number" in pname:
+            uniformat_code = _property_text(prop)
+        if "uniformat" in pname and ("description" in pname or "desc" in pname):
+            uniformat_desc = _property_text(prop)
+        if pname == "material" or pname.endswith(" material") or pname.startswith("material "):
+            material = _property_text(prop) or material
+    return uniformat_code, uniformat_desc, material
+
+
+def _merge_values(values_list):
+    """Fusionne plusieurs triplets : la dernière valeur non vide l'emporte"""
+    merged = [None, None, None]
+    for values in values_list:
+        for i, value in enumerate(values):
+            if value:
+                merged[i] = value
+    return tuple(merged)
+
+
+_NO_VALUES = (None, None, None)
+
+
+class PropertySetIndex:
+    """
+    Index inverse des jeux de propriétés, construit en un seul passage.
+
+    - IfcRelDefinesByProperties : chaque jeu est décodé une seule fois,
+      puis associé aux éléments liés
+    - IfcRelDefinesByType : les jeux du type (HasPropertySets) sont hérités
+      par les occurrences, les valeurs de l'occurrence restant prioritaires
+    """
+
+    def __init__(self, model):
+        self._decoded = {}    # id du jeu -> triplet décodé
+        self._instance = {}   # id de l'élément -> triplets des jeux de l'occurrence
+        self._type = {}       # id de l'élément -> triplet hérité du type
+
+        for rel in model.by_type('IfcRelDefinesByProperties'):
+            values = self._decode_definition(rel.RelatingPropertyDefinition)
+            if values == _NO_VALUES:
+                continue
+            for obj in rel.RelatedObjects or ():
+                self._instance.setdefault(obj.id(), []).append(values)
+
+        for rel in model.by_type('IfcRelDefinesByType'):
+            type_obj = rel.RelatingType
+            values = _merge_values(self._decode(pset) for pset in (getattr(type_obj, 'HasPropertySets', None) or ()))
+            if values == _NO_VALUES:
+                continue
+            for obj in rel.RelatedObjects or ():
+                self._type[obj.id()] = values
+
+    def _decode(self, pset):
+        key = pset.id()
+        values = self._decoded.get(key)
+        if values is None:
+            values = decode_property_set(pset)
+            self._decoded[key] = values
+        return values
+
+    def _decode_definition(self, definition):
+        # IFC4 : la définition peut être un ensemble de jeux (IfcPropertySetDefinitionSet)
+        if isinstance(definition, (tuple, list)):
+            return _merge_values(self._decode(pset) for pset in definition)
+        return self._decode(definition)
+
+    def lookup(self, elem):
+        """Retourne (uniformat_code, uniformat_desc, material) de l'élément"""
+        entity_id = elem.id()
+        instance_values = self._instance.get(entity_id)
+        type_values = self._type.get(entity_id, _NO_VALUES)
+        if not instance_values:
+            return type_values
+        return _merge_values([type_values] + instance_values)
+
+    def __len__(self):
+        return len(self._decoded)
+
+
+def _intern(value):
+    return sys.intern(str(value)) if value else ''
+
+
+def _material_name(material):
+    name = getattr(material, 'Name', None) if material is not None else None
+    return _intern(str(name).strip()) if name else ''
+
+
+def _number(value):
+    return float(value) if value is not None else None
+
+
+class MaterialResolver:
+    """
+    Résolution mémorisée des matériaux associés (IfcRelAssociatesMaterial).
+
+    Chaque définition de matériau (IfcMaterial, IfcMaterialLayerSet[Usage],
+    IfcMaterialConstituentSet, IfcMaterialProfileSet[Usage], IfcMaterialList)
+    est décodée une seule fois par ID d'entité en un enregistrement compact :
+        (nom affiché, ((matériau, épaisseur, fraction), ...))
+    Les chaînes et les couches identiques sont partagées (internées) : le coût
+    est proportionnel au nombre de matériaux distincts, pas d'éléments.
+    """
+
+    def __init__(self):
+        self._by_id = {}
+        self._layers = {}
+
+    def _shared_layer(self, material, thickness=None, fraction=None):
+        layer = (material, thickness, fraction)
+        return self._layers.setdefault(layer, layer)
+
+    def _decode(self, definition):
+        if definition.is_a('IfcMaterialLayerSetUsage'):
+            return self.resolve(definition.ForLayerSet)
+
+        if definition.is_a('IfcMaterialLayerSet'):
+            layers = tuple(
+                self._shared_layer(_material_name(layer.Material), _number(layer.LayerThickness))
+                for layer in definition.MaterialLayers or ()
+            )
+            total = sum(layer[1] or 0 for layer in layers)
+            if total > 0:
+                layers = tuple(self._shared_layer(m, t, round((t or 0) / total, 4)) for m, t, _ in layers)
+            name = _intern(getattr(definition, 'LayerSetName', None))
+            return name, layers
+
+        if definition.is_a('IfcMaterialConstituentSet'):
+            layers = tuple(
+                self._shared_layer(_material_name(c.Material) or _intern(c.Name), None, _number(c.Fraction))
+                for c in definition.MaterialConstituents or ()
+            )
+            return _intern(definition.Name), layers
+
+        if definition.is_a('IfcMaterialProfileSetUsage'):
+            return self.resolve(definition.ForProfileSet)
+
+        if definition.is_a('IfcMaterialProfileSet'):
+            layers = tuple(
+                self._shared_layer(_material_name(p.Material) or _intern(p.Name))
+                for p in definition.MaterialProfiles or ()
+            )
+            return _intern(definition.Name), layers
+
+        if definition.is_a('IfcMaterialList'):
+            layers = tuple(self._shared_layer(_material_name(m)) for m in definition.Materials or ())
+            return '', layers
+
+        # IfcMaterial et autres définitions nommées
+        return _material_name(definition), ()
+
+    def resolve(self, definition):
+        """Retourne (nom affiché, couches) d'une définition de matériau, mémorisé par ID"""
+        if definition is None:
+            return '', ()
+        key = definition.id()
+        record = self._by_id.get(key)
+        if record is None:
+            name, layers = self._decode(definition)
+            if not name and layers:
+                # Pas de nom propre : composition des matériaux des couches
+                name = _intern(' / '.join(dict.fromkeys(layer[0] for layer in layers if layer[0])))
+            record = (name, layers)
+            self._by_id[key] = record
+        return record
+
+    def for_element(self, elem):
+        """Matériau de l'élément (premier IfcRelAssociatesMaterial non vide)"""
+        for assoc in getattr(elem, 'HasAssociations', None) or ():
+            if assoc.is_a("IfcRelAssociatesMaterial"):
+                record = self.resolve(assoc.RelatingMaterial)
+                if record[0] or record[1]:
+                    return record
+        return '', ()
+
+    def __len__(self):
+        return len(self._by_id)
+
+
+def extract_element_record(elem, pset_index, material_resolver):
+    """Enregistrement compact d'un élément (voir ELEMENT_RECORD_FIELDS)"""
+    uniformat_code, uniformat_desc, pset_material = pset_index.lookup(elem)
+    material, layers = material_resolver.for_element(elem)
+    return (
+        elem.GlobalId,
+        elem.Name or '',
+        elem.is_a(),
+        uniformat_code or '',
+        uniformat_desc or '',
+        material or pset_material or '',
+        layers
+    )
+
+
+# Modèle, index des jeux de propriétés et résolveur de matériaux : un seul par processus worker
+_worker_model = None
+_worker_psets = None
+_worker_materials = None
+
+
+def _init_worker(path):
+    global _worker_model, _worker_psets, _worker_materials
+    _worker_model = ifcopenshell.open(path)
+    _worker_psets = PropertySetIndex(_worker_model)
+    _worker_materials = MaterialResolver()
+
+
+def _extract_id_range(ids):
+    return [
+        extract_element_record(_worker_model.by_id(entity_id), _worker_psets, _worker_materials)
+        for entity_id in ids
+    ]
+
+
+def _split(ids, parts):
+    """Découpe la liste d'IDs en plages contiguës de tailles proches"""
+    size = max(1, -(-len(ids) // parts))
+    return [ids[i:i + size] for i in range(0, len(ids), size)]
+
+
+def _iter_serial(model, elements, batch_size):
+    pset_index = PropertySetIndex(model)
+    material_resolver = MaterialResolver()
+    batch = []
+    for elem in elements:
+        batch.append(extract_element_record(elem, pset_index, material_resolver))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _iter_parallel(elements, path, workers, batch_size):
+    ids = [elem.id() for elem in elements]
+    ranges = _split(ids, workers * CHUNKS_PER_WORKER)
+    print(f"⚙️ Extraction parallèle: {len(ids)} éléments, {len(ranges)} plages, {workers} processus")
+
+    # "spawn" : pas de fork d'un serveur Flask multi-thread
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_worker,
+        initargs=(path,)
+    ) as pool:
+        for part in pool.map(_extract_id_range, ranges):
+            for i in range(0, len(part), batch_size):
+                yield part[i:i + batch_size]
+
+
+def iter_element_batches(model, path=None, workers=None, min_parallel=None, batch_size=1000):
+    """
+    Extrait les enregistrements de tous les IfcElement, par lots, au fil de l'eau.
+
+    Les lots sont produits dès qu'ils sont prêts (dans l'ordre du modèle) :
+    le consommateur peut les écrire pendant que l'extraction continue.
+
+    Args:
+        model: modèle ifcopenshell déjà ouvert (extraction séquentielle et liste des IDs)
+        path (str, optional): chemin du fichier, requis pour l'extraction parallèle
+        workers (int, optional): nombre de processus (défaut: IFC_EXTRACTION_WORKERS)
+        min_parallel (int, optional): nombre d'éléments à partir duquel paralléliser
+        batch_size (int): nombre maximal d'enregistrements par lot
+
+    Yields:
+        list[tuple]: lot d'enregistrements (voir ELEMENT_RECORD_FIELDS)
+    """
+    workers = workers or IFC_EXTRACTION_WORKERS or os.cpu_count() or 1
+    min_parallel = IFC_PARALLEL_MIN_ELEMENTS if min_parallel is None else min_parallel
+    elements = model.by_type('IfcElement')
+
+    if not path or workers <= 1 or len(elements) < min_parallel:
+        yield from _iter_serial(model, elements, batch_size)
+        return
+
+    produced = 0
+    try:
+        for batch in _iter_parallel(elements, path, workers, batch_size):
+            produced += len(batch)
+            yield batch
+    except Exception as e:
+        if produced:
+            raise
+        print(f"⚠️ Extraction parallèle impossible ({e}), repli séquentiel")
+        yield from _iter_serial(model, elements, batch_size)
+
+
+def extract_elements(model, path=None, workers=None, min_parallel=None):
+    """
+    Extrait les enregistrements de tous les IfcElement du modèle.
+
+    Returns:
+        list[tuple]: un enregistrement par élément, dans l'ordre du modèle
+    """
+    records = []
+    for batch in iter_element_batches(model, path, workers, min_parallel):
+        records.extend(batch)
+    return records
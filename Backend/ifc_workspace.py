@@ -0,0 +1,70 @@
+"""
+Espace de travail disque des fichiers IFC importés
+
+Le fichier uploadé est écrit une seule fois sur disque, par blocs, avec
+calcul de l'empreinte SHA-256 au fil de l'eau : il n'est jamais chargé
+entièrement en mémoire. ifcopenshell l'ouvre ensuite directement depuis
+son chemin. Le fichier d'origine n'est jamais modifié : les fichiers
+enrichis sont écrits dans un cache séparé (voir enriched_cache) puis
+servis tels quels (send_file).
+"""
+
+import hashlib
+import os
+import uuid
+
+from werkzeug.utils import secure_filename
+
+from config import IFC_WORKSPACE_DIR
+
+CHUNK_SIZE = 1024 * 1024  # 1 Mo
+
+
+def file_hash(path):
+    """Empreinte SHA-256 d'un fichier, lu par blocs"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def workspace_path(filename, suffix=''):
+    """Chemin unique dans l'espace de travail pour un nom de fichier donné"""
+    stem, ext = os.path.splitext(secure_filename(filename) or 'model.ifc')
+    return os.path.join(IFC_WORKSPACE_DIR, f"{stem}_{uuid.uuid4().hex[:8]}{suffix}{ext or '.ifc'}")
+
+
+def save_upload_stream(stream, filename):
+    """
+    Écrit un flux d'upload dans l'espace de travail, par blocs.
+
+    Args:
+        stream: objet fichier (ex. werkzeug FileStorage.stream)
+        filename (str): nom d'origine du fichier
+
+    Returns:
+        tuple: (chemin, empreinte SHA-256, taille en octets)
+    """
+    path = workspace_path(filename)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(path, 'wb') as out:
+            for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+                digest.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+    except Exception:
+        remove_file(path)
+        raise
+    return path, digest.hexdigest(), size
+
+
+def remove_file(path):
+    """Supprime un fichier de l'espace de travail s'il existe"""
+    if path and os.path.exists(path):
+        try:
+            os.unlink(path)
+        except OSError as e:
+            print(f"⚠️ Impossible de supprimer {path}: {e}")
@@ -0,0 +1,160 @@
+"""
+Pipeline d'ingestion producteur/consommateurs vers GraphDB
+
+L'extraction IFC (CPU) produit des lots d'éléments dans une file bornée ;
+plusieurs threads d'écriture (I/O) les vident en parallèle vers GraphDB.
+Les deux étapes se recouvrent : la durée totale tend vers celle de la plus
+lente des deux au lieu de leur somme.
+
+- file bornée (INGEST_QUEUE_BATCHES lots) : si GraphDB ralentit,
+  l'extraction attend (contre-pression) au lieu d'accumuler en mémoire
+- concurrence d'écriture bornée (INGEST_WRITERS requêtes simultanées)
+- la première erreur d'écriture arrête le pipeline et est relevée par run()
+"""
+
+import queue
+import threading
+import time
+
+from config import INGEST_WRITERS, INGEST_QUEUE_BATCHES
+from jobs import check_cancelled, current_job
+from project_graphs import current_project_id, use_project
+
+_STOP = object()
+PUT_TIMEOUT = 0.5
+
+
+class IngestPipeline:
+    """
+    Relie un producteur de lots à un pool de threads d'écriture.
+
+    Args:
+        writer (callable): écrit un lot (lève une exception en cas d'échec)
+        workers (int): nombre de threads d'écriture
+        queue_batches (int): nombre maximal de lots en attente d'écriture
+    """
+
+    def __init__(self, writer, workers=INGEST_WRITERS, queue_batches=INGEST_QUEUE_BATCHES):
+        self.writer = writer
+        self.workers = max(1, workers)
+        self._queue = queue.Queue(maxsize=max(1, queue_batches))
+        self._lock = threading.Lock()
+        self._failed = threading.Event()
+        self.error = None
+        self._job = None
+        self.batches_written = 0
+        self.items_written = 0
+        self.write_seconds = 0.0
+        self.wait_seconds = 0.0
+
+    def _write_loop(self, project_id):
+        # Les threads d'écriture n'ont pas de contexte de requête : projet transmis explicitement
+        with use_project(project_id):
+            self._write_batches()
+
+    def _write_batches(self):
+        while True:
+            batch = self._queue.get()
+            try:
+                if batch is _STOP:
+                    return
+                if self._failed.is_set():
+                    continue
+                started = time.time()
+                self.writer(batch)
+                with self._lock:
+                    self.batches_written += 1
+                    self.items_written += len(batch)
+                    self.write_seconds += time.time() - started
+                    if self._job is not None:
+                        self._job.update(chunks_flushed=self.batches_written)
+            except Exception as e:
+                with self._lock:
+                    if self.error is None:
+                        self.error = e
+                self._failed.set()
+            finally:
+                self._queue.task_done()
+
+    def _put(self, batch):
+        """Ajoute un lot, en attendant de la place (contre-pression)"""
+        started = time.time()
+        while not self._failed.is_set():
+            try:
+                self._queue.put(batch, timeout=PUT_TIMEOUT)
+                break
+            except queue.Full:
+                check_cancelled()
+        self.wait_seconds += time.time() - started
+
+    def run(self, batches, on_batch=None):
+        """
+        Consomme le producteur et attend la fin de toutes les écritures.
+
+        Args:
+            batches: itérable de lots (listes) produits au fil de l'extraction
+            on_batch (callable, optional): appelé sur chaque lot côté producteur
+
+        Returns:
+            dict: statistiques (lots, éléments, temps d'écriture et d'attente)
+        """
+        started = time.time()
+        project_id = current_project_id()
+        # La tâche courante est propre au thread producteur : transmise aux threads
+        # d'écriture pour qu'ils signalent les lots écrits
+        self._job = current_job()
+        threads = [
+            threading.Thread(target=self._write_loop, args=(project_id,), name=f'wlc-ingest-{i}', daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in threads:
+            thread.start()
+
+        produced = 0
+        try:
+            for batch in batches:
+                check_cancelled()
+                if self._failed.is_set():
+                    break
+                if not batch:
+                    continue
+                if on_batch is not None:
+                    on_batch(batch)
+                self._put(batch)
+                produced += len(batch)
+        except BaseException:
+            # Annulation ou erreur d'extraction : les lots en attente sont abandonnés
+            self._drain()
+            raise
+        finally:
+            if self._failed.is_set():
+                self._drain()
+            else:
+                self._queue.join()
+            for _ in threads:
+                self._queue.put(_STOP)
+            for thread in threads:
+                thread.join()
+
+        if self.error is not None:
+            raise self.error
+
+        return {
+            'items_produced': produced,
+            'items_written': self.items_written,
+            'batches_written': self.batches_written,
+            'writers': self.workers,
+            'write_seconds': round(self.write_seconds, 3),
+            'producer_wait_seconds': round(self.wait_seconds, 3),
+            'total_seconds': round(time.time() - started, 3)
+        }
+
+    def _drain(self):
+        """Abandonne les lots en attente (échec ou annulation)"""
+        self._failed.set()
+        while True:
+            try:
+                self._queue.get_nowait()
+                self._queue.task_done()
+            except queue.Empty:
+                return
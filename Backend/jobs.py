@@ -0,0 +1,291 @@
+"""
+Tâches de fond pour les traitements IFC longs (parsing, groupes, enrichissement)
+
+Une tâche est soumise à un pool de threads borné : la requête HTTP retourne
+immédiatement un identifiant, puis le client interroge la progression
+(GET /jobs/<id>) ou s'y abonne (GET /jobs/<id>/events, Server-Sent Events).
+
+Routes :
+    GET    /jobs                liste des tâches récentes
+    GET    /jobs/<id>           état, progression, ETA, résultat
+    GET    /jobs/<id>/events    flux SSE de progression jusqu'à la fin de la tâche
+    DELETE /jobs/<id>           demande d'annulation
+
+Le traitement signale sa progression via report_progress() et vérifie
+l'annulation via check_cancelled() : ces fonctions sont sans effet hors
+d'une tâche, le même code sert donc en mode synchrone et asynchrone.
+
+Les tâches sont conservées en mémoire dans le processus qui les exécute :
+avec plusieurs workers (gunicorn -w N), GET /jobs/<id> répond 404 depuis
+un autre worker. Déployer les tâches de fond avec un seul worker et
+plusieurs threads (gunicorn -w 1 --threads N), ou avec une affinité de
+session vers le worker qui a soumis la tâche.
+"""
+
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from flask import Response, jsonify
+
+from config import JOB_WORKERS, JOB_QUEUE_MAX, JOB_HISTORY_SIZE
+
+FINISHED_STATUSES = ('done', 'error', 'cancelled')
+
+
+class JobCancelled(BaseException):
+    """
+    Levée par check_cancelled() dans une tâche annulée.
+    Hérite de BaseException pour traverser les « except Exception » des routes.
+    """
+
+
+class JobQueueFull(Exception):
+    """Trop de tâches en attente : la soumission est refusée"""
+
+
+class Job:
+    """État d'une tâche et de sa progression"""
+
+    def __init__(self, kind, description=''):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.description = description
+        self.status = 'queued'
+        self.created_at = datetime.now().isoformat()
+        self.started = None
+        self.finished = None
+        self.processed = 0
+        self.total = None
+        self.chunks_flushed = 0
+        self.message = ''
+        self.result = None
+        self.error = None
+        self._cancel = threading.Event()
+        self._changed = threading.Condition()
+        self._revision = 0
+
+    def update(self, processed=None, total=None, chunks_flushed=None, message=None):
+        """Met à jour la progression (seuls les champs fournis changent)"""
+        with self._changed:
+            if processed is not None:
+                self.processed = processed
+            if total is not None:
+                self.total = total
+            if chunks_flushed is not None:
+                self.chunks_flushed = chunks_flushed
+            if message is not None:
+                self.message = message
+            self._touch()
+
+    def _touch(self):
+        self._revision += 1
+        self._changed.notify_all()
+
+    def _set_status(self, status, **fields):
+        with self._changed:
+            self.status = status
+            for key, value in fields.items():
+                setattr(self, key, value)
+            if status == 'running':
+                self.started = time.time()
+            if status in FINISHED_STATUSES:
+                self.finished = time.time()
+            self._touch()
+
+    def cancel(self):
+        """Demande l'annulation (immédiate si la tâche n'a pas démarré)"""
+        self._cancel.set()
+        if self.status == 'queued':
+            self._set_status('cancelled', message='Annulée avant démarrage')
+
+    @property
+    def cancel_requested(self):
+        return self._cancel.is_set()
+
+    def wait_for_change(self, revision, timeout):
+        """Attend une nouvelle révision de l'état ; retourne la révision courante"""
+        with self._changed:
+            if self._revision == revision and self.status not in FINISHED_STATUSES:
+                self._changed.wait(timeout)
+            return self._revision
+
+    @property
+    def elapsed_seconds(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+    @property
+    def eta_seconds(self):
+        """Temps restant estimé au rythme observé (None si inconnu)"""
+        if self.status != 'running' or not self.total or not self.processed:
+            return None
+        rate = self.processed / max(self.elapsed_seconds, 1e-6)
+        return round(max(self.total - self.processed, 0) / rate, 1)
+
+    def to_dict(self, include_result=True):
+        data = {
+            'job_id': self.id,
+            'kind': self.kind,
+            'description': self.description,
+            'status': self.status,
+            'created_at': self.created_at,
+            'processed': self.processed,
+            'total': self.total,
+            'progress': round(self.processed / self.total * 100, 1) if self.total else None,
+            'chunks_flushed': self.chunks_flushed,
+            'message': self.message,
+            'elapsed_seconds': round(self.elapsed_seconds, 1),
+            'eta_seconds': self.eta_seconds,
+            'cancel_requested': self.cancel_requested,
+            'error': self.error
+        }
+        if include_result:
+            data['result'] = self.result
+        return data
+
+
+# Tâche en cours d'exécution dans le thread courant
+_local = threading.local()
+
+
+def current_job():
+    """Tâche exécutée par le thread courant (None en mode synchrone)"""
+    return getattr(_local, 'job', None)
+
+
+def report_progress(processed=None, total=None, chunks_flushed=None, message=None):
+    """Signale la progression de la tâche courante (sans effet hors tâche)"""
+    job = current_job()
+    if job is not None:
+        job.update(processed, total, chunks_flushed, message)
+
+
+def check_cancelled():
+    """Lève JobCancelled si l'annulation de la tâche courante a été demandée"""
+    job = current_job()
+    if job is not None and job.cancel_requested:
+        raise JobCancelled()
+
+
+class JobManager:
+    """Pool borné de tâches de fond avec historique des tâches récentes"""
+
+    def __init__(self, max_workers=JOB_WORKERS, max_queued=JOB_QUEUE_MAX, history_size=JOB_HISTORY_SIZE):
+        self.max_queued = max_queued
+        self.history_size = history_size
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='wlc-job')
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _pending(self):
+        return sum(1 for job in self._jobs.values() if job.status == 'queued')
+
+    def _prune(self):
+        """Oublie les plus anciennes tâches terminées au-delà de l'historique"""
+        finished = [job_id for job_id, job in self._jobs.items() if job.status in FINISHED_STATUSES]
+        for job_id in finished[:max(0, len(finished) - self.history_size)]:
+            del self._jobs[job_id]
+
+    def submit(self, kind, fn, *args, description='', **kwargs):
+        """
+        Soumet fn(*args, **kwargs) au pool.
+
+        Returns:
+            Job: la tâche créée
+
+        Raises:
+            JobQueueFull: si max_queued tâches attendent déjà
+        """
+        with self._lock:
+            if self._pending() >= self.max_queued:
+                raise JobQueueFull(f'{self.max_queued} tâches déjà en attente')
+            job = Job(kind, description)
+            self._jobs[job.id] = job
+            self._prune()
+
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        print(f"🧵 Tâche {job.kind} soumise ({job.id[:8]})")
+        return job
+
+    def _run(self, job, fn, args, kwargs):
+        if job.cancel_requested:
+            return
+        job._set_status('running')
+        _local.job = job
+        try:
+            result = fn(*args, **kwargs)
+            job._set_status('done', result=result)
+            print(f"✅ Tâche {job.kind} terminée ({job.id[:8]}, {job.elapsed_seconds:.1f}s)")
+        except JobCancelled:
+            job._set_status('cancelled', message='Annulée')
+            print(f"⏹️ Tâche {job.kind} annulée ({job.id[:8]})")
+        except Exception as e:
+            job._set_status('error', error=str(e))
+            print(f"❌ Tâche {job.kind} en erreur ({job.id[:8]}): {e}")
+        finally:
+            _local.job = None
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self):
+        with self._lock:
+            return list(self._jobs.values())
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is not None and job.status not in FINISHED_STATUSES:
+            job.cancel()
+        return job
+
+
+# Instance partagée par l'application
+job_manager = JobManager()
+
+
+def register_job_routes(app, manager=job_manager):
+    """Enregistre les routes de suivi des tâches de fond"""
+
+    @app.route('/jobs', methods=['GET'])
+    def list_jobs():
+        jobs = [job.to_dict(include_result=False) for job in reversed(manager.list())]
+        return jsonify({'jobs': jobs, 'count': len(jobs)})
+
+    @app.route('/jobs/<job_id>', methods=['GET'])
+    def get_job(job_id):
+        job = manager.get(job_id)
+        if job is None:
+            return jsonify({'error': 'Tâche introuvable'}), 404
+        return jsonify(job.to_dict())
+
+    @app.route('/jobs/<job_id>', methods=['DELETE'])
+    def cancel_job(job_id):
+        job = manager.cancel(job_id)
+        if job is None:
+            return jsonify({'error': 'Tâche introuvable'}), 404
+        return jsonify(job.to_dict(include_result=False))
+
+    @app.route('/jobs/<job_id>/events', methods=['GET'])
+    def job_events(job_id):
+        """Flux SSE : un événement à chaque changement, le dernier contient le résultat"""
+        job = manager.get(job_id)
+        if job is None:
+            return jsonify({'error': 'Tâche introuvable'}), 404
+
+        def stream():
+            revision = -1
+            while True:
+                revision = job.wait_for_change(revision, timeout=15)
+                finished = job.status in FINISHED_STATUSES
+                yield f"data: {json.dumps(job.to_dict(include_result=finished))}\n\n"
+                if finished:
+                    break
+
+        return Response(stream(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
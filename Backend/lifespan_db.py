@@ -0,0 +1,356 @@
+"""
+Base de référence des durées de vie (bdd_lifespan)
+
+Une entrée associe une durée de vie (années) à un code Uniformat, une
+classe IFC et un matériau ; chacune de ces clés peut être vide (joker).
+La base est chargée depuis un fichier Excel / CSV, enregistrée en JSON
+(LIFESPAN_DB_PATH) et partagée par tous les processus (rechargée si le
+fichier a changé).
+
+Recherche de la meilleure correspondance pour un élément :
+- trie sur le code Uniformat : le préfixe le plus long ayant des entrées
+  l'emporte (B2010 > B20 > B > entrées sans code)
+- à profondeur égale : classe IFC et matériau exacts > classe seule >
+  matériau seul > aucune des deux (recherche O(1) par nœud)
+
+POST /autofill-lifespan applique la base à tous les éléments du projet en
+une lecture et une seule mise à jour par lots (set_element_durations).
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+from flask import jsonify, request
+from werkzeug.utils import secure_filename
+
+from config import LIFESPAN_DB_PATH
+from sparql_client import query_graphdb, set_element_durations
+from uniformat_importer import iter_cost_chunks
+import year_links
+
+LIFESPAN_COLUMN_KEYWORDS = {
+    'uniformat': ('uniformat', 'code'),
+    'ifc_class': ('ifc', 'classe', 'class'),
+    'material': ('matériau', 'materiau', 'material', 'matiere', 'matière'),
+    'lifespan': ('durée', 'duree', 'lifespan', 'life', 'vie', 'dvt')
+}
+
+
+def normalise_key(value):
+    return str(value or '').strip().lower()
+
+
+def normalise_code(value):
+    return str(value or '').strip().upper().replace(' ', '')
+
+
+def ifc_class_key(value):
+    """Nom de classe IFC normalisé (fragment d'IRI accepté)"""
+    return normalise_key(str(value or '').rsplit('#', 1)[-1])
+
+
+class _TrieNode:
+    __slots__ = ('children', 'entries')
+
+    def __init__(self):
+        self.children = {}
+        self.entries = {}  # (classe IFC, matériau) -> durée de vie
+
+
+class LifespanIndex:
+    """Index de recherche (trie Uniformat) construit à partir des entrées"""
+
+    def __init__(self, entries):
+        self.root = _TrieNode()
+        for entry in entries:
+            node = self.root
+            for char in normalise_code(entry.get('uniformat')):
+                node = node.children.setdefault(char, _TrieNode())
+            key = (ifc_class_key(entry.get('ifc_class')), normalise_key(entry.get('material')))
+            node.entries[key] = entry['lifespan']
+
+    def lookup(self, uniformat=None, ifc_class=None, material=None):
+        """
+        Meilleure durée de vie pour un élément.
+
+        Returns:
+            tuple | None: (durée de vie, longueur du préfixe Uniformat retenu,
+                           clé (classe, matériau) retenue)
+        """
+        ifc_class = ifc_class_key(ifc_class)
+        material = normalise_key(material)
+        candidates = [(ifc_class, material), (ifc_class, ''), ('', material), ('', '')]
+
+        path = [self.root]
+        node = self.root
+        for char in normalise_code(uniformat):
+            node = node.children.get(char)
+            if node is None:
+                break
+            path.append(node)
+
+        for depth in range(len(path) - 1, -1, -1):
+            entries = path[depth].entries
+            if not entries:
+                continue
+            for key in candidates:
+                if key in entries:
+                    return entries[key], depth, key
+        return None
+
+
+class LifespanDatabase:
+    """Base persistante (JSON, écriture atomique) et index associé"""
+
+    def __init__(self, path=LIFESPAN_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._mtime = None
+        self.entries = []
+        self.filename = None
+        self.updated_at = None
+        self.index = LifespanIndex([])
+
+    def _refresh(self):
+        """Recharge le fichier s'il a été modifié (autre processus)"""
+        mtime = os.path.getmtime(self.path) if os.path.exists(self.path) else None
+        if mtime == self._mtime:
+            return
+        data = {}
+        if mtime is not None:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        self.entries = data.get('entries', [])
+        self.filename = data.get('filename')
+        self.updated_at = data.get('updated_at')
+        self.index = LifespanIndex(self.entries)
+        self._mtime = mtime
+
+    def _write(self, data):
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+    def info(self):
+        with self._lock:
+            self._refresh()
+            return {'filename': self.filename, 'count': len(self.entries), 'updated_at': self.updated_at}
+
+    def replace(self, entries, filename):
+        with self._lock:
+            self._write({
+                'filename': filename,
+                'updated_at': datetime.now().isoformat(),
+                'entries': entries
+            })
+            self._mtime = None
+            self._refresh()
+
+    def clear(self):
+        with self._lock:
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+            self._refresh()
+
+    def snapshot(self):
+        """Index courant (immuable) pour une série de recherches"""
+        with self._lock:
+            self._refresh()
+            return self.index
+
+
+def _find_columns(columns):
+    found = {}
+    for field, keywords in LIFESPAN_COLUMN_KEYWORDS.items():
+        found[field] = next(
+            (c for c in columns if c not in found.values() and any(w in str(c).lower() for w in keywords)),
+            None
+        )
+    return found
+
+
+def read_lifespan_table(path):
+    """
+    Lit un fichier Excel / CSV de durées de vie (en flux, normalisation vectorisée).
+
+    Returns:
+        tuple: (entrées, nombre de lignes invalides)
+    """
+    entries = {}
+    invalid = 0
+    columns = None
+    for chunk in iter_cost_chunks(path):
+        if columns is None:
+            columns = _find_columns(chunk.columns)
+            if columns['lifespan'] is None or not any(columns[k] for k in ('uniformat', 'ifc_class', 'material')):
+                raise ValueError(f"Colonnes durée de vie et Uniformat / classe IFC / matériau non trouvées "
+                                 f"({chunk.columns.tolist()})")
+
+        keys = {}
+        for field in ('uniformat', 'ifc_class', 'material'):
+            col = columns[field]
+            values = chunk[col].fillna('').astype(str).str.strip() if col else None
+            keys[field] = values.where(~values.str.lower().isin(['nan', 'none']), '') if col else None
+        lifespans = (
+            chunk[columns['lifespan']].fillna('').astype(str)
+            .str.replace(',', '.', regex=False)
+            .str.extract(r'(\d+(?:\.\d+)?)', expand=False)
+            .astype(float)
+        )
+        valid = np.isfinite(lifespans) & (lifespans > 0)
+        invalid += int((~valid).sum())
+
+        for i in np.flatnonzero(valid.to_numpy()):
+            entry = {field: (keys[field].iat[i] if keys[field] is not None else '') for field in keys}
+            entry['lifespan'] = int(round(lifespans.iat[i]))
+            dedup_key = (normalise_code(entry['uniformat']), ifc_class_key(entry['ifc_class']),
+                         normalise_key(entry['material']))
+            entries[dedup_key] = entry  # la dernière ligne l'emporte
+    return list(entries.values()), invalid
+
+
+def load_project_elements():
+    """Éléments du projet avec les clés de recherche et leur durée de vie actuelle (une requête)"""
+    return query_graphdb("""
+    PREFIX wlc: <http://www.semanticweb.org/adamy/ontologies/2025/WLCONTO#>
+    SELECT ?elem (SAMPLE(?uniformat_) AS ?uniformat) (SAMPLE(?ifcClass_) AS ?ifcClass)
+           (SAMPLE(?material_) AS ?material) (SAMPLE(?duration_) AS ?duration)
+    WHERE {
+      ?elem a wlc:Element .
+      OPTIONAL { ?elem wlc:hasUniformatCode ?uniformat_ . }
+      OPTIONAL { ?elem wlc:hasIfcClass ?ifcClass_ . }
+      OPTIONAL { ?elem wlc:hasIfcMaterial ?material_ . }
+      OPTIONAL { ?elem wlc:hasDuration ?duration_ . }
+    }
+    GROUP BY ?elem
+    """)
+
+
+def apply_lifespans(overwrite=False):
+    """
+    Attribue à chaque élément la durée de vie de sa meilleure correspondance.
+
+    Args:
+        overwrite (bool): remplacer aussi les durées de vie déjà renseignées
+
+    Returns:
+        dict: compteurs (éléments, mis à jour, inchangés, conservés, sans correspondance)
+    """
+    started = time.time()
+    index = lifespan_db.snapshot()
+    elements = load_project_elements()
+
+    rows = []
+    unmatched = kept = unchanged = 0
+    for element in elements:
+        current = element.get('duration')
+        if current and not overwrite:
+            kept += 1
+            continue
+        match = index.lookup(element.get('uniformat'), element.get('ifcClass'), element.get('material'))
+        if match is None:
+            unmatched += 1
+            continue
+        lifespan = match[0]
+        if current and str(current) == str(lifespan):
+            unchanged += 1
+            continue
+        rows.append((element['elem'], lifespan))
+
+    set_element_durations(rows)
+    if rows:
+        # Les remplacements (maintenance) dépendent des durées de vie ; une erreur n'annule pas la mise à jour
+        try:
+            year_links.relink_costs_to_years(elements=[uri for uri, _ in rows])
+        except Exception as e:
+            print(f"⚠️ Erreur lors de la reliaison des coûts aux années: {str(e)}")
+    print(f"⏳ Durées de vie appliquées: {len(rows)} éléments mis à jour, {unmatched} sans correspondance "
+          f"({time.time() - started:.2f}s)")
+    return {
+        'elements': len(elements),
+        'updated': len(rows),
+        'unchanged': unchanged,
+        'kept': kept,
+        'unmatched': unmatched,
+        'total_seconds': round(time.time() - started, 3)
+    }
+
+
+def register_lifespan_routes(app):
+    """Enregistre les routes de la base de référence des durées de vie"""
+
+    @app.route('/load-lifespan-bdd', methods=['POST'])
+    def load_lifespan_bdd():
+        """Charge (remplace) la base de référence depuis un fichier Excel / CSV"""
+        if 'file' not in request.files:
+            return jsonify({'error': 'Aucun fichier reçu.'}), 400
+        f = request.files['file']
+        filename = secure_filename(f.filename) or 'bdd_lifespan.xlsx'
+        tmp = tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(filename)[-1])
+        tmp.close()
+        f.save(tmp.name)
+        try:
+            entries, invalid = read_lifespan_table(tmp.name)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except Exception as e:
+            return jsonify({'error': f"Erreur lecture fichier : {str(e)}"}), 400
+        finally:
+            os.unlink(tmp.name)
+
+        if not entries:
+            return jsonify({'error': 'Aucune durée de vie valide dans le fichier'}), 400
+        lifespan_db.replace(entries, filename)
+        return jsonify({'success': True, 'filename': filename, 'count': len(entries), 'invalid': invalid})
+
+    @app.route('/get-lifespan-bdd-info')
+    def get_lifespan_bdd_info():
+        return jsonify(lifespan_db.info())
+
+    @app.route('/remove-lifespan-bdd', methods=['POST'])
+    def remove_lifespan_bdd():
+        lifespan_db.clear()
+        return jsonify({"success": True})
+
+    @app.route('/lifespan-bdd/lookup')
+    def lookup_lifespan():
+        """Meilleure correspondance pour ?uniformat=&ifc_class=&material="""
+        match = lifespan_db.snapshot().lookup(
+            request.args.get('uniformat'), request.args.get('ifc_class'), request.args.get('material')
+        )
+        if match is None:
+            return jsonify({'match': None})
+        lifespan, depth, (ifc_class, material) = match
+        return jsonify({'match': {
+            'lifespan': lifespan,
+            'uniformat_prefix': normalise_code(request.args.get('uniformat'))[:depth],
+            'ifc_class': ifc_class,
+            'material': material
+        }})
+
+    @app.route('/autofill-lifespan', methods=['POST'])
+    def autofill_lifespan():
+        """Applique la base à tous les éléments du projet (?overwrite=1 : remplace les valeurs existantes)"""
+        if not lifespan_db.info()['count']:
+            return jsonify({'error': 'Aucune base de durées de vie chargée'}), 400
+        data = request.get_json(silent=True) or {}
+        overwrite = str(data.get('overwrite', request.args.get('overwrite', ''))).lower() in ('1', 'true', 'yes')
+        try:
+            result = apply_lifespans(overwrite=overwrite)
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+        return jsonify({
+            'success': True,
+            'message': f"{result['updated']} durée(s) de vie attribuée(s), {result['unmatched']} élément(s) sans correspondance",
+            **result
+        })
+
+
+# Instance partagée par l'application
+lifespan_db = LifespanDatabase()
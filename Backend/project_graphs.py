@@ -0,0 +1,89 @@
+"""
+Partitionnement des données par projet : un graphe nommé par projet
+
+Les instances d'un projet (éléments, groupes, coûts, durées de vie,
+attributions...) sont écrites dans son propre graphe nommé ; l'ontologie
+reste dans le graphe par défaut (ou dans ONTOLOGY_GRAPHS). Chaque requête
+est limitée au graphe du projet par les paramètres du protocole RDF4J :
+- lecture : default-graph-uri = graphe du projet + graphes de l'ontologie
+- écriture : using-graph-uri (idem), insert-graph-uri et remove-graph-uri
+  = graphe du projet
+Les requêtes SPARQL existantes restent inchangées ; plusieurs projets
+coexistent dans un même repository sans parcourir les triplets des autres,
+et la réinitialisation d'un projet est un DROP GRAPH.
+
+Identification du projet d'une requête, par priorité :
+    projet fixé par use_project (threads sans requête), en-tête
+    X-Project-Id, paramètre ?project=, cookie wlc_project, sinon
+    DEFAULT_PROJECT
+"""
+
+import contextvars
+import re
+from contextlib import contextmanager
+
+from flask import has_request_context, request
+
+from config import DEFAULT_PROJECT, PROJECT_GRAPH_BASE, ONTOLOGY_GRAPHS
+
+PROJECT_HEADER = 'X-Project-Id'
+PROJECT_COOKIE = 'wlc_project'
+PROJECT_ID_RE = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+_project_override = contextvars.ContextVar('wlc_project', default=None)
+
+
+def valid_project_id(project_id):
+    return bool(project_id) and bool(PROJECT_ID_RE.match(project_id))
+
+
+def request_project_id():
+    """Projet demandé par la requête HTTP courante (None si absent ou invalide)"""
+    for candidate in (
+        request.headers.get(PROJECT_HEADER),
+        request.args.get('project'),
+        request.cookies.get(PROJECT_COOKIE)
+    ):
+        if valid_project_id(candidate):
+            return candidate
+    return None
+
+
+def current_project_id():
+    project_id = _project_override.get()
+    if project_id:
+        return project_id
+    if has_request_context():
+        return request_project_id() or DEFAULT_PROJECT
+    return DEFAULT_PROJECT
+
+
+@contextmanager
+def use_project(project_id):
+    """Fixe le projet courant (threads d'écriture, tâches sans contexte de requête)"""
+    token = _project_override.set(project_id)
+    try:
+        yield
+    finally:
+        _project_override.reset(token)
+
+
+def project_graph_uri(project_id=None):
+    return PROJECT_GRAPH_BASE + (project_id or current_project_id())
+
+
+def query_dataset(data):
+    """Paramètres d'une requête SPARQL (query) limitée au projet courant"""
+    scoped = dict(data)
+    scoped['default-graph-uri'] = [project_graph_uri()] + ONTOLOGY_GRAPHS
+    return scoped
+
+
+def update_dataset(data):
+    """Paramètres d'une mise à jour SPARQL (update) écrivant dans le graphe du projet courant"""
+    graph = project_graph_uri()
+    scoped = dict(data)
+    scoped['using-graph-uri'] = [graph] + ONTOLOGY_GRAPHS
+    scoped['insert-graph-uri'] = graph
+    scoped['remove-graph-uri'] = graph
+    return scoped
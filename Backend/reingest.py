@@ -0,0 +1,326 @@
+"""
+Réingestion incrémentale d'une révision de modèle IFC (diff par GUID)
+
+Au lieu de /reset + parsing complet (qui efface coûts, attributions et
+données de fin de vie), la nouvelle révision est comparée à ce qui est
+déjà dans GraphDB :
+- empreinte par GUID : (dénomination, classe IFC, code Uniformat,
+  description Uniformat, matériau)
+- nouveaux GUIDs : insérés par lots (INSERT DATA)
+- GUIDs modifiés : seuls les attributs différents sont remplacés, par lots
+  (DELETE/INSERT avec VALUES), un attribut à la fois
+- GUIDs absents de la révision : retirés par lots si demandé (élément,
+  instances de coûts et attributions), conservés sinon ; les groupes
+  (IfcGroup et sous-types, ajoutés par /parse-ifc-groups) ne font pas
+  partie des éléments extraits et ne sont jamais retirés
+
+Les coûts, durées de vie, attributions et données de fin de vie des GUIDs
+inchangés ne sont jamais touchés : le coût d'une révision est proportionnel
+au nombre de changements, pas à la taille du modèle.
+"""
+
+import json
+import time
+import urllib.parse
+
+from jobs import check_cancelled, report_progress
+from sparql_client import query_graphdb, update_graphdb
+from step_scanner import group_types
+import year_links
+
+WLC = "http://www.semanticweb.org/adamy/ontologies/2025/WLCONTO#"
+IFC4 = "https://standards.buildingsmart.org/IFC/DEV/IFC4/ADD2_TC1/OWL#"
+ELEMENT_BASE = "http://example.com/ifc#"
+
+# Champs de l'empreinte, dans l'ordre, avec le prédicat correspondant
+FINGERPRINT_FIELDS = ('name', 'ifc_class', 'uniformat_code', 'uniformat_desc', 'material')
+FIELD_PREDICATES = {
+    'name': 'wlc:hasDenomination',
+    'ifc_class': 'wlc:hasIfcClass',
+    'uniformat_code': 'wlc:hasUniformatCode',
+    'uniformat_desc': 'wlc:hasUniformatDescription',
+    'material': 'wlc:hasIfcMaterial'
+}
+
+FINGERPRINT_PAGE_SIZE = 10000
+REINGEST_BATCH_SIZE = 500
+
+PREFIXES = f"""
+PREFIX wlc: <{WLC}>
+PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
+"""
+
+
+def element_uri(guid):
+    """URI d'un élément (même encodage que create_element_uri dans app.py)"""
+    return ELEMENT_BASE + urllib.parse.quote(str(guid).strip(), safe='')
+
+
+def _literal(value):
+    return json.dumps(value)
+
+
+def _class_name(value):
+    """Nom de classe IFC depuis l'IRI buildingSMART (ou un littéral)"""
+    return (value or '').rsplit('#', 1)[-1]
+
+
+def fetch_existing_fingerprints(page_size=FINGERPRINT_PAGE_SIZE):
+    """
+    Empreintes des éléments déjà dans GraphDB, page par page (pagination par GUID).
+
+    Returns:
+        dict: {guid: (uri, empreinte)} ; l'empreinte suit FINGERPRINT_FIELDS
+    """
+    existing = {}
+    after = None
+    while True:
+        after_filter = f"FILTER(?guid > {_literal(after)})" if after is not None else ""
+        query = f"""
+{PREFIXES}
+SELECT ?elem ?guid
+       (SAMPLE(?name_) AS ?name) (SAMPLE(?ifcClass_) AS ?ifcClass)
+       (SAMPLE(?uniformat_) AS ?uniformat) (SAMPLE(?uniformatDesc_) AS ?uniformatDesc)
+       (SAMPLE(?material_) AS ?material)
+WHERE {{
+  {{
+    SELECT ?elem ?guid WHERE {{
+      ?elem wlc:globalId ?guidValue .
+      BIND(STR(?guidValue) AS ?guid)
+      {after_filter}
+    }}
+    ORDER BY ?guid
+    LIMIT {int(page_size)}
+  }}
+  OPTIONAL {{ ?elem wlc:hasDenomination ?name_ . }}
+  OPTIONAL {{ ?elem wlc:hasIfcClass ?ifcClass_ . }}
+  OPTIONAL {{ ?elem wlc:hasUniformatCode ?uniformat_ . }}
+  OPTIONAL {{ ?elem wlc:hasUniformatDescription ?uniformatDesc_ . }}
+  OPTIONAL {{ ?elem wlc:hasIfcMaterial ?material_ . }}
+}}
+GROUP BY ?elem ?guid
+ORDER BY ?guid
+"""
+        rows = query_graphdb(query)
+        for row in rows:
+            existing[row['guid']] = (row['elem'], (
+                row.get('name', ''),
+                _class_name(row.get('ifcClass')),
+                row.get('uniformat', ''),
+                row.get('uniformatDesc', ''),
+                row.get('material', '')
+            ))
+        if len(rows) < page_size:
+            return existing
+        after = rows[-1]['guid']
+
+
+def record_fingerprint(record):
+    """Empreinte d'un enregistrement de extract_elements (voir ELEMENT_RECORD_FIELDS)"""
+    guid, name, ifc_class, uniformat_code, uniformat_desc, material = record[:6]
+    return (name or '', ifc_class or '', uniformat_code or '', uniformat_desc or '', material or '')
+
+
+def plan_reingest(records, existing):
+    """
+    Compare la révision aux éléments existants.
+
+    Args:
+        records: enregistrements de extract_elements
+        existing: résultat de fetch_existing_fingerprints
+
+    Returns:
+        dict: added [(guid, empreinte)], changed [(guid, uri, {champ: valeur})],
+              removed [(guid, uri)], unchanged et groups (groupes conservés) : nombres
+    """
+    added, changed = [], []
+    seen = set()
+    unchanged = 0
+
+    for record in records:
+        guid = record[0]
+        if guid in seen:
+            continue
+        seen.add(guid)
+        fingerprint = record_fingerprint(record)
+        current = existing.get(guid)
+        if current is None:
+            added.append((guid, fingerprint))
+            continue
+        uri, old = current
+        if old == fingerprint:
+            unchanged += 1
+            continue
+        diff = {
+            field: new
+            for field, new, previous in zip(FINGERPRINT_FIELDS, fingerprint, old)
+            if new != previous
+        }
+        changed.append((guid, uri, diff))
+
+    # Seuls les éléments issus de /parse-ifc sont candidats au retrait : les groupes sont conservés
+    groups = group_types()
+    removed, kept_groups = [], 0
+    for guid, (uri, old) in existing.items():
+        if guid in seen:
+            continue
+        if old[1].upper() in groups:
+            kept_groups += 1
+            continue
+        removed.append((guid, uri))
+    return {'added': added, 'changed': changed, 'removed': removed, 'unchanged': unchanged,
+            'groups': kept_groups}
+
+
+def _batches(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def element_triples(guid, fingerprint):
+    """Triplets d'un nouvel élément (mêmes prédicats que /parse-ifc)"""
+    uri = element_uri(guid)
+    name, ifc_class, uniformat_code, uniformat_desc, material = fingerprint
+    triples = [
+        f"<{uri}> a wlc:Element .",
+        f"<{uri}> wlc:globalId {_literal(guid)} .",
+        f"<{uri}> wlc:hasDenomination {_literal(name)} ."
+    ]
+    if ifc_class:
+        triples.append(f"<{uri}> wlc:hasIfcClass <{IFC4}{ifc_class}> ; rdf:type <{IFC4}{ifc_class}> .")
+    if uniformat_code:
+        triples.append(f"<{uri}> wlc:hasUniformatCode {_literal(uniformat_code)} .")
+    if uniformat_desc:
+        triples.append(f"<{uri}> wlc:hasUniformatDescription {_literal(uniformat_desc)} .")
+    if material:
+        triples.append(f"<{uri}> wlc:hasIfcMaterial {_literal(material)} .")
+    return triples
+
+
+def insert_new_elements(added, batch_size=REINGEST_BATCH_SIZE):
+    for batch in _batches(added, batch_size):
+        triples = [t for guid, fingerprint in batch for t in element_triples(guid, fingerprint)]
+        update_graphdb(f"{PREFIXES}\nINSERT DATA {{\n  " + "\n  ".join(triples) + "\n}")
+
+
+def insert_element_records(records):
+    """Insère un lot d'enregistrements de extract_elements en une seule requête"""
+    insert_new_elements([(record[0], record_fingerprint(record)) for record in records], batch_size=len(records) or 1)
+
+
+def _update_field(field, rows):
+    """Remplace un attribut pour un lot d'éléments : rows = [(uri, nouvelle valeur)]"""
+    predicate = FIELD_PREDICATES[field]
+    if field == 'ifc_class':
+        values = " ".join(f"(<{uri}> {f'<{IFC4}{value}>' if value else 'UNDEF'})" for uri, value in rows)
+        return f"""
+{PREFIXES}
+DELETE {{ ?elem wlc:hasIfcClass ?old . ?elem rdf:type ?old . }}
+INSERT {{ ?elem wlc:hasIfcClass ?new . ?elem rdf:type ?new . }}
+WHERE {{
+  VALUES (?elem ?new) {{ {values} }}
+  OPTIONAL {{ ?elem wlc:hasIfcClass ?old . }}
+}}
+"""
+    values = " ".join(f"(<{uri}> {_literal(value) if value else 'UNDEF'})" for uri, value in rows)
+    return f"""
+{PREFIXES}
+DELETE {{ ?elem {predicate} ?old . }}
+INSERT {{ ?elem {predicate} ?new . }}
+WHERE {{
+  VALUES (?elem ?new) {{ {values} }}
+  OPTIONAL {{ ?elem {predicate} ?old . }}
+}}
+"""
+
+
+def update_changed_attributes(changed, batch_size=REINGEST_BATCH_SIZE):
+    """Une requête par attribut et par lot, limitée aux éléments où il a changé"""
+    by_field = {}
+    for _, uri, diff in changed:
+        for field, value in diff.items():
+            by_field.setdefault(field, []).append((uri, value))
+    for field, rows in by_field.items():
+        for batch in _batches(rows, batch_size):
+            update_graphdb(_update_field(field, batch))
+    return {field: len(rows) for field, rows in by_field.items()}
+
+
+def retire_elements(removed, batch_size=REINGEST_BATCH_SIZE):
+    """Retire les éléments absents de la révision, avec leurs coûts et attributions"""
+    for batch in _batches(removed, batch_size):
+        values = " ".join(f"<{uri}>" for _, uri in batch)
+        update_graphdb(f"""
+{PREFIXES}
+DELETE {{ ?cost ?cp ?co . }}
+WHERE {{
+  VALUES ?elem {{ {values} }}
+  ?elem wlc:hasCost ?cost .
+  ?cost ?cp ?co .
+}};
+DELETE {{ ?attribution ?ap ?ao . }}
+WHERE {{
+  VALUES ?elem {{ {values} }}
+  ?attribution wlc:concernsElement ?elem ;
+               ?ap ?ao .
+}};
+DELETE {{ ?elem ?p ?o . }}
+WHERE {{
+  VALUES ?elem {{ {values} }}
+  ?elem ?p ?o .
+}}
+""")
+        # Coûts supprimés : un élément réintroduit plus tard sera relié à nouveau aux années
+        year_links.forget_link_states([uri for _, uri in batch])
+
+
+def reingest_records(records, retire_missing=False, dry_run=False, batch_size=REINGEST_BATCH_SIZE):
+    """
+    Applique une révision de modèle à l'ontologie existante.
+
+    Args:
+        records: enregistrements de extract_elements pour la nouvelle révision
+        retire_missing (bool): retirer les éléments absents de la révision
+        dry_run (bool): calculer le diff sans rien écrire
+        batch_size (int): éléments par requête de mise à jour
+
+    Returns:
+        dict: plan (compteurs et échantillons) et durées
+    """
+    started = time.time()
+    existing = fetch_existing_fingerprints()
+    plan = plan_reingest(records, existing)
+    diff_seconds = time.time() - started
+    print(f"🔁 Réingestion: {len(plan['added'])} nouveaux, {len(plan['changed'])} modifiés, "
+          f"{len(plan['removed'])} absents, {plan['unchanged']} inchangés ({diff_seconds:.2f}s)")
+
+    updated_fields = {}
+    retired = 0
+    if not dry_run:
+        check_cancelled()
+        report_progress(message=f"Insertion de {len(plan['added'])} nouveaux éléments...")
+        insert_new_elements(plan['added'], batch_size)
+        check_cancelled()
+        report_progress(message=f"Mise à jour de {len(plan['changed'])} éléments modifiés...")
+        updated_fields = update_changed_attributes(plan['changed'], batch_size)
+        if retire_missing:
+            check_cancelled()
+            report_progress(message=f"Retrait de {len(plan['removed'])} éléments absents...")
+            retire_elements(plan['removed'], batch_size)
+            retired = len(plan['removed'])
+
+    return {
+        'dry_run': dry_run,
+        'added': len(plan['added']),
+        'changed': len(plan['changed']),
+        'removed': len(plan['removed']),
+        'retired': retired,
+        'unchanged': plan['unchanged'],
+        'groups_kept': plan['groups'],
+        'updated_fields': updated_fields,
+        'added_guids': [guid for guid, _ in plan['added'][:100]],
+        'changed_elements': [{'guid': guid, 'fields': diff} for guid, _, diff in plan['changed'][:100]],
+        'removed_guids': [guid for guid, _ in plan['removed'][:100]],
+        'diff_seconds': round(diff_seconds, 3),
+        'total_seconds': round(time.time() - started, 3)
+    }
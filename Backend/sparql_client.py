@@ -1,6 +1,7 @@
 import requests
 import json
-from config import GRAPHDB_REPO
+from config import GRAPHDB_REPO, PROJECT_GRAPH_BASE
+from project_graphs import query_dataset, update_dataset, project_graph_uri
 import time
 
 headers_query = {"Accept": "application/sparql-results+json"}
@@ -8,7 +9,7 @@ UPDATE_ENDPOINT = GRAPHDB_REPO.rstrip('/') + '/statements'
 
 def test_connection():
     query = "SELECT ?s WHERE { ?s ?p ?o } LIMIT 1"
-    response = requests.post(GRAPHDB_REPO, data={"query": query}, headers=headers_query)
+    response = requests.post(GRAPHDB_REPO, data=query_dataset({"query": query}), headers=headers_query)
     return "OK" if response.status_code == 200 else f"Erreur {response.status_code}: {response.text}"
 
 def get_classes():
@@ -24,14 +25,14 @@ SELECT DISTINCT ?uri ?label WHERE {
 """
     res_exp = requests.post(
         GRAPHDB_REPO,
-        data={"query": query, "infer": "false"},
+        data=query_dataset({"query": query, "infer": "false"}),
         headers=headers_query
     )
     res_exp.raise_for_status()
     exp_uris = {b["uri"]["value"] for b in res_exp.json()["results"]["bindings"]}
     res_all = requests.post(
         GRAPHDB_REPO,
-        data={"query": query, "infer": "true"},
+        data=query_dataset({"query": query, "infer": "true"}),
         headers=headers_query
     )
     res_all.raise_for_status()
@@ -46,7 +47,7 @@ SELECT DISTINCT ?uri ?label WHERE {
 def get_class_details(class_uri):
     def run(q, infer=True):
         data = {"query": q, "infer": "true" if infer else "false"}
-        r = requests.post(GRAPHDB_REPO, data=data, headers=headers_query)
+        r = requests.post(GRAPHDB_REPO, data=query_dataset(data), headers=headers_query)
         r.raise_for_status()
         return r.json()["results"]["bindings"]
     def get_literal(bindings, key):
@@ -97,7 +98,7 @@ SELECT ?prop ?val ?valLabel WHERE {{
   OPTIONAL {{ ?val rdfs:label ?valLabel }}
 }}
 """
-    r = requests.post(GRAPHDB_REPO, data={"query": query}, headers=headers_query)
+    r = requests.post(GRAPHDB_REPO, data=query_dataset({"query": query}), headers=headers_query)
     r.raise_for_status()
     bindings = r.json()["results"]["bindings"]
     details = []
@@ -115,7 +116,7 @@ def insert_element(uri):
 PREFIX wlc: <http://www.semanticweb.org/adamy/ontologies/2025/WLCONTO#>
 INSERT DATA {{ <{uri}> a wlc:Element . }}
 """
-    r = requests.post(UPDATE_ENDPOINT, data={"update": update})
+    r = requests.post(UPDATE_ENDPOINT, data=update_dataset({"update": update}))
     r.raise_for_status()
 
 def insert_denomination(uri, denomination):
@@ -126,7 +127,7 @@ INSERT DATA {{
   <{uri}> wlc:hasDenomination {safe_denomination} .
 }}
 """
-    r = requests.post(UPDATE_ENDPOINT, data={"update": update})
+    r = requests.post(UPDATE_ENDPOINT, data=update_dataset({"update": update}))
     r.raise_for_status()
 
 def insert_uniformat_code(uri, code):
@@ -137,7 +138,7 @@ INSERT DATA {{
   <{uri}> wlc:hasUniformatCode {safe_code} .
 }}
 """
-    r = requests.post(UPDATE_ENDPOINT, data={"update": update})
+    r = requests.post(UPDATE_ENDPOINT, data=update_dataset({"update": update}))
     r.raise_for_status()
 
 def insert_uniformat_description(uri, description):
@@ -148,7 +149,7 @@ INSERT DATA {{
   <{uri}> wlc:hasUniformatDescription {safe_description} .
 }}
 """
-    r = requests.post(UPDATE_ENDPOINT, data={"update": update})
+    r = requests.post(UPDATE_ENDPOINT, data=update_dataset({"update": update}))
     r.raise_for_status()
 
 def insert_material(uri, material):
@@ -159,7 +160,7 @@ INSERT DATA {{
   <{uri}> wlc:hasIfcMaterial {safe_mat} .
 }}
 """
-    r = requests.post(UPDATE_ENDPOINT, data={"update": update})
+    r = requests.post(UPDATE_ENDPOINT, data=update_dataset({"update": update}))
     r.raise_for_status()
 
 def insert_ifc_class(uri, ifc_class):
@@ -180,42 +181,96 @@ INSERT DATA {{
           rdf:type <{ifc_class_uri}> .
 }}
 """
-    r = requests.post(UPDATE_ENDPOINT, data={"update": update})
+    r = requests.post(UPDATE_ENDPOINT, data=update_dataset({"update": update}))
     r.raise_for_status()
 
-def update_cost_for_element(uri, cost, category):
-    import uuid
+COST_CATEGORIES = ('ConstructionCosts', 'OperationCosts', 'MaintenanceCosts', 'EndOfLifeCosts')
+
+def cost_instance_uri(uri, category, year=None):
+    """
+    URI déterministe d'une instance de coût : (élément, catégorie[, année]).
+    Deux écritures concurrentes visent la même instance : aucun doublon possible.
+    """
+    cost_uri = f"{uri}/cost/{category.lower()}"
+    return f"{cost_uri}/{int(year)}" if year is not None else cost_uri
+
+COST_UPSERT_BATCH_SIZE = 500
+
+def upsert_costs(rows, batch_size=COST_UPSERT_BATCH_SIZE):
+    """
+    Upsert d'un lot de coûts en une seule transaction : une requête DELETE/INSERT
+    par lot de batch_size lignes (VALUES), toutes envoyées dans la même mise à jour.
+    Remplace la valeur de l'instance déterministe ; pour un coût sans année, retire
+    aussi les anciennes instances (URIs aléatoires) de la catégorie.
     
-    # ÉTAPE 1: Supprimer les anciens coûts de cette catégorie
-    delete_old = f"""
-PREFIX wlc: <http://www.semanticweb.org/adamy/ontologies/2025/WLCONTO#>
+    Args:
+        rows: [(uri de l'élément, coût, catégorie, année ou None)]
+    """
+    statements = []
+    for i in range(0, len(rows), batch_size):
+        values = " ".join(
+            f"(<{uri}> <{cost_instance_uri(uri, category, year)}> wlc:{category} "
+            f"\"{float(cost)}\"^^xsd:double {'false' if year is not None else 'true'})"
+            for uri, cost, category, year in rows[i:i + batch_size]
+        )
+        statements.append(f"""
 DELETE {{
-  <{uri}> wlc:hasCost ?oldCost .
-  ?oldCost ?prop ?value .
+  ?cost wlc:hasCostValue ?oldValue .
+  ?elem wlc:hasCost ?old .
+  ?old ?oldProp ?oldPropValue .
 }}
-WHERE {{
-  <{uri}> wlc:hasCost ?oldCost .
-  ?oldCost a wlc:{category} .
-  ?oldCost ?prop ?value .
+INSERT {{
+  ?cost a ?category, wlc:Costs ;
+      wlc:hasCostValue ?value ;
+      wlc:appliesTo ?elem .
+  ?elem wlc:hasCost ?cost .
 }}
-"""
-    r = requests.post(UPDATE_ENDPOINT, data={"update": delete_old})
-    r.raise_for_status()
+WHERE {{
+  VALUES (?elem ?cost ?category ?value ?legacy) {{ {values} }}
+  OPTIONAL {{ ?cost wlc:hasCostValue ?oldValue . }}
+  OPTIONAL {{
+    ?elem wlc:hasCost ?old .
+    ?old a ?category ;
+         ?oldProp ?oldPropValue .
+    FILTER(?legacy && ?old != ?cost && !STRSTARTS(STR(?old), CONCAT(STR(?cost), "/")))
+  }}
+}}""")
+    if not statements:
+        return
+    update_graphdb("""
+PREFIX wlc: <http://www.semanticweb.org/adamy/ontologies/2025/WLCONTO#>
+PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
+""" + " ;\n".join(statements))
+
+def update_cost_for_element(uri, cost, category, year=None):
+    """Upsert d'un seul coût (voir upsert_costs)"""
+    if category not in COST_CATEGORIES:
+        raise ValueError(f"Catégorie de coût inconnue: {category}")
+    upsert_costs([(uri, cost, category, year)])
+
+def set_element_durations(rows, batch_size=COST_UPSERT_BATCH_SIZE):
+    """
+    Durées de vie d'un lot d'éléments en une seule mise à jour (VALUES par lots).
     
-    # ÉTAPE 2: Créer la nouvelle instance
-    cost_uri = f"{uri}/cost/{category.lower()}_{uuid.uuid4().hex}"
-    insert_new = f"""
+    Args:
+        rows: [(uri de l'élément, durée de vie en années)]
+    """
+    statements = []
+    for i in range(0, len(rows), batch_size):
+        values = " ".join(f'(<{uri}> "{int(duration)}"^^xsd:integer)' for uri, duration in rows[i:i + batch_size])
+        statements.append(f"""
+DELETE {{ ?elem wlc:hasDuration ?old . }}
+INSERT {{ ?elem wlc:hasDuration ?duration . }}
+WHERE {{
+  VALUES (?elem ?duration) {{ {values} }}
+  OPTIONAL {{ ?elem wlc:hasDuration ?old . }}
+}}""")
+    if not statements:
+        return
+    update_graphdb("""
 PREFIX wlc: <http://www.semanticweb.org/adamy/ontologies/2025/WLCONTO#>
 PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
-INSERT DATA {{
-  <{cost_uri}> a wlc:{category}, wlc:Costs ;
-      wlc:hasCostValue "{cost}"^^xsd:double ;
-      wlc:appliesTo <{uri}> .
-  <{uri}> wlc:hasCost <{cost_uri}> .
-}}
-"""
-    r = requests.post(UPDATE_ENDPOINT, data={"update": insert_new})
-    r.raise_for_status()
+""" + " ;\n".join(statements))
 
 def update_material_for_element(uri, material):
     safe_material = json.dumps(material)
@@ -225,99 +280,93 @@ DELETE {{ <{uri}> wlc:hasIfcMaterial ?oldMaterial . }}
 INSERT {{ <{uri}> wlc:hasIfcMaterial {safe_material} . }}
 WHERE  {{ OPTIONAL {{ <{uri}> wlc:hasIfcMaterial ?oldMaterial }} }}
 """
-    r = requests.post(UPDATE_ENDPOINT, data={"update": update})
+    r = requests.post(UPDATE_ENDPOINT, data=update_dataset({"update": update}))
     r.raise_for_status()
 
 def query_graphdb(sparql_query):
-    response = requests.post(GRAPHDB_REPO, data={"query": sparql_query}, headers=headers_query)
+    response = requests.post(GRAPHDB_REPO, data=query_dataset({"query": sparql_query}), headers=headers_query)
     response.raise_for_status()
     results = response.json()["results"]["bindings"]
     return [{k: v["value"] for k, v in r.items()} for r in results]
 
 def query_ask_graphdb(sparql_ask_query):
     """Exécute une requête SPARQL ASK et retourne True/False"""
-    response = requests.post(GRAPHDB_REPO, data={"query": sparql_ask_query}, headers=headers_query)
+    response = requests.post(GRAPHDB_REPO, data=query_dataset({"query": sparql_ask_query}), headers=headers_query)
     response.raise_for_status()
     return response.json().get("boolean", False)
 
 def update_graphdb(sparql_update):
     """Exécute une requête SPARQL UPDATE (INSERT, DELETE, etc.)"""
-    response = requests.post(UPDATE_ENDPOINT, data={"update": sparql_update})
+    response = requests.post(UPDATE_ENDPOINT, data=update_dataset({"update": sparql_update}))
     response.raise_for_status()
     return response
 
-def clear_instances():
+def clear_instances(include_legacy=False):
     """
-    Vide l'ontologie en supprimant uniquement les instances IFC (VERSION OPTIMISÉE)
-    Préserve les classes et propriétés de l'ontologie.
+    Vide le projet courant : DROP du graphe nommé du projet (voir project_graphs).
+    Préserve l'ontologie et les données des autres projets, sans parcourir leurs triplets.
     
-    GAIN: 5-100x plus rapide que la suppression individuelle
+    Args:
+        include_legacy (bool): supprime aussi les instances écrites dans le graphe
+            par défaut avant le partitionnement par projet (parcours par préfixe d'URI)
     
     Returns:
         tuple: (success: bool, message: str)
     """
-    print("🗑️ VIDANGE OPTIMISÉE - Début du nettoyage...")
+    graph = project_graph_uri()
+    print(f"🗑️ VIDANGE DU PROJET - DROP GRAPH <{graph}>")
     start_time = time.time()
     
     try:
-        print("   🧹 Suppression des instances (préservation de l'ontologie)...")
-        
-        # Requête optimisée : supprime uniquement les instances, pas les classes
-        optimized_delete = """
-        PREFIX wlc: <http://www.semanticweb.org/adamy/ontologies/2025/WLCONTO#>
-        DELETE {
-            ?s ?p ?o .
-        }
-        WHERE {
-            ?s ?p ?o .
-            FILTER(
-                STRSTARTS(STR(?s), "http://example.com/ifc#") ||
-                STRSTARTS(STR(?s), "http://example.com/ifc/group#") ||
-                STRSTARTS(STR(?s), "http://example.com/test#") ||
-                STRSTARTS(STR(?s), "http://example.com/cost/") ||
-                STRSTARTS(STR(?s), "http://example.com/lifespan/") ||
-                STRSTARTS(STR(?s), "http://example.com/year/") ||
-                STRSTARTS(STR(?s), "http://example.com/stakeholder/")
-            )
-        }
-        """
-        
-        r = requests.post(UPDATE_ENDPOINT, data={"update": optimized_delete})
+        r = requests.post(UPDATE_ENDPOINT, data={"update": f"DROP SILENT GRAPH <{graph}>"})
         r.raise_for_status()
         
+        if include_legacy:
+            print("   🧹 Suppression des instances héritées du graphe par défaut...")
+            legacy_delete = """
+            DELETE {
+                ?s ?p ?o .
+            }
+            WHERE {
+                ?s ?p ?o .
+                FILTER(
+                    STRSTARTS(STR(?s), "http://example.com/ifc#") ||
+                    STRSTARTS(STR(?s), "http://example.com/ifc/group#") ||
+                    STRSTARTS(STR(?s), "http://example.com/test#") ||
+                    STRSTARTS(STR(?s), "http://example.com/cost/") ||
+                    STRSTARTS(STR(?s), "http://example.com/lifespan/") ||
+                    STRSTARTS(STR(?s), "http://example.com/year/") ||
+                    STRSTARTS(STR(?s), "http://example.com/stakeholder/")
+                )
+            }
+            """
+            r = requests.post(UPDATE_ENDPOINT, data={
+                "update": legacy_delete,
+                "using-graph-uri": "http://rdf4j.org/schema/rdf4j#nil",
+                "remove-graph-uri": "http://rdf4j.org/schema/rdf4j#nil"
+            })
+            r.raise_for_status()
+        
         elapsed_time = time.time() - start_time
-        message = f"Vidange optimisée réussie en {elapsed_time:.2f}s"
+        message = f"Vidange du projet réussie en {elapsed_time:.2f}s"
         print(f"✅ {message}")
         return True, message
         
     except Exception as e:
-        print(f"❌ Erreur lors de la vidange: {e}")
-        print("🔄 Tentative avec méthode alternative...")
-        
-        try:
-            # Méthode alternative plus simple
-            simple_delete = """
-            DELETE {
-                ?s ?p ?o .
-            }
-WHERE {
-  ?s ?p ?o .
-                FILTER(STRSTARTS(STR(?s), "http://example.com/"))
-}
-"""
-            r = requests.post(UPDATE_ENDPOINT, data={"update": simple_delete})
-            r.raise_for_status()
-            
-            elapsed_time = time.time() - start_time
-            message = f"Vidange alternative réussie en {elapsed_time:.2f}s"
-            print(f"✅ {message}")
-            return True, message
-            
-        except Exception as e2:
-            elapsed_time = time.time() - start_time
-            message = f"Erreur lors de la vidange: {e2}"
-            print(f"❌ {message}")
-            return False, message
+        elapsed_time = time.time() - start_time
+        message = f"Erreur lors de la vidange: {e}"
+        print(f"❌ {message}")
+        return False, message
+
+def list_project_graphs():
+    """Graphes nommés des projets présents dans le repository (sans parcourir les triplets)"""
+    response = requests.get(GRAPHDB_REPO.rstrip('/') + '/contexts', headers=headers_query)
+    response.raise_for_status()
+    return [
+        b["contextID"]["value"]
+        for b in response.json()["results"]["bindings"]
+        if b["contextID"]["value"].startswith(PROJECT_GRAPH_BASE)
+    ]
 
 def insert_excel_cost(guid, cost):
     uri = f"http://example.com/ifc#{guid}"
@@ -327,7 +376,7 @@ def insert_excel_cost(guid, cost):
     INSERT {{ <{uri}> wlc:hasCostValue "{cost}" . }}
     WHERE  {{ OPTIONAL {{ <{uri}> wlc:hasCostValue ?oldValue }} }}
     """
-    r = requests.post(UPDATE_ENDPOINT, data={"update": update})
+    r = requests.post(UPDATE_ENDPOINT, data=update_dataset({"update": update}))
     r.raise_for_status()
 
 
@@ -338,41 +387,12 @@ def insert_global_id(uri, guid):
       <{uri}> wlc:globalId "{guid}" .
     }}
     """
-    r = requests.post(UPDATE_ENDPOINT, data={"update": update})
+    r = requests.post(UPDATE_ENDPOINT, data=update_dataset({"update": update}))
     r.raise_for_status()
 
-def insert_typed_cost_instance(uri, cost, category):
-    import uuid
-    
-    # ÉTAPE 1: Supprimer les anciens coûts de cette catégorie pour éviter les doublons
-    delete_old = f"""
-    PREFIX wlc: <http://www.semanticweb.org/adamy/ontologies/2025/WLCONTO#>
-    DELETE {{
-      <{uri}> wlc:hasCost ?oldCost .
-      ?oldCost ?prop ?value .
-    }}
-    WHERE {{
-      <{uri}> wlc:hasCost ?oldCost .
-      ?oldCost a wlc:{category} .
-      ?oldCost ?prop ?value .
-    }}
-    """
-    r = requests.post(UPDATE_ENDPOINT, data={"update": delete_old})
-    r.raise_for_status()
-    
-    # ÉTAPE 2: Créer la nouvelle instance
-    cost_uri = f"{uri}/cost/{category.lower()}_{uuid.uuid4().hex}"
-    update = f"""
-    PREFIX wlc: <http://www.semanticweb.org/adamy/ontologies/2025/WLCONTO#>
-    INSERT DATA {{
-      <{cost_uri}> a wlc:{category}, wlc:Costs ;
-        wlc:hasCostValue "{cost}"^^xsd:double ;
-        wlc:appliesTo <{uri}> .
-      <{uri}> wlc:hasCost <{cost_uri}> .
-    }}
-    """
-    r = requests.post(UPDATE_ENDPOINT, data={"update": update})
-    r.raise_for_status()
+def insert_typed_cost_instance(uri, cost, category, year=None):
+    # Même upsert que update_cost_for_element (instance déterministe, pas de doublon)
+    update_cost_for_element(uri, cost, category, year)
 
 def verify_cost_mapping_integrity():
     """
@@ -380,6 +400,7 @@ def verify_cost_mapping_integrity():
     Retourne un rapport de cohérence.
     """
     # Vérifier les doublons de coûts par élément et catégorie
+    # (hors occurrences annuelles <élément>/cost/<catégorie>/<année>)
     sparql_duplicates = """
     PREFIX wlc: <http://www.semanticweb.org/adamy/ontologies/2025/WLCONTO#>
     SELECT ?element ?category (COUNT(?cost) as ?count)
@@ -387,6 +408,7 @@ def verify_cost_mapping_integrity():
       ?element wlc:hasCost ?cost .
       ?cost a ?category .
       FILTER(?category IN (wlc:ConstructionCosts, wlc:OperationCosts, wlc:MaintenanceCosts, wlc:EndOfLifeCosts))
+      FILTER(!STRSTARTS(STR(?cost), CONCAT(STR(?element), "/cost/", LCASE(STRAFTER(STR(?category), "#")), "/")))
     }
     GROUP BY ?element ?category
     HAVING (COUNT(?cost) > 1)
@@ -498,7 +520,7 @@ INSERT DATA {{
     
     try:
         # Exécuter la requête batch
-        r = requests.post(UPDATE_ENDPOINT, data={"update": batch_query})
+        r = requests.post(UPDATE_ENDPOINT, data=update_dataset({"update": batch_query}))
         r.raise_for_status()
         return True
     except Exception as e:
@@ -540,3 +562,100 @@ def batch_insert_elements_chunked(elements_data, chunk_size=100):
     print(f"🎯 Résultat: {processed}/{total_elements} éléments insérés")
     return processed == total_elements, processed, errors
 
+
+# Taille de page par défaut pour le parcours des éléments (pagination par clé)
+ELEMENTS_PAGE_SIZE = 5000
+
+def get_elements_page(after=None, limit=ELEMENTS_PAGE_SIZE, after_elem=None):
+    """
+    Retourne une page d'éléments, exactement une ligne par élément.
+    
+    Les quatre coûts de phase sont pivotés en colonnes (constructionCost,
+    operationCost, maintenanceCost, endOfLifeCost) au lieu d'une ligne par
+    coût × type inféré ; seule l'instance de base de chaque catégorie est lue
+    (les occurrences annuelles <élément>/cost/<catégorie>/<année> sont ignorées).
+    La pagination se fait par clé (GUID, ou URI de l'élément à défaut) puis
+    par URI de l'élément, unique : la page suivante commence après le dernier
+    couple (?key, ?elem), même si plusieurs éléments partagent un GUID.
+    
+    Args:
+        after (str, optional): dernière clé de la page précédente
+        limit (int): nombre maximal d'éléments dans la page
+        after_elem (str, optional): URI du dernier élément de la page précédente
+    
+    Returns:
+        list: lignes triées par ?key puis ?elem (voir query_graphdb)
+    """
+    if after and after_elem:
+        after_filter = (f"FILTER(?key > {json.dumps(after)} || "
+                        f"(?key = {json.dumps(after)} && STR(?elem) > {json.dumps(after_elem)}))")
+    elif after:
+        after_filter = f"FILTER(?key > {json.dumps(after)})"
+    else:
+        after_filter = ""
+    query = f"""
+PREFIX eol: <http://www.w3id.org/dpp/EoL#>
+PREFIX wlc: <http://www.semanticweb.org/adamy/ontologies/2025/WLCONTO#>
+PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+SELECT ?elem ?key
+       (SAMPLE(?guid_) AS ?guid) (SAMPLE(?name_) AS ?name)
+       (SAMPLE(?uniformat_) AS ?uniformat) (SAMPLE(?uniformatDesc_) AS ?uniformatDesc)
+       (SAMPLE(?material_) AS ?material) (SAMPLE(?ifcClass_) AS ?ifcClass)
+       (SAMPLE(?constructionCost_) AS ?constructionCost) (SAMPLE(?operationCost_) AS ?operationCost)
+       (SAMPLE(?maintenanceCost_) AS ?maintenanceCost) (SAMPLE(?endOfLifeCost_) AS ?endOfLifeCost)
+       (SAMPLE(?lifespan_) AS ?lifespan) (SAMPLE(?endOfLifeStrategy_) AS ?endOfLifeStrategy)
+WHERE {{
+  {{
+    SELECT ?elem ?key WHERE {{
+      {{
+        SELECT ?elem (MIN(STR(COALESCE(?globalId, ?altGuid, ?elem))) AS ?key) WHERE {{
+          ?typeClass rdfs:subClassOf* wlc:Element .
+          ?elem a ?typeClass .
+          OPTIONAL {{ ?elem wlc:globalId ?globalId . }}
+          OPTIONAL {{ ?elem wlc:guid ?altGuid . }}
+        }}
+        GROUP BY ?elem
+      }}
+      {after_filter}
+    }}
+    ORDER BY ?key ?elem
+    LIMIT {int(limit)}
+  }}
+  OPTIONAL {{ ?elem wlc:globalId ?guid_ . }}
+  OPTIONAL {{ ?elem wlc:guid ?guid_ . }}
+  OPTIONAL {{ ?elem wlc:hasDenomination ?name_ . }}
+  OPTIONAL {{ ?elem wlc:hasUniformatCode ?uniformat_ . }}
+  OPTIONAL {{ ?elem wlc:hasUniformatDescription ?uniformatDesc_ . }}
+  OPTIONAL {{ ?elem wlc:hasIfcMaterial ?material_ . }}
+  OPTIONAL {{ ?elem wlc:hasIfcClass ?ifcClass_ . }}
+  OPTIONAL {{ ?elem wlc:hasCost ?c1 . ?c1 a wlc:ConstructionCosts ; wlc:hasCostValue ?constructionCost_ .
+              FILTER(!STRSTARTS(STR(?c1), CONCAT(STR(?elem), "/cost/constructioncosts/"))) }}
+  OPTIONAL {{ ?elem wlc:hasCost ?c2 . ?c2 a wlc:OperationCosts ; wlc:hasCostValue ?operationCost_ .
+              FILTER(!STRSTARTS(STR(?c2), CONCAT(STR(?elem), "/cost/operationcosts/"))) }}
+  OPTIONAL {{ ?elem wlc:hasCost ?c3 . ?c3 a wlc:MaintenanceCosts ; wlc:hasCostValue ?maintenanceCost_ .
+              FILTER(!STRSTARTS(STR(?c3), CONCAT(STR(?elem), "/cost/maintenancecosts/"))) }}
+  OPTIONAL {{ ?elem wlc:hasCost ?c4 . ?c4 a wlc:EndOfLifeCosts ; wlc:hasCostValue ?endOfLifeCost_ .
+              FILTER(!STRSTARTS(STR(?c4), CONCAT(STR(?elem), "/cost/endoflifecosts/"))) }}
+  OPTIONAL {{ ?elem wlc:hasDuration ?lifespan_ . }}
+  OPTIONAL {{ ?elem eol:hasType ?endOfLifeStrategy_ . }}
+}}
+GROUP BY ?elem ?key
+ORDER BY ?key ?elem
+"""
+    return query_graphdb(query)
+
+def iter_all_elements(page_size=ELEMENTS_PAGE_SIZE):
+    """
+    Parcourt tous les éléments page par page (aucune limite globale).
+    
+    Yields:
+        dict: une ligne pivotée par élément (voir get_elements_page)
+    """
+    after = after_elem = None
+    while True:
+        rows = get_elements_page(after, page_size, after_elem)
+        for row in rows:
+            yield row
+        if len(rows) < page_size:
+            break
+        after, after_elem = rows[-1]['key'], rows[-1]['elem']
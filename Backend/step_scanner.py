@@ -0,0 +1,171 @@
+"""
+Analyse rapide d'un fichier IFC (STEP physique) sans ifcopenshell.open
+
+Un seul passage sur le fichier (mmap + expression régulière, en flux :
+les correspondances sont comptées au fil de l'eau, sans liste de toutes
+les entités en mémoire) suffit pour obtenir un résumé du modèle à la
+vitesse du disque, sans construire le graphe d'objets :
+- schéma (FILE_SCHEMA de l'en-tête)
+- nombre d'entités par type
+- noms des IfcGroup (et sous-types : systèmes, zones, ...)
+- nombre approximatif d'éléments (sous-types de IfcElement)
+"""
+
+import mmap
+import os
+import re
+import time
+from collections import Counter
+
+try:
+    import ifcopenshell.ifcopenshell_wrapper as ifc_wrapper
+except ImportError:
+    ifc_wrapper = None
+
+HEADER_BYTES = 64 * 1024
+
+SCHEMA_RE = re.compile(rb"FILE_SCHEMA\s*\(\s*\(\s*'([^']*)'", re.IGNORECASE)
+# Ancré sur "=" (plus rapide que sur "#", très fréquent dans les références)
+ENTITY_RE = re.compile(rb"=\s*([A-Za-z][A-Za-z0-9_]*)\s*\(")
+ENTITY_ID_RE = re.compile(rb"#(\d+)\s*$")
+STRING_ATTR = rb"(\$|'(?:[^']|'')*')"
+GROUP_TYPES = ('IFCGROUP', 'IFCSYSTEM', 'IFCZONE', 'IFCBUILDINGSYSTEM', 'IFCDISTRIBUTIONSYSTEM',
+               'IFCDISTRIBUTIONCIRCUIT', 'IFCSTRUCTURALANALYSISMODEL', 'IFCSTRUCTURALLOADGROUP',
+               'IFCSTRUCTURALLOADCASE', 'IFCSTRUCTURALRESULTGROUP', 'IFCASSET', 'IFCINVENTORY',
+               'IFCBUILTSYSTEM')
+GROUP_TYPE_NAMES = frozenset(t.encode() for t in GROUP_TYPES)
+# Attributs de IfcGroup(GlobalId, OwnerHistory, Name, ...), à partir de la parenthèse ouvrante
+GROUP_ATTRS_RE = re.compile(rb"\(\s*" + STRING_ATTR + rb"\s*,\s*[^,]*,\s*" + STRING_ATTR)
+
+# Repli si le schéma ifcopenshell n'est pas disponible : familles courantes de IfcElement
+FALLBACK_ELEMENT_TYPES = {
+    'IFCWALL', 'IFCWALLSTANDARDCASE', 'IFCWALLELEMENTEDCASE', 'IFCSLAB', 'IFCSLABSTANDARDCASE',
+    'IFCSLABELEMENTEDCASE', 'IFCBEAM', 'IFCBEAMSTANDARDCASE', 'IFCCOLUMN', 'IFCCOLUMNSTANDARDCASE',
+    'IFCDOOR', 'IFCDOORSTANDARDCASE', 'IFCWINDOW', 'IFCWINDOWSTANDARDCASE', 'IFCROOF', 'IFCSTAIR',
+    'IFCSTAIRFLIGHT', 'IFCRAMP', 'IFCRAMPFLIGHT', 'IFCRAILING', 'IFCCOVERING', 'IFCCURTAINWALL',
+    'IFCPLATE', 'IFCPLATESTANDARDCASE', 'IFCMEMBER', 'IFCMEMBERSTANDARDCASE', 'IFCFOOTING', 'IFCPILE',
+    'IFCBUILDINGELEMENTPROXY', 'IFCCHIMNEY', 'IFCSHADINGDEVICE', 'IFCFURNISHINGELEMENT', 'IFCFURNITURE',
+    'IFCSYSTEMFURNITUREELEMENT', 'IFCFLOWTERMINAL', 'IFCFLOWSEGMENT', 'IFCFLOWFITTING',
+    'IFCFLOWCONTROLLER', 'IFCFLOWMOVINGDEVICE', 'IFCFLOWSTORAGEDEVICE', 'IFCFLOWTREATMENTDEVICE',
+    'IFCENERGYCONVERSIONDEVICE', 'IFCDISTRIBUTIONELEMENT', 'IFCDISTRIBUTIONCONTROLELEMENT',
+    'IFCDISTRIBUTIONFLOWELEMENT', 'IFCDUCTSEGMENT', 'IFCDUCTFITTING', 'IFCPIPESEGMENT', 'IFCPIPEFITTING',
+    'IFCCABLESEGMENT', 'IFCCABLECARRIERSEGMENT', 'IFCAIRTERMINAL', 'IFCLIGHTFIXTURE', 'IFCSANITARYTERMINAL',
+    'IFCVALVE', 'IFCPUMP', 'IFCFAN', 'IFCBOILER', 'IFCCHILLER', 'IFCUNITARYEQUIPMENT', 'IFCSPACEHEATER',
+    'IFCELEMENTASSEMBLY', 'IFCOPENINGELEMENT', 'IFCOPENINGSTANDARDCASE', 'IFCREINFORCINGBAR',
+    'IFCREINFORCINGMESH', 'IFCTENDON', 'IFCDISCRETEACCESSORY', 'IFCMECHANICALFASTENER', 'IFCFASTENER',
+    'IFCTRANSPORTELEMENT', 'IFCVIRTUALELEMENT', 'IFCGEOGRAPHICELEMENT', 'IFCCIVILELEMENT'
+}
+
+_subtypes_by_schema = {}
+
+
+def _subtypes(schema, root, fallback):
+    """Noms (en majuscules) de root et de tous ses sous-types pour un schéma"""
+    cache_key = ((schema or 'IFC4').upper(), root)
+    if cache_key in _subtypes_by_schema:
+        return _subtypes_by_schema[cache_key]
+
+    types = None
+    if ifc_wrapper is not None:
+        try:
+            declaration = ifc_wrapper.schema_by_name(cache_key[0]).declaration_by_name(root)
+            types, stack = set(), [declaration]
+            while stack:
+                decl = stack.pop()
+                types.add(decl.name().upper())
+                stack.extend(decl.subtypes())
+        except Exception:
+            types = None
+
+    if types is None:
+        types = fallback
+    _subtypes_by_schema[cache_key] = types
+    return types
+
+
+def element_types(schema):
+    """Noms (en majuscules) de IfcElement et de tous ses sous-types pour un schéma"""
+    return _subtypes(schema, 'IfcElement', FALLBACK_ELEMENT_TYPES)
+
+
+def group_types(schema=None):
+    """Noms (en majuscules) de IfcGroup et de tous ses sous-types pour un schéma"""
+    return _subtypes(schema, 'IfcGroup', frozenset(GROUP_TYPES))
+
+
+def decode_step_string(value):
+    """Décode une chaîne STEP ('' , \\X2\\...\\X0\\, \\X\\hh, \\S\\c) ; None pour $"""
+    if value is None or value == b'$':
+        return None
+    text = value[1:-1].decode('latin-1').replace("''", "'")
+
+    def x2(match):
+        hex_data = match.group(1)
+        return ''.join(chr(int(hex_data[i:i + 4], 16)) for i in range(0, len(hex_data), 4))
+
+    text = re.sub(r'\\X2\\([0-9A-Fa-f]+)\\X0\\', x2, text)
+    text = re.sub(r'\\X\\([0-9A-Fa-f]{2})', lambda m: chr(int(m.group(1), 16)), text)
+    text = re.sub(r'\\S\\(.)', lambda m: chr(ord(m.group(1)) + 128), text)
+    return text
+
+
+def scan_ifc_file(path, max_groups=500):
+    """
+    Produit le résumé d'un fichier IFC en un seul passage.
+
+    Args:
+        path (str): chemin du fichier .ifc
+        max_groups (int): nombre maximal de groupes détaillés
+
+    Returns:
+        dict: schéma, nombre d'entités (total et par type), groupes, éléments approximatifs
+    """
+    started = time.time()
+    size = os.path.getsize(path)
+    if size == 0:
+        return {'schema': None, 'entities_count': 0, 'entity_counts': {}, 'groups': [],
+                'groups_count': 0, 'approx_elements_count': 0, 'scan_seconds': 0.0}
+
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        schema_match = SCHEMA_RE.search(data, 0, min(size, HEADER_BYTES))
+        schema = schema_match.group(1).decode('ascii', 'replace').upper() if schema_match else None
+
+        # Comptage et relevé des groupes dans le même passage
+        raw_counts = Counter()
+        is_group = {}
+        groups = []
+        for match in ENTITY_RE.finditer(data):
+            name = match.group(1)
+            raw_counts[name] += 1
+            group = is_group.get(name)
+            if group is None:
+                group = is_group[name] = name.upper() in GROUP_TYPE_NAMES
+            if not group or len(groups) >= max_groups:
+                continue
+            attrs = GROUP_ATTRS_RE.match(data, match.end() - 1)
+            if attrs is None:
+                continue
+            id_match = ENTITY_ID_RE.search(data, max(0, match.start() - 24), match.start())
+            groups.append({
+                'id': int(id_match.group(1)) if id_match else None,
+                'type': name.decode('ascii').upper(),
+                'GlobalId': decode_step_string(attrs.group(1)),
+                'Name': decode_step_string(attrs.group(2)) or ''
+            })
+
+        counts = Counter()
+        for name, count in raw_counts.items():
+            counts[name.decode('ascii').upper()] += count
+
+    types = element_types(schema)
+    approx_elements = sum(count for name, count in counts.items() if name in types)
+
+    return {
+        'schema': schema,
+        'entities_count': sum(counts.values()),
+        'entity_counts': dict(counts.most_common()),
+        'groups': groups,
+        'groups_count': sum(counts.get(t, 0) for t in GROUP_TYPES),
+        'approx_elements_count': approx_elements,
+        'scan_seconds': round(time.time() - started, 3)
+    }
@@ -1,26 +1,206 @@
+"""
+Import en masse des coûts d'une phase depuis un fichier Excel / CSV
+
+- lecture en flux par blocs de COST_IMPORT_CHUNK_ROWS lignes : XLSX en mode
+  lecture seule d'openpyxl (pas de DOM du classeur), CSV par chunksize ;
+  la mémoire reste bornée quelle que soit la taille du fichier
+- colonnes GUID et COÛT détectées par leur nom, valeurs normalisées par
+  opérations pandas vectorisées (pas de boucle ligne à ligne) ; montants
+  « 1 234,50 », « 1.234,50 » et « 1,234.50 » acceptés : si '.' et ','
+  sont présents, le dernier est le séparateur décimal
+- GUIDs validés contre l'ensemble des éléments du projet, lus en une requête
+- chaque bloc est transmis à l'écriture (IngestPipeline) pendant la lecture
+  du suivant ; upsert_costs par lots, URIs déterministes : réimporter un
+  fichier ne crée pas de doublon
+- les éléments importés sont ensuite reliés aux années (year_links)
+"""
+
+import time
+from itertools import islice
+
+import numpy as np
 import pandas as pd
-from sparql_client import insert_excel_cost
 
-def import_uniformat_excel(path, phase="ConstructionCosts"):
-    df = pd.read_excel(path)
-    # Recherche des colonnes "GUID" et "COÛT" (ou "COUT" ou "COUTS" ou "COST")
-    guid_col = None
-    cost_col = None
-    for col in df.columns:
-        if "guid" in col.lower():
-            guid_col = col
-        if "cout" in col.lower() or "coût" in col.lower() or "cost" in col.lower():
-            cost_col = col
-    if guid_col is None or cost_col is None:
-        raise Exception(f"Colonnes GUID ou COÛT non trouvées ({df.columns.tolist()})")
-    inserted = []
-    for idx, row in df.iterrows():
-        guid = str(row[guid_col]).strip()
+from config import COST_IMPORT_BATCH_SIZE, COST_IMPORT_CHUNK_ROWS
+from ingest_pipeline import IngestPipeline
+from sparql_client import query_graphdb, upsert_costs, COST_CATEGORIES
+import year_links
+
+COST_COLUMN_KEYWORDS = ('cout', 'coût', 'cost')
+
+
+def _iter_xlsx_chunks(path, chunk_rows):
+    """Feuille active d'un XLSX en mode lecture seule (flux de lignes, pas de DOM)"""
+    from openpyxl import load_workbook
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(c) if c is not None else f'col_{i}' for i, c in enumerate(header)]
+        width = len(columns)
+        while True:
+            chunk = list(islice(rows, chunk_rows))
+            if not chunk:
+                return
+            # Lignes de longueur variable en mode lecture seule : alignées sur l'en-tête
+            yield pd.DataFrame([row[:width] + (None,) * (width - len(row)) for row in chunk], columns=columns)
+    finally:
+        workbook.close()
+
+
+def iter_cost_chunks(path, chunk_rows=COST_IMPORT_CHUNK_ROWS):
+    """Blocs de chunk_rows lignes d'un fichier Excel ou CSV (séparateur détecté)"""
+    lowered = path.lower()
+    if lowered.endswith('.xlsx'):
+        yield from _iter_xlsx_chunks(path, chunk_rows)
+    elif lowered.endswith('.xls'):
+        # Ancien format binaire : pas de lecture en flux possible (xlrd)
+        df = pd.read_excel(path, dtype=str)
+        for start in range(0, len(df), chunk_rows):
+            yield df.iloc[start:start + chunk_rows]
+    else:
+        yield from pd.read_csv(path, dtype=str, sep=None, engine='python', chunksize=chunk_rows)
+
+
+def find_cost_columns(columns):
+    """Colonnes GUID et COÛT (ou COUT, COUTS, COST), None si absentes"""
+    guid_col = next((c for c in columns if 'guid' in str(c).lower()), None)
+    cost_col = next((c for c in columns if any(w in str(c).lower() for w in COST_COLUMN_KEYWORDS)), None)
+    return guid_col, cost_col
+
+
+def normalise_costs(df, guid_col, cost_col):
+    """
+    Normalise les colonnes GUID / coût (vectorisé).
+
+    Returns:
+        tuple: (DataFrame guid/cost valide, une ligne par GUID, la dernière l'emporte ;
+                nombre de lignes invalides ; nombre de doublons écartés)
+    """
+    guids = df[guid_col].fillna('').astype(str).str.strip()
+    raw_costs = (
+        df[cost_col].fillna('').astype(str)
+        .str.replace(r'[\s€$]', '', regex=True)
+        # '.' et ',' présents : le dernier est le séparateur décimal, l'autre celui des milliers
+        .str.replace(r'\.(?=[\d.]*,)', '', regex=True)  # 1.234,50 -> 1234,50
+        .str.replace(r',(?=[\d,]*\.)', '', regex=True)  # 1,234.50 -> 1234.50
+        .str.replace(',', '.', regex=False)
+    )
+    costs = pd.to_numeric(raw_costs, errors='coerce')
+
+    empty = (guids == '') | guids.str.lower().isin(['nan', 'none'])
+    valid = ~empty & np.isfinite(costs)
+    # Lignes entièrement vides (fin de tableau) : ni valides ni invalides
+    blank = empty & (raw_costs == '')
+    invalid = int((~valid & ~blank).sum())
+
+    table = pd.DataFrame({'guid': guids[valid], 'cost': costs[valid].astype(float)})
+    deduplicated = table.drop_duplicates('guid', keep='last')
+    return deduplicated, invalid, len(table) - len(deduplicated)
+
+
+def existing_elements():
+    """{GUID: URI} de tous les éléments du projet courant (une seule requête)"""
+    rows = query_graphdb("""
+    PREFIX wlc: <http://www.semanticweb.org/adamy/ontologies/2025/WLCONTO#>
+    SELECT ?elem ?guid WHERE { ?elem wlc:globalId ?guid . }
+    """)
+    return {row['guid']: row['elem'] for row in rows}
+
+
+def import_phase_costs(path, phase, batch_size=COST_IMPORT_BATCH_SIZE, chunk_rows=COST_IMPORT_CHUNK_ROWS):
+    """
+    Importe les coûts d'une phase depuis un fichier Excel / CSV, en flux.
+
+    Args:
+        path (str): fichier à importer
+        phase (str): catégorie de coût (voir COST_CATEGORIES)
+        batch_size (int): lignes par requête DELETE/INSERT
+        chunk_rows (int): lignes lues par bloc
+
+    Returns:
+        dict: compteurs rows / inserted / unknown / invalid / duplicates et durées
+    """
+    if phase not in COST_CATEGORIES:
+        raise ValueError(f"Phase invalide ({phase})")
+    started = time.time()
+
+    elements = existing_elements()
+    counts = {'rows': 0, 'invalid': 0, 'duplicates': 0, 'unknown': 0, 'chunks': 0}
+    unknown_sample = []
+    seen = set()  # GUIDs connus déjà importés (borné par la taille du modèle)
+
+    def batches():
+        columns = None
+        for chunk in iter_cost_chunks(path, chunk_rows):
+            if columns is None:
+                columns = find_cost_columns(chunk.columns)
+                if None in columns:
+                    raise ValueError(f"Colonnes GUID ou COÛT non trouvées ({chunk.columns.tolist()})")
+            table, invalid, duplicates = normalise_costs(chunk, *columns)
+            counts['chunks'] += 1
+            counts['rows'] += len(chunk)
+            counts['invalid'] += invalid
+            counts['duplicates'] += duplicates
+
+            known = table['guid'].isin(elements.keys())
+            unknown = table.loc[~known, 'guid']
+            counts['unknown'] += len(unknown)
+            if len(unknown_sample) < 100:
+                unknown_sample.extend(unknown.head(100 - len(unknown_sample)).tolist())
+            table = table[known]
+
+            repeated = table['guid'].isin(seen)
+            counts['duplicates'] += int(repeated.sum())
+            seen.update(table['guid'].tolist())
+
+            rows = [
+                (elements[guid], cost, phase, None)
+                for guid, cost in zip(table['guid'].tolist(), table['cost'].tolist())
+            ]
+            for i in range(0, len(rows), batch_size):
+                yield rows[i:i + batch_size]
+
+    # Un seul thread d'écriture : les lots sont écrits dans l'ordre du fichier
+    # (pour un GUID répété, la dernière ligne l'emporte) pendant la lecture des suivants
+    pipeline = IngestPipeline(lambda rows: upsert_costs(rows, batch_size=batch_size), workers=1)
+    stats = pipeline.run(batches())
+
+    year_link_stats = None
+    if seen:
+        # Reliaison limitée aux éléments importés ; une erreur n'annule pas l'import
         try:
-            cost = float(row[cost_col])
-        except Exception:
-            continue
-        if guid and cost:
-            insert_excel_cost(guid, cost)
-            inserted.append((guid, cost))
-    return {"inserted": inserted, "total": len(inserted)}
+            year_link_stats = year_links.relink_costs_to_years(elements=[elements[guid] for guid in seen])
+        except Exception as e:
+            print(f"⚠️ Erreur lors de la reliaison des coûts aux années: {str(e)}")
+
+    print(f"💰 Import {phase}: {stats['items_written']} coûts écrits, {counts['unknown']} GUIDs inconnus, "
+          f"{counts['invalid']} lignes invalides ({counts['chunks']} blocs, {time.time() - started:.2f}s)")
+    return {
+        'phase': phase,
+        'rows': counts['rows'],
+        'inserted': len(seen),
+        'written': stats['items_written'],
+        'unknown': counts['unknown'],
+        'invalid': counts['invalid'],
+        'duplicates': counts['duplicates'],
+        'unknown_guids': unknown_sample,
+        'chunks': counts['chunks'],
+        'write_seconds': stats['write_seconds'],
+        'year_links': year_link_stats,
+        'total_seconds': round(time.time() - started, 3)
+    }
+
+
+def import_uniformat_excel(path, phase="ConstructionCosts"):
+    """
+    Import d'un tableau Uniformat (GUID / coût) : même importeur que /upload-phase-costs.
+
+    'total' (éléments importés) est conservé pour les clients de /upload-uniformat ;
+    'inserted' est désormais ce même nombre, et non plus la liste des paires (GUID, coût).
+    """
+    result = import_phase_costs(path, phase)
+    result['total'] = result['inserted']
+    return result
@@ -0,0 +1,277 @@
+"""
+Upload IFC par morceaux, reprenable
+
+Protocole :
+    POST   /upload-ifc/init                 {filename, size, sha256?}  -> session (ou reprise)
+    PUT    /upload-ifc/<id>/chunk?offset=N  corps binaire du morceau (en-tête X-Chunk-Sha256 optionnel)
+    GET    /upload-ifc/<id>                 progression (octets reçus) pour reprendre après coupure
+    POST   /upload-ifc/<id>/finalize        {sha256?} -> vérification taille/empreinte puis activation
+    DELETE /upload-ifc/<id>                 abandon
+
+Chaque session est un fichier .part écrit au fil de l'eau et un fichier
+JSON de métadonnées dans IFC_UPLOAD_SESSIONS_DIR : une session survit à
+une coupure réseau comme à un redémarrage du serveur. Les morceaux d'une
+session sont écrits un à la fois, y compris entre processus (verrou de
+fichier, voir file_lock).
+"""
+
+import hashlib
+import json
+import os
+import threading
+import uuid
+from datetime import datetime
+
+from flask import jsonify, request
+
+from config import IFC_UPLOAD_SESSIONS_DIR, IFC_UPLOAD_CHUNK_SIZE, IFC_UPLOAD_MAX_CHUNK_SIZE
+from file_lock import FileLock
+from ifc_workspace import file_hash, workspace_path
+
+# Un verrou par session : les morceaux d'une même session sont écrits un à la fois
+_session_locks = {}
+_session_locks_guard = threading.Lock()
+
+
+def _session_lock(upload_id):
+    with _session_locks_guard:
+        lock = _session_locks.get(upload_id)
+        if lock is None:
+            lock = _session_locks[upload_id] = FileLock(_session_lock_path(upload_id))
+        return lock
+
+
+def _session_paths(upload_id):
+    base = os.path.join(IFC_UPLOAD_SESSIONS_DIR, upload_id)
+    return base + '.json', base + '.part'
+
+
+def _session_lock_path(upload_id):
+    return os.path.join(IFC_UPLOAD_SESSIONS_DIR, upload_id + '.lock')
+
+
+def _valid_upload_id(upload_id):
+    try:
+        return uuid.UUID(upload_id).hex == upload_id
+    except ValueError:
+        return False
+
+
+def load_session(upload_id):
+    """Métadonnées d'une session, avec les octets réellement présents sur disque"""
+    if not _valid_upload_id(upload_id):
+        return None
+    meta_path, part_path = _session_paths(upload_id)
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path, 'r', encoding='utf-8') as f:
+        session = json.load(f)
+    session['received'] = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    return session
+
+
+def save_session(session):
+    meta_path, _ = _session_paths(session['upload_id'])
+    tmp_path = meta_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(session, f)
+    os.replace(tmp_path, meta_path)
+
+
+def delete_session(upload_id):
+    # Appelé verrou pris : un processus en attente trouve ensuite la session absente
+    for path in (*_session_paths(upload_id), _session_lock_path(upload_id)):
+        if os.path.exists(path):
+            os.unlink(path)
+    with _session_locks_guard:
+        _session_locks.pop(upload_id, None)
+
+
+def find_resumable_session(filename, size, sha256=None):
+    """Retrouve une session inachevée pour le même fichier (nom, taille, empreinte)"""
+    for entry in os.listdir(IFC_UPLOAD_SESSIONS_DIR):
+        if not entry.endswith('.json'):
+            continue
+        session = load_session(entry[:-5])
+        if not session:
+            continue
+        if session['filename'] == filename and session['size'] == size and session.get('sha256') == sha256:
+            return session
+    return None
+
+
+def session_status(session):
+    """Représentation JSON d'une session (progression incluse)"""
+    size = session['size']
+    return {
+        'upload_id': session['upload_id'],
+        'filename': session['filename'],
+        'size': size,
+        'received': session['received'],
+        'progress': round(session['received'] / size * 100, 1) if size else 100.0,
+        'chunk_size': session['chunk_size'],
+        'complete': session['received'] == size
+    }
+
+
+def register_upload_routes(app, activate_ifc_file):
+    """
+    Enregistre les routes d'upload par morceaux.
+
+    Args:
+        app: application Flask
+        activate_ifc_file (callable): (filename, path, sha256, size) -> dict,
+            appelée une fois le fichier complet et vérifié
+    """
+
+    @app.route('/upload-ifc/init', methods=['POST'])
+    def init_chunked_upload():
+        """Ouvre une session d'upload, ou reprend la session inachevée du même fichier"""
+        try:
+            data = request.get_json() or {}
+            filename = (data.get('filename') or '').strip()
+            size = data.get('size')
+            sha256 = (data.get('sha256') or '').lower() or None
+
+            if not filename:
+                return jsonify({'error': 'Nom de fichier requis'}), 400
+            if not filename.lower().endswith('.ifc'):
+                return jsonify({'error': 'Le fichier doit être au format IFC'}), 400
+            if not isinstance(size, int) or size <= 0:
+                return jsonify({'error': 'Taille du fichier invalide'}), 400
+
+            session = find_resumable_session(filename, size, sha256)
+            if session:
+                print(f"🔁 Reprise de l'upload {session['upload_id']} ({session['received']}/{size} octets)")
+                return jsonify({'success': True, 'resumed': True, **session_status(session)})
+
+            session = {
+                'upload_id': uuid.uuid4().hex,
+                'filename': filename,
+                'size': size,
+                'sha256': sha256,
+                'chunk_size': IFC_UPLOAD_CHUNK_SIZE,
+                'created_at': datetime.now().isoformat()
+            }
+            save_session(session)
+            open(_session_paths(session['upload_id'])[1], 'wb').close()
+            session['received'] = 0
+
+            print(f"📤 Nouvelle session d'upload {session['upload_id']} pour {filename} ({size} octets)")
+            return jsonify({'success': True, 'resumed': False, **session_status(session)})
+
+        except Exception as e:
+            return jsonify({'error': f'Erreur lors de l\'initialisation de l\'upload: {str(e)}'}), 500
+
+    @app.route('/upload-ifc/<upload_id>', methods=['GET'])
+    def get_chunked_upload_status(upload_id):
+        """Progression d'une session (offset de reprise)"""
+        session = load_session(upload_id)
+        if not session:
+            return jsonify({'error': 'Session d\'upload introuvable'}), 404
+        return jsonify(session_status(session))
+
+    @app.route('/upload-ifc/<upload_id>/chunk', methods=['PUT', 'POST'])
+    def append_upload_chunk(upload_id):
+        """Ajoute un morceau à la position attendue (offset = octets déjà reçus)"""
+        # Identifiant vérifié avant de créer un verrou (pas de verrou pour un identifiant arbitraire)
+        if not _valid_upload_id(upload_id):
+            return jsonify({'error': 'Session d\'upload introuvable'}), 404
+        try:
+            with _session_lock(upload_id):
+                session = load_session(upload_id)
+                if not session:
+                    return jsonify({'error': 'Session d\'upload introuvable'}), 404
+
+                offset = request.args.get('offset', type=int)
+                if offset is None or offset != session['received']:
+                    # Le client reprend à partir de l'offset renvoyé
+                    return jsonify({
+                        'error': 'Offset inattendu',
+                        'expected_offset': session['received']
+                    }), 409
+
+                length = request.content_length
+                if not length:
+                    return jsonify({'error': 'Morceau vide'}), 400
+                if length > IFC_UPLOAD_MAX_CHUNK_SIZE:
+                    return jsonify({'error': f'Morceau trop volumineux (max {IFC_UPLOAD_MAX_CHUNK_SIZE} octets)'}), 413
+                if offset + length > session['size']:
+                    return jsonify({'error': 'Le morceau dépasse la taille déclarée du fichier'}), 400
+
+                # Morceau borné en taille : il est vérifié avant d'être ajouté au fichier
+                chunk = request.stream.read(length)
+                if len(chunk) != length:
+                    return jsonify({
+                        'error': 'Morceau incomplet',
+                        'expected_offset': session['received']
+                    }), 400
+
+                expected_hash = (request.headers.get('X-Chunk-Sha256') or '').lower()
+                if expected_hash and hashlib.sha256(chunk).hexdigest() != expected_hash:
+                    return jsonify({
+                        'error': 'Empreinte du morceau invalide',
+                        'expected_offset': session['received']
+                    }), 422
+
+                _, part_path = _session_paths(upload_id)
+                with open(part_path, 'ab') as part:
+                    part.write(chunk)
+
+                session['received'] = offset + length
+                return jsonify(session_status(session))
+
+        except Exception as e:
+            return jsonify({'error': f'Erreur lors de l\'écriture du morceau: {str(e)}'}), 500
+
+    @app.route('/upload-ifc/<upload_id>/finalize', methods=['POST'])
+    def finalize_chunked_upload(upload_id):
+        """Vérifie taille et empreinte, puis active le fichier comme fichier IFC courant"""
+        if not _valid_upload_id(upload_id):
+            return jsonify({'error': 'Session d\'upload introuvable'}), 404
+        try:
+            with _session_lock(upload_id):
+                session = load_session(upload_id)
+                if not session:
+                    return jsonify({'error': 'Session d\'upload introuvable'}), 404
+
+                if session['received'] != session['size']:
+                    return jsonify({
+                        'error': 'Upload incomplet',
+                        'expected_offset': session['received'],
+                        **session_status(session)
+                    }), 409
+
+                data = request.get_json(silent=True) or {}
+                expected_hash = (data.get('sha256') or session.get('sha256') or '').lower()
+
+                _, part_path = _session_paths(upload_id)
+                sha256 = file_hash(part_path)
+                if expected_hash and sha256 != expected_hash:
+                    # Fichier corrompu : la session est abandonnée
+                    delete_session(upload_id)
+                    return jsonify({
+                        'error': 'Empreinte SHA-256 différente de celle attendue, upload à recommencer',
+                        'sha256': sha256
+                    }), 422
+
+                final_path = workspace_path(session['filename'])
+                os.replace(part_path, final_path)
+                delete_session(upload_id)
+
+                print(f"✅ Upload {upload_id} finalisé: {session['filename']} ({session['size']} octets)")
+                return jsonify(activate_ifc_file(session['filename'], final_path, sha256, session['size']))
+
+        except Exception as e:
+            return jsonify({'error': f'Erreur lors de la finalisation de l\'upload: {str(e)}'}), 500
+
+    @app.route('/upload-ifc/<upload_id>', methods=['DELETE'])
+    def abort_chunked_upload(upload_id):
+        """Abandonne une session et supprime les données reçues"""
+        if not _valid_upload_id(upload_id):
+            return jsonify({'error': 'Session d\'upload introuvable'}), 404
+        with _session_lock(upload_id):
+            if not load_session(upload_id):
+                return jsonify({'error': 'Session d\'upload introuvable'}), 404
+            delete_session(upload_id)
+        return jsonify({'success': True, 'message': 'Upload annulé'})
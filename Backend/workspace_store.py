@@ -0,0 +1,166 @@
+"""
+Espaces de travail IFC par projet / session, persistés sur disque
+
+Remplace le dictionnaire global unique ifc_storage : chaque espace de
+travail (identifié par projet ou session) possède son fichier IFC courant
+et ses métadonnées, enregistrés dans un fichier JSON. Plusieurs modèles
+peuvent ainsi être chargés et traités en parallèle, et plusieurs processus
+(workers gunicorn) partagent le même état : les lectures-écritures d'un
+espace sont sérialisées par un verrou de fichier (voir file_lock).
+
+Identification de l'espace de travail d'une requête, par priorité :
+    en-tête X-Workspace-Id, paramètre ?workspace=, cookie wlc_workspace,
+    sinon un nouvel identifiant (renvoyé en cookie)
+
+Les modèles ouverts restent partagés en mémoire par empreinte de contenu
+(voir ifc_cache, LRU) ; les résumés d'analyse rapide sont enregistrés par
+empreinte de fichier, indépendamment des espaces de travail.
+"""
+
+import copy
+import json
+import os
+import re
+import threading
+import uuid
+
+from config import IFC_WORKSPACES_DIR, IFC_SCANS_DIR
+from file_lock import FileLock
+
+WORKSPACE_HEADER = 'X-Workspace-Id'
+WORKSPACE_COOKIE = 'wlc_workspace'
+WORKSPACE_ID_RE = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+
+def empty_workspace():
+    return {'current_file': None, 'metadata': {}}
+
+
+def valid_workspace_id(workspace_id):
+    return bool(workspace_id) and bool(WORKSPACE_ID_RE.match(workspace_id))
+
+
+def new_workspace_id():
+    return uuid.uuid4().hex
+
+
+class WorkspaceStore:
+    """Espaces de travail enregistrés en JSON (écriture atomique, un verrou de fichier par espace)"""
+
+    def __init__(self, root=IFC_WORKSPACES_DIR):
+        self.root = root
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def _path(self, workspace_id):
+        return os.path.join(self.root, f"{workspace_id}.json")
+
+    def lock(self, workspace_id):
+        with self._locks_guard:
+            lock = self._locks.get(workspace_id)
+            if lock is None:
+                lock = self._locks[workspace_id] = FileLock(self._path(workspace_id) + '.lock')
+            return lock
+
+    def load(self, workspace_id):
+        """Espace de travail (vide s'il n'existe pas encore)"""
+        path = self._path(workspace_id)
+        if not os.path.exists(path):
+            return empty_workspace()
+        with open(path, 'r', encoding='utf-8') as f:
+            workspace = json.load(f)
+        workspace.setdefault('current_file', None)
+        workspace.setdefault('metadata', {})
+        return workspace
+
+    def _write(self, workspace_id, workspace):
+        path = self._path(workspace_id)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(workspace, f)
+        os.replace(tmp_path, path)
+
+    def save(self, workspace_id, workspace):
+        with self.lock(workspace_id):
+            self._write(workspace_id, workspace)
+
+    def update(self, workspace_id, changes):
+        """Applique des clés modifiées sur l'état enregistré (les autres clés sont conservées)"""
+        with self.lock(workspace_id):
+            workspace = self.load(workspace_id)
+            workspace.update(changes)
+            self._write(workspace_id, workspace)
+
+    def delete(self, workspace_id):
+        path = self._path(workspace_id)
+        with self.lock(workspace_id):
+            if os.path.exists(path):
+                os.unlink(path)
+
+    def list(self):
+        """Identifiants et fichiers courants de tous les espaces de travail"""
+        workspaces = []
+        for name in sorted(os.listdir(self.root)):
+            if not name.endswith('.json'):
+                continue
+            workspace_id = name[:-5]
+            current = self.load(workspace_id).get('current_file') or {}
+            workspaces.append({
+                'workspace_id': workspace_id,
+                'filename': current.get('filename'),
+                'uploaded_at': current.get('uploaded_at'),
+                'parsed': current.get('parsed', False),
+                'enriched': current.get('enriched', False)
+            })
+        return workspaces
+
+    def current_paths(self):
+        """Chemins absolus des fichiers courants de tous les espaces de travail"""
+        paths = set()
+        for name in os.listdir(self.root):
+            if name.endswith('.json'):
+                path = (self.load(name[:-5]).get('current_file') or {}).get('path')
+                if path:
+                    paths.add(os.path.abspath(path))
+        return paths
+
+
+class LoadedWorkspace(dict):
+    """Espace de travail chargé pour une requête ; enregistré seulement s'il a changé"""
+
+    def __init__(self, store, workspace_id):
+        super().__init__(store.load(workspace_id))
+        self.store = store
+        self.workspace_id = workspace_id
+        self._snapshot = copy.deepcopy(dict(self))
+
+    def save_if_changed(self):
+        changes = {key: value for key, value in self.items() if self._snapshot.get(key) != value}
+        if changes:
+            self.store.update(self.workspace_id, changes)
+            self._snapshot = copy.deepcopy(dict(self))
+
+
+def _scan_path(sha256):
+    return os.path.join(IFC_SCANS_DIR, f"{sha256}.json")
+
+
+def load_scan(sha256):
+    """Résumé d'analyse rapide d'un fichier (par empreinte), {} s'il est absent"""
+    path = _scan_path(sha256) if sha256 else None
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_scan(sha256, scan):
+    path = _scan_path(sha256)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(scan, f)
+    os.replace(tmp_path, path)
+
+
+# Instance partagée par l'application
+workspace_store = WorkspaceStore()
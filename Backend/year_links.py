@@ -0,0 +1,280 @@
+"""
+Liaison des coûts aux années de la période d'analyse (wlc:ForDate)
+
+Années matérialisées : <http://example.com/year/N> a wlc:Time ;
+wlc:hasDate N, pour N de 0 à la durée de vie du projet.
+
+Occurrences d'un coût (mêmes règles que /costs-by-year), N = durée du
+projet, L = durée de vie de l'élément (N par défaut) :
+- construction : année 0
+- exploitation : années 1 à N-1 (coût annuel)
+- maintenance : remplacements aux années L, 2L, ... < N
+- fin de vie : année N
+Une occurrence annuelle explicite (<élément>/cost/<catégorie>/<année>,
+voir sparql_client.cost_instance_uri) est reliée à sa seule année.
+
+Recalcul incrémental : l'empreinte de chaque élément (durée du projet,
+durée de vie, instances de coût et catégories) est enregistrée hors des
+données du projet, dans un fichier JSON par projet (YEAR_LINK_STATE_DIR) ;
+seuls les éléments dont l'empreinte a changé sont reliés à
+nouveau. Les appelants qui connaissent les éléments modifiés (mise à jour
+des coûts, durées de vie, import) les transmettent : seuls ces éléments
+sont lus (VALUES ?elem). Toutes les liaisons sont écrites en une seule mise à jour : les
+occurrences sont générées côté GraphDB à partir d'un calendrier
+(première année, dernière année, pas) par coût, la taille de la requête
+est donc proportionnelle au nombre de coûts modifiés et non au nombre
+de liaisons.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+from config import YEAR_LINK_STATE_DIR
+from file_lock import FileLock
+from project_graphs import current_project_id
+from sparql_client import query_graphdb, update_graphdb
+
+YEAR_BASE = "http://example.com/year/"
+PROJECT_URI = "http://example.com/ifc#Project"
+# Ancienne empreinte enregistrée sur l'élément : supprimée lors de la reliaison
+LEGACY_LINK_STATE = "http://example.com/year/linkState"
+DEFAULT_PROJECT_LIFESPAN = 50
+YEAR_LINK_BATCH_SIZE = 1000
+
+PREFIXES = """
+PREFIX wlc: <http://www.semanticweb.org/adamy/ontologies/2025/WLCONTO#>
+PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
+"""
+
+
+def year_uri(year):
+    return f"{YEAR_BASE}{int(year)}"
+
+
+def _to_years(value, default=None):
+    try:
+        years = int(float(value))
+    except (TypeError, ValueError):
+        return default
+    return years if years > 0 else default
+
+
+def project_lifespan():
+    rows = query_graphdb(f"""
+    {PREFIXES}
+    SELECT ?lifespan WHERE {{ <{PROJECT_URI}> wlc:hasDuration ?lifespan . }} LIMIT 1
+    """)
+    return _to_years(rows[0].get('lifespan') if rows else None, DEFAULT_PROJECT_LIFESPAN)
+
+
+def cost_schedule(category, project_years, element_years):
+    """
+    Calendrier des occurrences d'un coût : (première année, dernière année, pas),
+    None si le coût ne survient pas pendant la période.
+    """
+    if category == 'ConstructionCosts':
+        return 0, 0, 1
+    if category == 'OperationCosts':
+        return (1, project_years - 1, 1) if project_years > 1 else None
+    if category == 'MaintenanceCosts':
+        lifespan = element_years or project_years
+        return (lifespan, project_years - 1, lifespan) if lifespan < project_years else None
+    if category == 'EndOfLifeCosts':
+        return project_years, project_years, 1
+    return None
+
+
+def cost_year(element, cost, category):
+    """Année d'une occurrence annuelle <élément>/cost/<catégorie>/<année>, None pour un coût de base"""
+    prefix = f"{element}/cost/{category.lower()}/"
+    if cost.startswith(prefix) and cost[len(prefix):].isdigit():
+        return int(cost[len(prefix):])
+    return None
+
+
+def _state_path(project_id=None):
+    return os.path.join(YEAR_LINK_STATE_DIR, f"{project_id or current_project_id()}.json")
+
+
+def load_link_states(project_id=None):
+    """{URI élément: empreinte} des éléments reliés du projet"""
+    path = _state_path(project_id)
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_link_states(changes, removed=(), project_id=None):
+    """Enregistre les empreintes modifiées et oublie les éléments retirés (écriture atomique)"""
+    path = _state_path(project_id)
+    with FileLock(path + '.lock'):
+        states = load_link_states(project_id)
+        states.update(changes)
+        for uri in removed:
+            states.pop(uri, None)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(states, f)
+        os.replace(tmp_path, path)
+
+
+def forget_link_states(elements, project_id=None):
+    """Oublie les empreintes d'éléments supprimés (ils seront reliés à nouveau s'ils reviennent)"""
+    if elements:
+        save_link_states({}, removed=elements, project_id=project_id)
+
+
+def clear_link_states(project_id=None):
+    """Oublie toutes les empreintes du projet (réinitialisation)"""
+    path = _state_path(project_id)
+    with FileLock(path + '.lock'):
+        if os.path.exists(path):
+            os.unlink(path)
+
+
+def load_cost_elements(elements=None, batch_size=YEAR_LINK_BATCH_SIZE):
+    """
+    Éléments ayant des coûts : durée de vie et coûts (URI|catégorie).
+
+    Args:
+        elements (iterable, optional): URIs des éléments à lire (tous si None)
+    """
+    if elements is None:
+        return _load_cost_elements("")
+    elements = sorted(set(elements))
+    rows = []
+    for batch in _batches(elements, batch_size):
+        rows.extend(_load_cost_elements(f"VALUES ?elem {{ {' '.join(f'<{uri}>' for uri in batch)} }}"))
+    return rows
+
+
+def _load_cost_elements(values):
+    return query_graphdb(f"""
+    {PREFIXES}
+    SELECT ?elem (SAMPLE(?duration_) AS ?lifespan)
+           (GROUP_CONCAT(DISTINCT CONCAT(STR(?cost), "|", STRAFTER(STR(?category), "#")); separator=" ") AS ?costs)
+    WHERE {{
+      {values}
+      ?elem wlc:hasCost ?cost .
+      ?cost a ?category .
+      FILTER(?category IN (wlc:ConstructionCosts, wlc:OperationCosts, wlc:MaintenanceCosts, wlc:EndOfLifeCosts))
+      OPTIONAL {{ ?elem wlc:hasDuration ?duration_ . }}
+    }}
+    GROUP BY ?elem
+    """)
+
+
+def element_fingerprint(project_years, element_years, costs):
+    payload = json.dumps([project_years, element_years, sorted(costs)])
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def _batches(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def build_link_update(project_years, changed, batch_size=YEAR_LINK_BATCH_SIZE):
+    """
+    Mise à jour unique : années 0..N, suppression des anciennes liaisons des
+    éléments modifiés, nouvelles liaisons générées par calendrier.
+
+    Args:
+        changed: [(uri élément, [(uri coût, catégorie)], durée de vie)]
+    """
+    years = " ".join(
+        f'<{year_uri(n)}> a wlc:Time ; wlc:hasDate "{n}"^^xsd:decimal .' for n in range(project_years + 1)
+    )
+    statements = [f"INSERT DATA {{ {years} }}"]
+
+    for batch in _batches(changed, batch_size):
+        elements = " ".join(f"<{uri}>" for uri, _, _ in batch)
+        schedules = []
+        for uri, costs, element_years in batch:
+            for cost, category in costs:
+                year = cost_year(uri, cost, category)
+                if year is not None:
+                    schedule = (year, year, 1) if year <= project_years else None
+                else:
+                    schedule = cost_schedule(category, project_years, element_years)
+                if schedule is not None:
+                    first, last, step = schedule
+                    schedules.append(f"(<{cost}> {first} {last} {step})")
+        statements.append(f"""
+DELETE {{ ?cost wlc:ForDate ?year . }}
+WHERE {{
+  VALUES ?elem {{ {elements} }}
+  ?elem wlc:hasCost ?cost .
+  ?cost wlc:ForDate ?year .
+}}""")
+        statements.append(f"""
+DELETE {{ ?elem <{LEGACY_LINK_STATE}> ?old . }}
+WHERE {{
+  VALUES ?elem {{ {elements} }}
+  ?elem <{LEGACY_LINK_STATE}> ?old .
+}}""")
+        if schedules:
+            statements.append(f"""
+INSERT {{ ?cost wlc:ForDate ?year . }}
+WHERE {{
+  VALUES (?cost ?first ?last ?step) {{ {" ".join(schedules)} }}
+  ?year a wlc:Time ;
+        wlc:hasDate ?date .
+  FILTER(STRSTARTS(STR(?year), "{YEAR_BASE}"))
+  FILTER(?date >= ?first && ?date <= ?last && FLOOR((?date - ?first) / ?step) * ?step = ?date - ?first)
+}}""")
+    return PREFIXES + " ;\n".join(statements)
+
+
+def relink_costs_to_years(force=False, elements=None):
+    """
+    Relie les coûts du projet courant aux années (éléments modifiés seulement).
+
+    Args:
+        force (bool): relier à nouveau tous les éléments
+        elements (iterable, optional): URIs des éléments modifiés (tous les
+            éléments du projet si None)
+
+    Returns:
+        dict: durée du projet, éléments examinés / reliés, coûts reliés, durée
+    """
+    started = time.time()
+    project_years = project_lifespan()
+    requested = None if elements is None else set(elements)
+    states = load_link_states()
+    elements = load_cost_elements(requested)
+
+    changed = []
+    fingerprints = {}
+    costs_linked = 0
+    for row in elements:
+        element_years = _to_years(row.get('lifespan'))
+        costs = [tuple(item.rsplit('|', 1)) for item in (row.get('costs') or '').split() if '|' in item]
+        fingerprint = element_fingerprint(project_years, element_years, costs)
+        if not force and states.get(row['elem']) == fingerprint:
+            continue
+        changed.append((row['elem'], costs, element_years))
+        fingerprints[row['elem']] = fingerprint
+        costs_linked += len(costs)
+
+    # Éléments lus sans coût (ou absents) : leur empreinte n'est plus valable
+    found = {row['elem'] for row in elements}
+    removed = [uri for uri in (states if requested is None else requested) if uri not in found and uri in states]
+
+    if changed:
+        update_graphdb(build_link_update(project_years, changed))
+    if fingerprints or removed:
+        save_link_states(fingerprints, removed)
+    print(f"🔗 Reliaison des coûts aux années: {len(changed)}/{len(elements)} éléments modifiés, "
+          f"{costs_linked} coûts reliés ({time.time() - started:.2f}s)")
+    return {
+        'project_lifespan': project_years,
+        'elements': len(elements),
+        'relinked_elements': len(changed),
+        'costs_linked': costs_linked,
+        'total_seconds': round(time.time() - started, 3)
+    }
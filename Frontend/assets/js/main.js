@@ -92,7 +92,7 @@ function setupEventListeners() {
                 loadStakeholders().then(() => {
                     populateStakeholderSelector(appState.stakeholders || []);
                 });
-                loadElements().then(() => {
+                loadAllElements().then(() => {
                     populateElementSelector(appState.elements || []);
                     populateUniformatSelector(appState.elements || []);
                     console.log('✅ Sélecteurs mis à jour:', {
@@ -131,56 +131,100 @@ async function checkHealth() {
 }
 
 /**
- * Chargement des éléments IFC
+ * Chargement d'une page d'éléments IFC (filtres, tri et pagination côté serveur)
  */
-async function loadElements() {
-    setLoading(true);
+async function loadElements(options = {}) {
+    const silent = options.silent === true;
+    if (!silent) {
+        setLoading(true);
+    }
     
     try {
-        const response = await fetch(`${API_BASE_URL}/get-ifc-elements`);
+        const params = buildElementsQuery();
+        // Les listes de filtres ne changent qu'avec les données
+        if (!silent || !elementsGrid.facets) {
+            params.set('facets', '1');
+        }
+        
+        const response = await fetch(`${API_BASE_URL}/get-ifc-elements?${params}`);
         
         if (!response.ok) {
             throw new Error(`Erreur HTTP: ${response.status}`);
         }
         
-        const elements = await response.json();
-        appState.elements = elements;
+        const data = await response.json();
+        elementsGrid.total = data.total;
+        elementsGrid.page = data.page;
+        elementsGrid.pages = data.pages;
+        if (data.facets) {
+            elementsGrid.facets = data.facets;
+            updateGridFilterOptions();
+        }
         
-        displayElements(elements);
-        notifications.success(`${elements.length} éléments chargés`);
+        // Page demandée au-delà de la dernière (ex. après suppression ou filtrage)
+        if (data.pages > 0 && data.page > data.pages) {
+            elementsGrid.page = data.pages;
+            return loadElements({ silent: true });
+        }
+        
+        displayElements(data.elements);
+        if (!silent) {
+            notifications.success(`${data.total} éléments chargés`);
+        }
         
     } catch (error) {
         console.error('Erreur lors du chargement des éléments:', error);
         notifications.error('Erreur lors du chargement des éléments');
     } finally {
-        setLoading(false);
+        if (!silent) {
+            setLoading(false);
+        }
+    }
+}
+
+/**
+ * Chargement de la liste complète des éléments (sélecteurs des parties prenantes)
+ */
+async function loadAllElements() {
+    try {
+        const response = await fetch(`${API_BASE_URL}/get-ifc-elements`);
+        
+        if (!response.ok) {
+            throw new Error(`Erreur HTTP: ${response.status}`);
+        }
+        
+        appState.elements = await response.json();
+    } catch (error) {
+        console.error('Erreur lors du chargement des éléments:', error);
+        notifications.error('Erreur lors du chargement des éléments');
     }
+    return appState.elements;
 }
 
 /**
- * Affichage des éléments dans le tableau
+ * Affichage d'une page d'éléments dans le tableau
  */
 function displayElements(elements) {
-    // Stocker tous les éléments pour les fonctionnalités de filtrage
+    // Éléments de la page courante (aperçu des modifications en lot)
     allElements = elements;
     filteredElements = [...elements];
     
     const tbody = document.querySelector('#elements-table tbody');
     tbody.innerHTML = '';
     
+    const fragment = document.createDocumentFragment();
     elements.forEach(element => {
-        const row = createElementRow(element);
-        tbody.appendChild(row);
+        fragment.appendChild(createElementRow(element));
     });
+    tbody.appendChild(fragment);
     
-    // Initialiser les descriptions disponibles et les fonctionnalités
-    updateDescriptionsList();
     updateSelectionCount();
+    updatePaginationControls();
     
     // Mettre à jour le compteur dans l'interface
     const elementsTab = document.querySelector('#nav-elements-tab');
     if (elementsTab) {
-        elementsTab.textContent = `Éléments (${elements.length})`;
+        elementsTab.textContent = `Éléments (${elementsGrid.total})`;
     }
 }
 
@@ -203,7 +247,8 @@ function createElementRow(element) {
     row.innerHTML = `
         <td>
             <input type="checkbox" class="element-checkbox" data-guid="${element.GlobalId}" 
-                   onchange="updateSelectionCount()">
+                   ${selectedGuids.has(element.GlobalId) ? 'checked' : ''}
+                   onchange="toggleElementSelection(this)">
         </td>
         <td class="text-truncate" style="max-width: 200px;" title="${element.GlobalId || ''}">${element.GlobalId || ''}</td>
         <td class="text-truncate" style="max-width: 120px;" title="${element.IfcClass || ''}">${isGroup ? '<i class="fas fa-layer-group text-primary me-1"></i>' : ''}${element.IfcClass || ''}</td>
@@ -933,9 +978,133 @@ function showStatusMessage(elementId, message, type = 'info') {
 // FONCTIONNALITÉS DE FILTRAGE ET MODIFICATION EN LOT
 // ================================
 
-let allElements = []; // Stockage de tous les éléments
+let allElements = []; // Éléments de la page affichée
 let filteredElements = []; // Éléments filtrés
-let selectedGuids = new Set(); // GUIDs sélectionnés
+let selectedGuids = new Set(); // GUIDs sélectionnés (conservés d'une page à l'autre)
+
+// État du tableau paginé (les filtres et le tri sont appliqués par le serveur)
+const elementsGrid = {
+    page: 1,
+    pageSize: 100,
+    pages: 0,
+    total: 0,
+    sort: null,
+    order: 'asc',
+    facets: null,
+    filters: {
+        q: '',
+        descriptions: [],
+        uniformat: '',
+        ifcClass: '',
+        material: '',
+        lifespanMin: '',
+        lifespanMax: '',
+        hasCost: ''
+    }
+};
+
+/**
+ * Construit les paramètres de /get-ifc-elements à partir de l'état du tableau
+ */
+function buildElementsQuery() {
+    const params = new URLSearchParams();
+    const filters = elementsGrid.filters;
+    
+    params.set('page', elementsGrid.page);
+    params.set('page_size', elementsGrid.pageSize);
+    if (elementsGrid.sort) {
+        params.set('sort', elementsGrid.sort);
+        params.set('order', elementsGrid.order);
+    }
+    if (filters.q) params.set('q', filters.q);
+    filters.descriptions.forEach(desc => params.append('description', desc));
+    if (filters.uniformat) params.set('uniformat', filters.uniformat);
+    if (filters.ifcClass) params.set('ifc_class', filters.ifcClass);
+    if (filters.material) params.set('material', filters.material);
+    if (filters.lifespanMin !== '') params.set('lifespan_min', filters.lifespanMin);
+    if (filters.lifespanMax !== '') params.set('lifespan_max', filters.lifespanMax);
+    if (filters.hasCost) params.set('has_cost', filters.hasCost);
+    
+    return params;
+}
+
+/**
+ * Recharge le tableau depuis la première page (après un changement de filtre)
+ */
+function reloadElementsFromFirstPage() {
+    elementsGrid.page = 1;
+    loadElements({ silent: true });
+}
+
+/**
+ * Change de page dans le tableau des éléments
+ */
+function changeElementsPage(delta) {
+    const target = elementsGrid.page + delta;
+    if (target < 1 || target > elementsGrid.pages) {
+        return;
+    }
+    elementsGrid.page = target;
+    loadElements({ silent: true });
+}
+
+/**
+ * Trie le tableau par colonne (clic sur l'en-tête, second clic = ordre inverse)
+ */
+function sortElementsBy(column) {
+    if (elementsGrid.sort === column) {
+        elementsGrid.order = elementsGrid.order === 'asc' ? 'desc' : 'asc';
+    } else {
+        elementsGrid.sort = column;
+        elementsGrid.order = 'asc';
+    }
+    
+    document.querySelectorAll('#elements-table th.sortable').forEach(th => {
+        if (th.dataset.sort === elementsGrid.sort) {
+            th.dataset.order = elementsGrid.order;
+        } else {
+            delete th.dataset.order;
+        }
+    });
+    
+    reloadElementsFromFirstPage();
+}
+
+/**
+ * Met à jour les informations et boutons de pagination
+ */
+function updatePaginationControls() {
+    const info = document.getElementById('elements-page-info');
+    if (info) {
+        const start = elementsGrid.total === 0 ? 0 : (elementsGrid.page - 1) * elementsGrid.pageSize + 1;
+        const end = Math.min(elementsGrid.page * elementsGrid.pageSize, elementsGrid.total);
+        info.textContent = `${start}–${end} sur ${elementsGrid.total} élément(s) · page ${elementsGrid.page}/${Math.max(elementsGrid.pages, 1)}`;
+    }
+    
+    const prevBtn = document.getElementById('elements-prev-page');
+    const nextBtn = document.getElementById('elements-next-page');
+    if (prevBtn) prevBtn.disabled = elementsGrid.page <= 1;
+    if (nextBtn) nextBtn.disabled = elementsGrid.page >= elementsGrid.pages;
+}
+
+/**
+ * Remplit les listes de filtres (classes IFC, matériaux, descriptions) à partir des facettes serveur
+ */
+function updateGridFilterOptions() {
+    const facets = elementsGrid.facets || {};
+    
+    const fillSelect = (id, values, emptyLabel, current) => {
+        const select = document.getElementById(id);
+        if (!select) return;
+        select.innerHTML = `<option value="">${emptyLabel}</option>` + (values || []).map(value =>
+            `<option value="${value}"${value === current ? ' selected' : ''}>${value}</option>`
+        ).join('');
+    };
+    
+    fillSelect('grid-filter-ifc-class', facets.ifc_classes, 'Toutes', elementsGrid.filters.ifcClass);
+    fillSelect('grid-filter-material', facets.materials, 'Tous', elementsGrid.filters.material);
+    updateDescriptionsList();
+}
 
 /**
  * Initialise les fonctionnalités de filtrage
@@ -953,6 +1122,39 @@ function initializeFilteringFeatures() {
         descriptionSelector.addEventListener('change', updateTableVisibility);
     }
 
+    // Filtres du tableau (appliqués côté serveur)
+    const gridFilters = {
+        'grid-filter-uniformat': 'uniformat',
+        'grid-filter-ifc-class': 'ifcClass',
+        'grid-filter-material': 'material',
+        'grid-filter-lifespan-min': 'lifespanMin',
+        'grid-filter-lifespan-max': 'lifespanMax',
+        'grid-filter-has-cost': 'hasCost'
+    };
+    Object.entries(gridFilters).forEach(([id, key]) => {
+        const input = document.getElementById(id);
+        if (!input) return;
+        const applyFilter = () => {
+            elementsGrid.filters[key] = input.value.trim();
+            reloadElementsFromFirstPage();
+        };
+        input.addEventListener(input.tagName === 'SELECT' ? 'change' : 'input', debounce(applyFilter, 300));
+    });
+
+    // Taille de page
+    const pageSizeSelect = document.getElementById('elements-page-size');
+    if (pageSizeSelect) {
+        pageSizeSelect.addEventListener('change', () => {
+            elementsGrid.pageSize = parseInt(pageSizeSelect.value, 10) || 100;
+            reloadElementsFromFirstPage();
+        });
+    }
+
+    // Tri par clic sur les en-têtes
+    document.querySelectorAll('#elements-table th.sortable').forEach(th => {
+        th.addEventListener('click', () => sortElementsBy(th.dataset.sort));
+    });
+
     // Gestionnaire pour le checkbox "Sélectionner tout"
     const selectAllCheckbox = document.getElementById('select-all-checkbox');
     if (selectAllCheckbox) {
@@ -970,78 +1172,42 @@ function initializeFilteringFeatures() {
  * Met à jour la liste des descriptions disponibles
  */
 function updateDescriptionsList() {
-    const descriptions = [...new Set(allElements.map(el => el.UniformatDesc).filter(Boolean))].sort();
+    const filterInput = document.getElementById('description-filter');
+    const filterText = filterInput ? filterInput.value.toLowerCase().trim() : '';
+    const descriptions = ((elementsGrid.facets && elementsGrid.facets.descriptions) || [])
+        .filter(desc => !filterText || desc.toLowerCase().includes(filterText));
     const selector = document.getElementById('description-selector');
     
     if (selector) {
+        const selected = new Set(elementsGrid.filters.descriptions);
         selector.innerHTML = descriptions.map(desc => 
-            `<option value="${desc}" title="${desc}">${desc.length > 50 ? desc.substring(0, 50) + '...' : desc}</option>`
+            `<option value="${desc}" title="${desc}"${selected.has(desc) ? ' selected' : ''}>${desc.length > 50 ? desc.substring(0, 50) + '...' : desc}</option>`
         ).join('');
     }
 }
 
 /**
- * Filtre les éléments par description
+ * Filtre les éléments par description (recherche côté serveur)
  */
 function filterByDescription() {
-    const filterText = document.getElementById('description-filter').value.toLowerCase().trim();
-    const selector = document.getElementById('description-selector');
+    const filterText = document.getElementById('description-filter').value.trim();
     
-    if (!filterText) {
-        // Si pas de filtre, montrer toutes les descriptions
-        updateDescriptionsList();
-        filteredElements = [...allElements];
-    } else {
-        // Filtrer les descriptions
-        const filteredDescriptions = [...new Set(allElements
-            .map(el => el.UniformatDesc)
-            .filter(desc => desc && desc.toLowerCase().includes(filterText))
-        )].sort();
-        
-        selector.innerHTML = filteredDescriptions.map(desc => 
-            `<option value="${desc}" title="${desc}">${desc.length > 50 ? desc.substring(0, 50) + '...' : desc}</option>`
-        ).join('');
-        
-        // Filtrer les éléments
-        filteredElements = allElements.filter(el => 
-            el.UniformatDesc && el.UniformatDesc.toLowerCase().includes(filterText)
-        );
-    }
-    
-    updateTableVisibility();
+    // Restreindre les descriptions proposées puis relancer la recherche
+    updateDescriptionsList();
+    elementsGrid.filters.q = filterText;
+    reloadElementsFromFirstPage();
 }
 
 /**
- * Met à jour la visibilité du tableau selon les sélections
+ * Applique les descriptions sélectionnées comme filtre du tableau
  */
 function updateTableVisibility() {
     const selector = document.getElementById('description-selector');
-    const selectedDescriptions = Array.from(selector.selectedOptions).map(opt => opt.value);
-    
-    const table = document.getElementById('elements-table');
-    const rows = table.querySelectorAll('tbody tr');
-    
-    rows.forEach(row => {
-        const description = row.dataset.description;
-        const shouldShow = selectedDescriptions.length === 0 || selectedDescriptions.includes(description);
-        
-        if (shouldShow) {
-            row.style.display = '';
-            row.classList.remove('d-none');
-        } else {
-            row.style.display = 'none';
-            row.classList.add('d-none');
-            
-            // Décocher si caché
-            const checkbox = row.querySelector('.element-checkbox');
-            if (checkbox && checkbox.checked) {
-                checkbox.checked = false;
-                selectedGuids.delete(checkbox.dataset.guid);
-            }
-        }
-    });
+    elementsGrid.filters.descriptions = Array.from(selector.selectedOptions).map(opt => opt.value);
     
-    updateSelectionCount();
+    // Les lignes de la page suivante seront différentes : vider la sélection
+    deselectAll();
+    reloadElementsFromFirstPage();
 }
 
 /**
@@ -1050,30 +1216,47 @@ function updateTableVisibility() {
 function clearDescriptionFilter() {
     document.getElementById('description-filter').value = '';
     document.getElementById('description-selector').selectedIndex = -1;
+    elementsGrid.filters.q = '';
+    elementsGrid.filters.descriptions = [];
     updateDescriptionsList();
-    filteredElements = [...allElements];
-    updateTableVisibility();
+    reloadElementsFromFirstPage();
 }
 
 /**
- * Sélectionne tous les éléments filtrés visibles
+ * Sélectionne tous les éléments filtrés, toutes pages confondues
+ * (GUIDs demandés au serveur avec les mêmes filtres que le tableau)
  */
-function selectAllFiltered() {
-    const table = document.getElementById('elements-table');
-    const visibleRows = table.querySelectorAll('tbody tr:not(.d-none)');
-    
-    visibleRows.forEach(row => {
-        if (row.style.display !== 'none') {
-            const checkbox = row.querySelector('.element-checkbox');
-            if (checkbox) {
-                checkbox.checked = true;
-                selectedGuids.add(checkbox.dataset.guid);
-            }
+async function selectAllFiltered() {
+    const params = buildElementsQuery();
+    ['page', 'page_size', 'sort', 'order'].forEach(name => params.delete(name));
+    params.set('fields', 'guid');
+    
+    try {
+        const response = await fetch(`${API_BASE_URL}/get-ifc-elements?${params}`);
+        if (!response.ok) {
+            throw new Error(`Erreur HTTP: ${response.status}`);
         }
-    });
+        const data = await response.json();
+        data.guids.forEach(guid => selectedGuids.add(guid));
+        notifications.success(`${data.total} élément(s) filtré(s) sélectionné(s)`);
+    } catch (error) {
+        console.error('Erreur lors de la sélection des éléments filtrés:', error);
+        notifications.error('Erreur lors de la sélection des éléments filtrés');
+    }
     
     updateSelectionCount();
-    updateBulkApplyButton();
+}
+
+/**
+ * Coche / décoche un élément (la sélection des autres pages est conservée)
+ */
+function toggleElementSelection(checkbox) {
+    if (checkbox.checked) {
+        selectedGuids.add(checkbox.dataset.guid);
+    } else {
+        selectedGuids.delete(checkbox.dataset.guid);
+    }
+    updateSelectionCount();
 }
 
 /**
@@ -1110,14 +1293,11 @@ function toggleSelectAll() {
 }
 
 /**
- * Met à jour le compteur de sélection
+ * Met à jour le compteur de sélection et les cases de la page affichée
  */
 function updateSelectionCount() {
-    // Mettre à jour le Set avec les checkboxes actuellement cochées
-    selectedGuids.clear();
-    const checkedBoxes = document.querySelectorAll('.element-checkbox:checked');
-    checkedBoxes.forEach(checkbox => {
-        selectedGuids.add(checkbox.dataset.guid);
+    document.querySelectorAll('#elements-table .element-checkbox[data-guid]').forEach(checkbox => {
+        checkbox.checked = selectedGuids.has(checkbox.dataset.guid);
     });
     
     const count = selectedGuids.size;
@@ -1168,12 +1348,13 @@ function showPreview() {
         return;
     }
     
-    const selectedElements = allElements.filter(el => selectedGuids.has(el.GlobalId));
+    // Aperçu limité aux éléments de la page affichée ; la sélection peut couvrir d'autres pages
+    const selectedElements = allElements.filter(el => selectedGuids.has(el.GlobalId)).slice(0, 5);
     const message = `Vous allez modifier le matériau de ${selectedGuids.size} élément(s) :\n\n` +
-                   selectedElements.slice(0, 5).map(el => 
+                   selectedElements.map(el => 
                        `• ${el.GlobalId} - ${el.UniformatDesc || 'Sans description'}`
                    ).join('\n') +
-                   (selectedElements.length > 5 ? `\n... et ${selectedElements.length - 5} autres` : '') +
+                   (selectedGuids.size > selectedElements.length ? `\n... et ${selectedGuids.size - selectedElements.length} autres` : '') +
                    `\n\nNouveau matériau : "${newMaterial}"`;
     
     if (confirm(message)) {
@@ -2248,20 +2429,14 @@ async function uploadIfc() {
         return;
     }
     
-    setLoading(true, 'Upload du fichier IFC en stockage temporaire...');
+    setLoading(true, 'Upload du fichier IFC...');
     
     try {
-        const formData = new FormData();
-        formData.append('file', file);
-        
-        const response = await fetch(`${API_BASE_URL}/upload-ifc-temp`, {
-            method: 'POST',
-            body: formData
+        const data = await uploadIfcInChunks(file, progress => {
+            setLoading(true, `Upload du fichier IFC... ${progress}%`);
         });
         
-        const data = await response.json();
-        
-        if (response.ok && data.success) {
+        if (data.success) {
             notifications.success(`Fichier ${data.filename} uploadé (${data.size_mb} MB)`);
             updateIfcStatus(); // Mettre à jour le statut
             enableIfcButtons(); // Activer les boutons suivants
@@ -2270,24 +2445,145 @@ async function uploadIfc() {
         }
     } catch (error) {
         console.error('Erreur:', error);
-        notifications.error('Erreur lors de l\'upload du fichier');
+        notifications.error(`Erreur lors de l'upload du fichier: ${error.message}`);
     } finally {
         setLoading(false);
     }
 }
 
+/**
+ * SHA-256 hexadécimal d'un morceau (null si WebCrypto indisponible, ex. HTTP non local)
+ */
+async function sha256Hex(buffer) {
+    if (!window.crypto || !window.crypto.subtle) {
+        return null;
+    }
+    const digest = await window.crypto.subtle.digest('SHA-256', buffer);
+    return Array.from(new Uint8Array(digest)).map(b => b.toString(16).padStart(2, '0')).join('');
+}
+
+/**
+ * Upload IFC par morceaux (init / morceaux / finalisation), reprenable :
+ * une session inachevée pour le même fichier reprend à l'offset reçu par le serveur.
+ */
+async function uploadIfcInChunks(file, onProgress) {
+    const initResponse = await fetch(`${API_BASE_URL}/upload-ifc/init`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ filename: file.name, size: file.size })
+    });
+    const session = await initResponse.json();
+    if (!initResponse.ok) {
+        throw new Error(session.error || `Erreur HTTP: ${initResponse.status}`);
+    }
+    if (session.resumed) {
+        console.log(`🔁 Reprise de l'upload à ${session.progress}%`);
+    }
+    
+    const uploadId = session.upload_id;
+    const chunkSize = session.chunk_size;
+    let offset = session.received;
+    let retries = 0;
+    onProgress(Math.floor(session.progress));
+    
+    while (offset < file.size) {
+        const chunk = await file.slice(offset, Math.min(offset + chunkSize, file.size)).arrayBuffer();
+        const headers = { 'Content-Type': 'application/octet-stream' };
+        const chunkHash = await sha256Hex(chunk);
+        if (chunkHash) {
+            headers['X-Chunk-Sha256'] = chunkHash;
+        }
+        
+        let result = null;
+        let response = null;
+        try {
+            response = await fetch(`${API_BASE_URL}/upload-ifc/${uploadId}/chunk?offset=${offset}`, {
+                method: 'PUT',
+                headers: headers,
+                body: chunk
+            });
+            result = await response.json();
+        } catch (error) {
+            // Coupure réseau : nouvelle tentative depuis l'offset connu du serveur
+            console.warn('⚠️ Morceau non transmis, nouvelle tentative:', error);
+        }
+        
+        if (response && response.ok) {
+            offset = result.received;
+            retries = 0;
+            onProgress(Math.floor(result.progress));
+            continue;
+        }
+        
+        if (++retries > 5) {
+            throw new Error((result && result.error) || 'Upload interrompu');
+        }
+        if (result && result.expected_offset !== undefined) {
+            offset = result.expected_offset;
+        } else {
+            await new Promise(resolve => setTimeout(resolve, 1000 * retries));
+            const statusResponse = await fetch(`${API_BASE_URL}/upload-ifc/${uploadId}`);
+            if (statusResponse.ok) {
+                offset = (await statusResponse.json()).received;
+            }
+        }
+    }
+    
+    const finalizeResponse = await fetch(`${API_BASE_URL}/upload-ifc/${uploadId}/finalize`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({})
+    });
+    const data = await finalizeResponse.json();
+    if (!finalizeResponse.ok) {
+        throw new Error(data.error || `Erreur HTTP: ${finalizeResponse.status}`);
+    }
+    return data;
+}
+
+/**
+ * Exécute un traitement IFC long en tâche de fond (mode async des routes)
+ * et suit sa progression jusqu'à la fin. Retourne { ok, data } comme un appel synchrone.
+ */
+async function runIfcJob(path, body, label) {
+    const response = await fetch(`${API_BASE_URL}${path}?async=1`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(body || {})
+    });
+    const submitted = await response.json();
+    if (response.status !== 202) {
+        return { ok: response.ok, data: submitted };
+    }
+    
+    while (true) {
+        await new Promise(resolve => setTimeout(resolve, 1000));
+        const jobResponse = await fetch(`${API_BASE_URL}${submitted.status_url}`);
+        const job = await jobResponse.json();
+        if (!jobResponse.ok) {
+            return { ok: false, data: job };
+        }
+        
+        if (job.status === 'done') {
+            return { ok: true, data: job.result };
+        }
+        if (job.status === 'error' || job.status === 'cancelled') {
+            return { ok: false, data: { error: job.error || 'Tâche annulée' } };
+        }
+        
+        const progress = job.progress !== null ? ` ${job.progress}%` : '';
+        const eta = job.eta_seconds !== null ? ` (reste ~${Math.ceil(job.eta_seconds)} s)` : '';
+        setLoading(true, `${label}${progress}${eta}${job.message ? ' - ' + job.message : ''}`);
+    }
+}
+
 async function parseIfc() {
     try {
         setLoading(true, 'Parsing du fichier IFC vers l\'ontologie...');
         
-        const response = await fetch(`${API_BASE_URL}/parse-ifc`, {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' }
-        });
-        
-        const data = await response.json();
+        const { ok, data } = await runIfcJob('/parse-ifc', {}, 'Parsing du fichier IFC vers l\'ontologie...');
         
-        if (response.ok && data.success) {
+        if (ok && data.success) {
             notifications.success(`Fichier parsé: ${data.elements_count} éléments`);
             loadElements(); // Recharger les éléments
             updateIfcStatus(); // Mettre à jour le statut
@@ -2302,6 +2598,31 @@ async function parseIfc() {
     }
 }
 
+async function reingestIfc() {
+    const retireMissing = confirm('Retirer de l\'ontologie les éléments absents de cette révision ?\n(Annuler = les conserver)');
+    try {
+        setLoading(true, 'Comparaison de la révision avec l\'ontologie...');
+        
+        const { ok, data } = await runIfcJob('/reingest-ifc', { retire_missing: retireMissing }, 'Mise à jour de la révision...');
+        
+        if (ok && data.success) {
+            notifications.success(data.message);
+            if (data.retired) {
+                notifications.info(`${data.retired} éléments retirés`);
+            }
+            loadElements(); // Recharger les éléments
+            updateIfcStatus(); // Mettre à jour le statut
+        } else {
+            notifications.error(data.error || 'Erreur lors de la mise à jour');
+        }
+    } catch (error) {
+        console.error('Erreur:', error);
+        notifications.error('Erreur lors de la mise à jour de la révision');
+    } finally {
+        setLoading(false);
+    }
+}
+
 async function enrichIfc() {
     try {
         const response = await fetch(`${API_BASE_URL}/get-ifc-temp-status`);
@@ -2314,15 +2635,10 @@ async function enrichIfc() {
         
         setLoading(true, 'Enrichissement du modèle IFC avec calculs WLC corrects...');
         
-        // Appeler l'endpoint d'enrichissement réel
-        const enrichResponse = await fetch(`${API_BASE_URL}/enrich-ifc`, {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' }
-        });
-        
-        const enrichData = await enrichResponse.json();
+        // Appeler l'endpoint d'enrichissement réel (tâche de fond)
+        const { ok: enrichOk, data: enrichData } = await runIfcJob('/enrich-ifc', {}, 'Enrichissement du modèle IFC...');
         
-        if (enrichResponse.ok && enrichData.success) {
+        if (enrichOk && enrichData.success) {
             notifications.success(`🎉 ${enrichData.message}`);
             notifications.info(`✅ ${enrichData.elements_enriched} éléments enrichis avec PropertySets WLC_CostData`);
             notifications.info(`📁 Nouveau fichier: ${enrichData.new_size_mb} MB`);
@@ -2462,9 +2778,15 @@ async function updateIfcStatus() {
                         <small class="text-muted d-block">Uploadé: ${uploadDate}</small>
                         <span class="badge ${data.parsed ? 'bg-success' : 'bg-warning'}">${parsedStatus}</span>
                         ${data.elements_count > 0 ? `<span class="badge bg-info ms-1">${data.elements_count} éléments</span>` : ''}
+                        ${renderIfcSummary(data)}
                     </div>
                 </div>
             `;
+            
+            // Résumé rapide en cours de calcul : rafraîchir dans une seconde
+            if (data.scan_status === 'running') {
+                setTimeout(updateIfcStatus, 1000);
+            }
         } else {
             statusElement.innerHTML = `
                 <div class="text-muted text-center py-3">
@@ -2478,6 +2800,35 @@ async function updateIfcStatus() {
     }
 }
 
+/**
+ * Résumé rapide du modèle (schéma, entités, groupes) calculé sans parsing complet
+ */
+function renderIfcSummary(data) {
+    if (data.scan_status === 'running') {
+        return '<small class="text-muted d-block mt-1"><i class="fas fa-spinner fa-spin me-1"></i>Analyse du modèle...</small>';
+    }
+    if (data.scan_status !== 'done') {
+        return '';
+    }
+    
+    const topTypes = Object.entries(data.top_entity_types || {})
+        .slice(0, 5)
+        .map(([type, count]) => `${type}: ${count}`)
+        .join(', ');
+    const groupNames = (data.groups || []).slice(0, 5).map(group => group.Name || group.GlobalId).join(', ');
+    
+    return `
+        <div class="mt-1">
+            <span class="badge bg-secondary">${data.schema || 'Schéma inconnu'}</span>
+            <span class="badge bg-light text-dark ms-1">${data.entities_count} entités</span>
+            <span class="badge bg-light text-dark ms-1">~${data.approx_elements_count} éléments</span>
+            ${data.groups_count > 0 ? `<span class="badge bg-primary ms-1">${data.groups_count} groupe(s)</span>` : ''}
+            ${topTypes ? `<small class="text-muted d-block" title="${topTypes}">Types principaux: ${topTypes}</small>` : ''}
+            ${groupNames ? `<small class="text-muted d-block">Groupes: ${groupNames}</small>` : ''}
+        </div>
+    `;
+}
+
 async function enableIfcButtons() {
     // Activer les boutons selon le statut du fichier
     try {
@@ -2485,6 +2836,7 @@ async function enableIfcButtons() {
         const data = await response.json();
         
         const parseBtn = document.getElementById('parse-btn');
+        const reingestBtn = document.getElementById('reingest-btn');
         const enrichBtn = document.getElementById('enrich-btn');
         const downloadBtn = document.getElementById('download-btn');
         const clearBtn = document.getElementById('clear-btn');
@@ -2492,12 +2844,14 @@ async function enableIfcButtons() {
         
         if (data.has_file) {
             parseBtn.disabled = data.parsed; // Désactiver si déjà parsé
+            if (reingestBtn) reingestBtn.disabled = false; // Révision possible à tout moment
             enrichBtn.disabled = false; // Toujours activer si fichier présent - enrichissement basé sur GUIDs ontologie
             downloadBtn.disabled = false; // Toujours activer si fichier présent
             clearBtn.disabled = false; // Toujours disponible si fichier présent
             if (extractGroupsBtn) extractGroupsBtn.disabled = false; // Activer l'extraction des groupes
         } else {
             parseBtn.disabled = true;
+            if (reingestBtn) reingestBtn.disabled = true;
             enrichBtn.disabled = true;
             downloadBtn.disabled = true;
             clearBtn.disabled = true;
@@ -2510,6 +2864,8 @@ async function enableIfcButtons() {
 
 function disableIfcButtons() {
     document.getElementById('parse-btn').disabled = true;
+    const reingestBtn = document.getElementById('reingest-btn');
+    if (reingestBtn) reingestBtn.disabled = true;
     document.getElementById('enrich-btn').disabled = true;
     document.getElementById('download-btn').disabled = true;
     document.getElementById('clear-btn').disabled = true;
@@ -3560,19 +3916,11 @@ async function extractSelectedGroups() {
         
         console.log('🎯 Groupes sélectionnés pour extraction:', selectedGroups);
         
-        const response = await fetch(`${API_BASE_URL}/parse-ifc-groups`, {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json'
-            },
-            body: JSON.stringify({
-                target_groups: selectedGroups
-            })
-        });
+        const { ok, data } = await runIfcJob('/parse-ifc-groups', {
+            target_groups: selectedGroups
+        }, 'Extraction des groupes IFC...');
 
-        const data = await response.json();
-
-        if (!response.ok) {
+        if (!ok) {
             throw new Error(data.error || 'Erreur lors de l\'extraction des groupes');
         }
 